@@ -0,0 +1,83 @@
+from urllib.parse import parse_qs
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.responses import Response
+from starlette.types import ASGIApp, Receive, Scope, Send
+from core.event_logger import get_logs_version
+from core.snapshot import BOOT_ID, get_snapshot
+
+# Values FastAPI parses as True for a bool query parameter
+_TRUTHY = frozenset(("1", "true", "t", "yes", "y", "on"))
+
+
+def current_etag() -> str:
+    """Weak ETag derived from the scan snapshot version and the audit log version"""
+    return f'W/"{BOOT_ID}-{get_snapshot().version}-{get_logs_version()}"'
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    # Weak comparison: ignore the W/ prefix on either side
+    opaque = etag[2:] if etag.startswith("W/") else etag
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*":
+            return True
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == opaque:
+            return True
+    return False
+
+
+class ConditionalGetMiddleware:
+    """
+    ETag / If-None-Match support for read endpoints.
+    Matching requests are answered with 304 before the route runs, so GETs
+    with side effects (e.g. ?refresh=true rescans) must bypass it through
+    `bypass_params`; a bypass param only counts when its value is true.
+    """
+
+    def __init__(self, app: ASGIApp, prefix: str = "/api/v1", exclude=(), bypass_params=("refresh",)):
+        self.app = app
+        self.prefix = prefix
+        self.exclude = frozenset(exclude)
+        self.bypass_params = frozenset(bypass_params)
+
+    def _bypassed(self, scope: Scope) -> bool:
+        if not self.bypass_params or not scope.get("query_string"):
+            return False
+        params = parse_qs(scope["query_string"].decode("latin-1"))
+        return any(
+            value.lower() in _TRUTHY
+            for name in self.bypass_params
+            for value in params.get(name, ())
+        )
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if (
+            scope["type"] != "http"
+            or scope["method"] != "GET"
+            or not scope["path"].startswith(self.prefix)
+            or scope["path"] in self.exclude
+            or self._bypassed(scope)
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        # Taken before the route runs: a newer response tagged with an older
+        # version only costs the client one extra full download
+        etag = current_etag()
+        if_none_match = Headers(scope=scope).get("if-none-match")
+        if if_none_match and _etag_matches(if_none_match, etag):
+            response = Response(status_code=304, headers={"ETag": etag, "Cache-Control": "no-cache"})
+            await response(scope, receive, send)
+            return
+
+        async def send_with_etag(message):
+            if message["type"] == "http.response.start" and message["status"] == 200:
+                headers = MutableHeaders(scope=message)
+                headers["ETag"] = etag
+                # Browsers revalidate with If-None-Match on every poll
+                headers["Cache-Control"] = "no-cache"
+            await send(message)
+
+        await self.app(scope, receive, send_with_etag)
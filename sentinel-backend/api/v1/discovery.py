@@ -1,6 +1,10 @@
-from fastapi import APIRouter, HTTPException
-from typing import List
+from fastapi import APIRouter, BackgroundTasks, HTTPException
+from pydantic import BaseModel
+from typing import List, Optional
 from core.scanner import DockerScanner, ContainerInfo
+from core.docker_client import is_known_host
+from core.async_docker import DockerUnavailable
+from core.container_index import AmbiguousContainerId
 import logging
 
 logger = logging.getLogger(__name__)
@@ -9,21 +13,36 @@ router = APIRouter()
 scanner = DockerScanner()
 
 
+class RescanRequest(BaseModel):
+    """Containers to re-scan right away; a full sweep when container_ids is omitted"""
+    container_ids: Optional[List[str]] = None
+    host: Optional[str] = None
+
+
+async def _host_containers(host: Optional[str] = None):
+    """Scanned containers, optionally limited to one Docker host"""
+    if host is not None and not is_known_host(host):
+        raise HTTPException(status_code=404, detail=f"Unknown Docker host {host}")
+    return (await scanner.get_snapshot_async()).containers_for(host)
+
+
 import asyncio
 
 @router.get("/discovery/shadow-ai", response_model=List[ContainerInfo])
-async def get_shadow_ai():
+async def get_shadow_ai(host: Optional[str] = None):
     """
     Discover containers with trust scores and identify shadow AI.
     
     Shadow AI = Unsanctioned containers with low trust scores
     """
     try:
-        # Run synchronous docker calls in a thread to avoid blocking the event loop
-        containers = await asyncio.to_thread(scanner.scan_containers)
+        # Reads the published snapshot; the initial scan (if any) runs off the event loop
+        containers = await _host_containers(host)
         print(f"DEBUG: Found {len(containers)} containers")
         logger.info(f"Discovery API: Found {len(containers)} containers")
         return containers
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error scanning containers: {e}")
         # Return empty list instead of 500 to avoid breaking frontend, but log heavily
@@ -31,31 +50,108 @@ async def get_shadow_ai():
 
 
 @router.get("/discovery/containers", response_model=List[ContainerInfo])
-async def get_all_containers():
+async def get_all_containers(host: Optional[str] = None):
     """
     Get all containers with full trust score details
     """
     try:
-        containers = scanner.scan_containers()
+        containers = await _host_containers(host)
         return containers
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error getting containers: {e}")
         raise HTTPException(status_code=500, detail=f"Failed to get containers: {str(e)}")
 
 
+async def _find_container(container_id: str, host: Optional[str] = None) -> Optional[ContainerInfo]:
+    """Scanned container by full ID, name or unique ID prefix; 409 when ambiguous"""
+    try:
+        return (await scanner.get_snapshot_async()).find_container(container_id, host)
+    except AmbiguousContainerId as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+
+async def _refresh_container(container_id: str, host: Optional[str] = None) -> ContainerInfo:
+    """Targeted rescan of one container; the result is merged into a new snapshot"""
+    known = await _find_container(container_id, host)
+    if known is not None:
+        targets = [(known.host, known.full_id or known.id)]
+    else:
+        # Not scanned yet (e.g. it just started): ask the daemons directly
+        targets = [(name, container_id) for name in ([host] if host else scanner.hosts())]
+
+    unavailable = None
+    for target_host, target_id in targets:
+        try:
+            info = await asyncio.to_thread(scanner.rescan_container, target_host, target_id)
+        except DockerUnavailable as e:
+            unavailable = e
+            continue
+        if info is not None:
+            return info
+    if unavailable is not None:
+        raise HTTPException(status_code=503, detail=f"Docker unavailable: {unavailable}")
+    raise HTTPException(status_code=404, detail=f"Container {container_id} not found")
+
+
 @router.get("/discovery/containers/{container_id}", response_model=ContainerInfo)
-async def get_container_details(container_id: str):
+async def get_container_details(container_id: str, host: Optional[str] = None, refresh: bool = False):
     """
-    Get detailed trust score analysis for a specific container
+    Get detailed trust score analysis for a specific container.
+    With refresh=true the container is re-scanned first instead of served from the last sweep.
     """
     try:
-        containers = scanner.scan_containers()
-        for container in containers:
-            if container.id.startswith(container_id[:12]):
-                return container
-        raise HTTPException(status_code=404, detail=f"Container {container_id} not found")
+        if host is not None and not is_known_host(host):
+            raise HTTPException(status_code=404, detail=f"Unknown Docker host {host}")
+        if refresh:
+            return await _refresh_container(container_id, host)
+        container = await _find_container(container_id, host)
+        if container is None:
+            raise HTTPException(status_code=404, detail=f"Container {container_id} not found")
+        return container
     except HTTPException:
         raise
     except Exception as e:
         logger.error(f"Error getting container details: {e}")
         raise HTTPException(status_code=500, detail=f"Failed to get container details: {str(e)}")
+
+
+@router.post("/discovery/containers/{container_id}/rescan", response_model=ContainerInfo)
+async def rescan_container(container_id: str, host: Optional[str] = None):
+    """
+    Re-inspect, fetch stats for and re-score one container now, e.g. right
+    before a governance action. Returns the fresh result.
+    """
+    try:
+        if host is not None and not is_known_host(host):
+            raise HTTPException(status_code=404, detail=f"Unknown Docker host {host}")
+        return await _refresh_container(container_id, host)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error rescanning container {container_id}: {e}")
+        raise HTTPException(status_code=500, detail=f"Failed to rescan container: {str(e)}")
+
+
+@router.post("/discovery/rescan", status_code=202)
+async def trigger_rescan(background_tasks: BackgroundTasks, request: Optional[RescanRequest] = None):
+    """
+    Ask the scan scheduler to re-scan now instead of waiting for its next slot.
+    Returns immediately; results show up in the next published snapshot.
+    """
+    request = request or RescanRequest()
+    if request.host is not None and not is_known_host(request.host):
+        raise HTTPException(status_code=404, detail=f"Unknown Docker host {request.host}")
+
+    unscheduled = scanner.request_rescan(request.host, request.container_ids)
+    # Background scanning not running (e.g. embedded use): scan in a worker
+    # thread once the 202 has been sent
+    for host in unscheduled:
+        background_tasks.add_task(scanner.rescan_now, host, request.container_ids)
+
+    return {
+        "scheduled": "full" if request.container_ids is None else "containers",
+        "container_ids": request.container_ids or [],
+        "hosts": [request.host] if request.host else scanner.hosts(),
+    }
@@ -1,14 +1,24 @@
-from fastapi import APIRouter, HTTPException, BackgroundTasks
-import docker
+from fastapi import APIRouter, HTTPException, BackgroundTasks, Query, Response
+from datetime import datetime
 from pydantic import BaseModel
-from typing import List, Optional, Any
-from core.event_logger import log, log_trust_score_change
+from typing import List, Optional, Any, Dict, Literal, Tuple
+from core.docker_client import is_known_host
+from core.async_docker import AsyncDockerClient, DockerAPIError, DockerNotFound, DockerUnavailable
+from core.container_index import AmbiguousContainerId
+from core.event_logger import log, log_batch, trust_score_change_event
+import asyncio
 import logging
+import os
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
+# Docker calls in flight at once for one batch request
+GOVERNANCE_BATCH_CONCURRENCY = int(os.getenv("SENTINEL_GOVERNANCE_CONCURRENCY", "16"))
+# Most containers a single batch request may act on
+GOVERNANCE_BATCH_MAX = int(os.getenv("SENTINEL_GOVERNANCE_BATCH_MAX", "500"))
+
 
 class GovernanceActionResponse(BaseModel):
     """Response from governance action"""
@@ -18,6 +28,54 @@ class GovernanceActionResponse(BaseModel):
     action_taken: str
 
 
+class BatchSelector(BaseModel):
+    """Selects scanned containers; every criterion given must match"""
+    trust_score_below: Optional[int] = None
+    sanctioned: Optional[bool] = None
+    threat_level: Optional[str] = None
+    status: Optional[str] = None
+    host: Optional[str] = None
+
+    def is_empty(self) -> bool:
+        return all(value is None for value in self.model_dump().values())
+
+    def matches(self, container) -> bool:
+        return (
+            (self.trust_score_below is None or container.trust_score < self.trust_score_below)
+            and (self.sanctioned is None or container.is_sanctioned == self.sanctioned)
+            and (self.threat_level is None or container.threat_level.lower() == self.threat_level.lower())
+            and (self.status is None or container.status == self.status)
+            and (self.host is None or container.host == self.host)
+        )
+
+
+class GovernanceBatchRequest(BaseModel):
+    """Bulk governance action on explicit container IDs or on a selector"""
+    action: Literal["terminate", "quarantine"]
+    container_ids: Optional[List[str]] = None
+    selector: Optional[BatchSelector] = None
+    host: Optional[str] = None
+
+
+class BatchItemResult(BaseModel):
+    """Outcome for one container of a batch"""
+    container_id: str
+    name: Optional[str] = None
+    host: Optional[str] = None
+    success: bool
+    outcome: str  # "terminated", "quarantined", "already_quarantined", "not_found", "ambiguous", "unavailable", "failed"
+    message: str
+
+
+class GovernanceBatchResponse(BaseModel):
+    """Response from a bulk governance action"""
+    action_taken: str
+    requested: int
+    succeeded: int
+    failed: int
+    results: List[BatchItemResult]
+
+
 class AuditLogResponse(BaseModel):
     """Audit log entry response"""
     id: str
@@ -32,89 +90,140 @@ class AuditLogResponse(BaseModel):
     trust_score_change: Optional[Any] = None # Relaxed type to avoid 422
 
 
-def get_docker_client():
+def get_docker_client(host: Optional[str] = None):
     """
-    Get Docker client with Windows TCP fallback support
+    Get the shared async Docker client for a host (default host when None)
     """
-    try:
-        # Try environment first (Linux/Mac)
-        client = docker.from_env()
-        return client
-    except Exception as e:
-        logger.warning(f"docker.from_env() failed: {e}")
-        try:
-            # Try Windows TCP connection
-            client = docker.DockerClient(base_url="tcp://127.0.0.1:2375")
-            client.ping()
-            logger.info("Using Windows TCP connection (127.0.0.1:2375)")
-            return client
-        except Exception as e2:
-            logger.error(f"Failed to connect to Docker: {e}, {e2}")
-            raise
+    return AsyncDockerClient(host)
 
 
-@router.post("/governance/terminate/{container_id}", response_model=GovernanceActionResponse)
-async def terminate_container(container_id: str):
+async def _find_container(container_id: str, host: Optional[str] = None):
     """
-    Terminate and remove a container (high-risk governance action)
+    Scanned container for a full ID, name or unique ID prefix (and host), or
+    None. Ambiguous references are rejected with 409 before anything is touched.
     """
     try:
-        client = get_docker_client()
+        from core.scanner import DockerScanner
+        snapshot = await DockerScanner().get_snapshot_async()
     except Exception as e:
-        logger.error(f"Docker connection failed: {e}")
-        raise HTTPException(status_code=503, detail="Docker service unavailable")
+        logger.warning(f"Could not get trust score: {e}")
+        return None
+    try:
+        return snapshot.find_container(container_id, host)
+    except AmbiguousContainerId as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+
+def _docker_target(container_id: str, known) -> str:
+    """Act on the resolved full ID, so Docker cannot pick a different container for a prefix or name"""
+    return (known.full_id or known.id) if known else container_id
 
+
+# ─── DOCKER STEPS ───────────────────────────
+
+async def _terminate(client: AsyncDockerClient, container_id: str) -> str:
+    """Kill and remove a container; returns its name"""
+    attrs = await client.inspect_container(container_id)
+    name = (attrs.get("Name") or container_id).lstrip("/")
+
+    # Kill and Remove with error handling
     try:
-        container = client.containers.get(container_id)
-        name = container.name
-        old_trust_score = None
-
-        # Get current trust score from attrs if available (for logging)
-        try:
-            from core.scanner import DockerScanner
-            scanner = DockerScanner()
-            containers_info = scanner.scan_containers()
-            for c in containers_info:
-                if c.id.startswith(container_id[:12]):
-                    old_trust_score = c.trust_score
-                    break
-        except Exception as e:
-            logger.warning(f"Could not get trust score: {e}")
-
-        # Kill and Remove with error handling
-        try:
-            container.kill()
-            logger.debug(f"Container {name} killed")
-        except Exception as e:
-            if "is not running" in str(e):
-                logger.info(f"Container {name} was not running")
-            else:
-                raise
+        await client.kill(container_id)
+        logger.debug(f"Container {name} killed")
+    except DockerAPIError as e:
+        if "is not running" in e.message:
+            logger.info(f"Container {name} was not running")
+        else:
+            raise
 
-        try:
-            container.remove(force=True)
-            logger.debug(f"Container {name} removed")
-        except Exception as e:
-            logger.warning(f"Error removing container {name}: {e}")
+    try:
+        await client.remove(container_id, force=True)
+        logger.debug(f"Container {name} removed")
+    except DockerAPIError as e:
+        logger.warning(f"Error removing container {name}: {e}")
+    return name
 
-        # Log the action with trust score context
-        log(
+
+async def _quarantine(client: AsyncDockerClient, container_id: str) -> Tuple[str, bool]:
+    """Pause a container; returns (name, was already paused)"""
+    attrs = await client.inspect_container(container_id)
+    name = (attrs.get("Name") or container_id).lstrip("/")
+    try:
+        await client.pause(container_id)
+        logger.info(f"Container {name} quarantined (paused)")
+        return name, False
+    except DockerAPIError as e:
+        if "already paused" in e.message:
+            logger.info(f"Container {name} was already paused")
+            return name, True
+        raise
+
+
+def _terminate_events(name: str, container_id: str, old_trust_score: Optional[int]) -> List[Dict[str, Any]]:
+    events = [{
+        "agent": name,
+        "action": "Terminate",
+        "status": "Success",
+        "details": f"Container {container_id} terminated via governance policy",
+        "container_id": container_id,
+        "tool": "Governor Enforcement",
+    }]
+    if old_trust_score is not None:
+        events.append(trust_score_change_event(name, container_id, old_trust_score, 0, "Container terminated"))
+    return events
+
+
+def _quarantine_events(
+    name: str, container_id: str, old_trust_score: Optional[int], already_paused: bool
+) -> List[Dict[str, Any]]:
+    if already_paused:
+        return [{
+            "agent": name,
+            "action": "Quarantine",
+            "status": "Warning",
+            "details": "Container was already quarantined",
+            "container_id": container_id,
+        }]
+    events = [{
+        "agent": name,
+        "action": "Quarantine",
+        "status": "Success",
+        "details": f"Container {container_id} quarantined (paused) for investigation",
+        "container_id": container_id,
+        "tool": "Governor Enforcement",
+    }]
+    if old_trust_score is not None:
+        events.append(trust_score_change_event(
             name,
-            "Terminate",
-            "Success",
-            f"Container {container_id} terminated via governance policy",
-            container_id=container_id,
-            tool="Governor Enforcement",
-        )
+            container_id,
+            old_trust_score,
+            max(old_trust_score - 10, 0),  # Penalize by 10 points
+            "Container quarantined",
+        ))
+    return events
 
-        if old_trust_score is not None:
-            log_trust_score_change(
-                name,
-                container_id,
-                old_trust_score,
-                0,
-                "Container terminated",
-            )
+
+def _failure_event(action: str, container_id: str, details: str) -> Dict[str, Any]:
+    return {"agent": container_id, "action": action, "status": "Failed", "details": details, "container_id": container_id}
+
+
+# ─── ENDPOINTS ───────────────────────────
+
+@router.post("/governance/terminate/{container_id}", response_model=GovernanceActionResponse)
+async def terminate_container(container_id: str, host: Optional[str] = None):
+    """
+    Terminate and remove a container (high-risk governance action)
+    """
+    if host is not None and not is_known_host(host):
+        raise HTTPException(status_code=404, detail=f"Unknown Docker host {host}")
+    # The scanned container tells which Docker host it runs on
+    known = await _find_container(container_id, host)
+    client = get_docker_client(host or (known.host if known else None))
+
+    try:
+        name = await _terminate(client, _docker_target(container_id, known))
+        # Trust score from the last scan (for logging)
+        log_batch(_terminate_events(name, container_id, known.trust_score if known else None))
 
         return GovernanceActionResponse(
             success=True,
@@ -123,162 +232,225 @@ async def terminate_container(container_id: str):
             action_taken="terminate",
         )
 
-    except docker.errors.NotFound:
+    except DockerNotFound:
         logger.warning(f"Container {container_id} not found")
-        log(
-            container_id,
-            "Terminate",
-            "Failed",
-            "Container not found",
-            container_id=container_id,
-        )
+        log(**_failure_event("Terminate", container_id, "Container not found"))
         raise HTTPException(status_code=404, detail=f"Container {container_id} not found")
 
+    except DockerUnavailable as e:
+        logger.error(f"Docker connection failed during terminate: {e}")
+        raise HTTPException(status_code=503, detail="Docker service unavailable")
+
     except Exception as e:
         logger.error(f"Error terminating container {container_id}: {e}")
-        log(
-            container_id,
-            "Terminate",
-            "Failed",
-            str(e),
-            container_id=container_id,
-        )
+        log(**_failure_event("Terminate", container_id, str(e)))
         raise HTTPException(status_code=500, detail=f"Failed to terminate container: {str(e)}")
 
 
 @router.post("/governance/quarantine/{container_id}", response_model=GovernanceActionResponse)
-async def quarantine_container(container_id: str):
+async def quarantine_container(container_id: str, host: Optional[str] = None):
     """
     Quarantine a container by pausing it (investigative governance action)
     """
-    try:
-        client = get_docker_client()
-    except Exception as e:
-        logger.error(f"Docker connection failed: {e}")
-        raise HTTPException(status_code=503, detail="Docker service unavailable")
+    if host is not None and not is_known_host(host):
+        raise HTTPException(status_code=404, detail=f"Unknown Docker host {host}")
+    known = await _find_container(container_id, host)
+    client = get_docker_client(host or (known.host if known else None))
 
     try:
-        container = client.containers.get(container_id)
-        name = container.name
-        old_trust_score = None
-
-        # Get current trust score (for logging)
-        try:
-            from core.scanner import DockerScanner
-            scanner = DockerScanner()
-            containers_info = scanner.scan_containers()
-            for c in containers_info:
-                if c.id.startswith(container_id[:12]):
-                    old_trust_score = c.trust_score
-                    break
-        except Exception as e:
-            logger.warning(f"Could not get trust score: {e}")
-
-        # Pause the container (quarantine)
-        try:
-            container.pause()
-            logger.info(f"Container {name} quarantined (paused)")
-
-            log(
-                name,
-                "Quarantine",
-                "Success",
-                f"Container {container_id} quarantined (paused) for investigation",
-                container_id=container_id,
-                tool="Governor Enforcement",
-            )
+        name, already_paused = await _quarantine(client, _docker_target(container_id, known))
+        log_batch(_quarantine_events(name, container_id, known.trust_score if known else None, already_paused))
 
-            if old_trust_score is not None:
-                log_trust_score_change(
-                    name,
-                    container_id,
-                    old_trust_score,
-                    max(old_trust_score - 10, 0),  # Penalize by 10 points
-                    "Container quarantined",
-                )
-
-            return GovernanceActionResponse(
-                success=True,
-                message=f"Container {name} ({container_id}) quarantined (paused)",
-                container_id=container_id,
-                action_taken="quarantine",
-            )
-
-        except docker.errors.APIError as e:
-            if "already paused" in str(e):
-                logger.info(f"Container {name} was already paused")
-                log(
-                    name,
-                    "Quarantine",
-                    "Warning",
-                    "Container was already quarantined",
-                    container_id=container_id,
-                )
-                return GovernanceActionResponse(
-                    success=True,
-                    message=f"Container {name} was already quarantined",
-                    container_id=container_id,
-                    action_taken="quarantine",
-                )
-            else:
-                raise
-
-    except docker.errors.NotFound:
-        logger.warning(f"Container {container_id} not found")
-        log(
-            container_id,
-            "Quarantine",
-            "Failed",
-            "Container not found",
+        return GovernanceActionResponse(
+            success=True,
+            message=(
+                f"Container {name} was already quarantined"
+                if already_paused
+                else f"Container {name} ({container_id}) quarantined (paused)"
+            ),
             container_id=container_id,
+            action_taken="quarantine",
         )
+
+    except DockerNotFound:
+        logger.warning(f"Container {container_id} not found")
+        log(**_failure_event("Quarantine", container_id, "Container not found"))
         raise HTTPException(status_code=404, detail=f"Container {container_id} not found")
 
+    except DockerUnavailable as e:
+        logger.error(f"Docker connection failed during quarantine: {e}")
+        raise HTTPException(status_code=503, detail="Docker service unavailable")
+
     except Exception as e:
         logger.error(f"Error quarantining container {container_id}: {e}")
-        log(
-            container_id,
-            "Quarantine",
-            "Failed",
-            str(e),
-            container_id=container_id,
-        )
+        log(**_failure_event("Quarantine", container_id, str(e)))
         raise HTTPException(status_code=500, detail=f"Failed to quarantine container: {str(e)}")
 
 
+async def _apply_batch_action(
+    action: str, container_id: str, known, host: Optional[str]
+) -> Tuple[BatchItemResult, List[Dict[str, Any]]]:
+    """Run one container's action; returns its result and the audit events to write"""
+    client = get_docker_client(host)
+    old_trust_score = known.trust_score if known else None
+    label = action.capitalize()
+    try:
+        if action == "terminate":
+            name = await _terminate(client, _docker_target(container_id, known))
+            outcome, message = "terminated", f"Container {name} ({container_id}) terminated and removed"
+            events = _terminate_events(name, container_id, old_trust_score)
+        else:
+            name, already_paused = await _quarantine(client, _docker_target(container_id, known))
+            if already_paused:
+                outcome, message = "already_quarantined", f"Container {name} was already quarantined"
+            else:
+                outcome, message = "quarantined", f"Container {name} ({container_id}) quarantined (paused)"
+            events = _quarantine_events(name, container_id, old_trust_score, already_paused)
+        return BatchItemResult(
+            container_id=container_id, name=name, host=client.host, success=True, outcome=outcome, message=message
+        ), events
+
+    except DockerNotFound:
+        outcome, message = "not_found", f"Container {container_id} not found"
+        events = [_failure_event(label, container_id, "Container not found")]
+    except DockerUnavailable as e:
+        logger.error(f"Docker connection failed during batch {action}: {e}")
+        outcome, message, events = "unavailable", "Docker service unavailable", []
+    except Exception as e:
+        logger.error(f"Error in batch {action} of {container_id}: {e}")
+        outcome, message = "failed", str(e)
+        events = [_failure_event(label, container_id, str(e))]
+
+    return BatchItemResult(
+        container_id=container_id,
+        name=known.name if known else None,
+        host=client.host,
+        success=False,
+        outcome=outcome,
+        message=message,
+    ), events
+
+
+@router.post("/governance/batch", response_model=GovernanceBatchResponse)
+async def batch_action(request: GovernanceBatchRequest):
+    """
+    Terminate or quarantine many containers at once (incident response)
+
+    Targets are explicit container IDs or a selector over the last scan,
+    e.g. {"trust_score_below": 40, "sanctioned": false}. Docker calls run
+    concurrently (at most GOVERNANCE_BATCH_CONCURRENCY in flight) and the
+    audit entries of the whole batch are written in one commit.
+    """
+    if (request.container_ids is None) == (request.selector is None):
+        raise HTTPException(status_code=400, detail="Provide exactly one of container_ids or selector")
+    if request.selector is not None and request.selector.is_empty():
+        raise HTTPException(status_code=400, detail="Selector needs at least one criterion")
+    for host in (request.host, request.selector.host if request.selector else None):
+        if host is not None and not is_known_host(host):
+            raise HTTPException(status_code=404, detail=f"Unknown Docker host {host}")
+
+    from core.scanner import DockerScanner
+    snapshot = await DockerScanner().get_snapshot_async()
+    # (requested ID, scanned container or None, ambiguity error or None)
+    targets = []
+    if request.selector is not None:
+        targets = [
+            (c.id, c, None) for c in snapshot.containers
+            if request.selector.matches(c) and (request.host is None or c.host == request.host)
+        ]
+    else:
+        for cid in dict.fromkeys(request.container_ids):
+            try:
+                targets.append((cid, snapshot.find_container(cid, request.host), None))
+            except AmbiguousContainerId as e:
+                targets.append((cid, None, e))
+    if len(targets) > GOVERNANCE_BATCH_MAX:
+        raise HTTPException(
+            status_code=400, detail=f"Batch of {len(targets)} containers exceeds the limit of {GOVERNANCE_BATCH_MAX}"
+        )
+
+    semaphore = asyncio.Semaphore(GOVERNANCE_BATCH_CONCURRENCY)
+
+    async def run(container_id: str, known, ambiguous: Optional[AmbiguousContainerId]):
+        if ambiguous is not None:
+            # Nothing was touched, so there is nothing to audit
+            return BatchItemResult(
+                container_id=container_id, host=request.host, success=False, outcome="ambiguous", message=str(ambiguous)
+            ), []
+        async with semaphore:
+            return await _apply_batch_action(
+                request.action, container_id, known, request.host or (known.host if known else None)
+            )
+
+    outcomes = await asyncio.gather(*(run(cid, known, ambiguous) for cid, known, ambiguous in targets))
+
+    results = [result for result, _ in outcomes]
+    log_batch([event for _, events in outcomes for event in events])
+    succeeded = sum(1 for r in results if r.success)
+    logger.info(f"Batch {request.action}: {succeeded}/{len(results)} succeeded")
+
+    return GovernanceBatchResponse(
+        action_taken=request.action,
+        requested=len(results),
+        succeeded=succeeded,
+        failed=len(results) - succeeded,
+        results=results,
+    )
+
+
 @router.get("/governance/audit-logs", response_model=List[AuditLogResponse])
-async def get_audit_logs(limit: int = 50):
+async def get_audit_logs(
+    response: Response,
+    limit: int = Query(50, ge=1, le=1000),
+    cursor: Optional[int] = Query(None, description="Return entries older than this sequence ID"),
+    container_id: Optional[str] = None,
+    action: Optional[str] = None,
+    status: Optional[str] = None,
+    agent: Optional[str] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+):
     """
-    Get audit logs with full trust score context
-    Supports pagination via limit parameter
+    Get audit logs with full trust score context (newest first)
+    
+    Cursor pagination keyed on the sequence ID: pass the X-Next-Cursor
+    header of one page as ?cursor= to get the next. Filters are served
+    from the logger's indexes; pages past the in-memory window are read
+    from the persistent store.
     """
     try:
-        from core.event_logger import get_logs
+        from core.event_logger import logger_instance
+
+        entries = await asyncio.to_thread(
+            logger_instance.query,
+            before=cursor,
+            limit=limit,
+            since=since.timestamp() if since else None,
+            until=until.timestamp() if until else None,
+            container_id=container_id,
+            action=action,
+            status=status,
+            agentName=agent,
+        )
 
-        all_logs = get_logs()
-        recent_logs = all_logs[:limit]
-        
-        valid_logs = []
-        for log_entry in recent_logs:
-            try:
-                # Ensure all required fields exist or have defaults
-                valid_logs.append(AuditLogResponse(
-                    id=str(log_entry.get("id", "")),
-                    timestamp=str(log_entry.get("timestamp", "")),
-                    agent_name=str(log_entry.get("agentName", "Unknown")),
-                    action=str(log_entry.get("action", "Unknown")),
-                    status=str(log_entry.get("status", "Info")),
-                    details=str(log_entry.get("details", "")),
-                    tool=str(log_entry.get("tool", "Docker SDK")),
-                    duration=int(log_entry.get("duration", 0)),
-                    container_id=log_entry.get("container_id"),
-                    trust_score_change=log_entry.get("trust_score_change"),
-                ))
-            except Exception as e:
-                logger.warning(f"Skipping malformed log entry: {e}")
-                continue
-
-        return valid_logs
+        if len(entries) == limit:
+            response.headers["X-Next-Cursor"] = str(entries[-1]["seq"])
+
+        return [
+            {
+                "id": entry["id"],
+                "timestamp": entry["timestamp"],
+                "agent_name": entry["agentName"],
+                "action": entry["action"],
+                "status": entry["status"],
+                "details": entry["details"],
+                "tool": entry["tool"],
+                "duration": entry["duration"],
+                "container_id": entry["container_id"],
+                "trust_score_change": entry["trust_score_change"],
+            }
+            for entry in entries
+        ]
 
     except Exception as e:
         logger.error(f"Error fetching audit logs: {e}")
@@ -1,14 +1,25 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, HTTPException, Query
 from pydantic import BaseModel
 from typing import List, Dict, Any, Optional
 from datetime import datetime
 from core.scanner import DockerScanner
+from core.docker_client import all_hosts_health, is_known_host
+from core.policy_mapper import get_policy
+from core.aggregates import HOURLY_COST_PER_CONTAINER
+from core.timeseries import TimeSeriesStore, FLEET_KEY, RESOLUTIONS
 import logging
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
+
+async def _host_aggregates(host: Optional[str] = None):
+    """Fleet aggregates, globally or for one Docker host"""
+    if host is not None and not is_known_host(host):
+        raise HTTPException(status_code=404, detail=f"Unknown Docker host {host}")
+    return (await DockerScanner().get_snapshot_async()).aggregates_for(host)
+
 # ─── PYDANTIC MODELS FOR TYPE SAFETY ───────────────────────────
 
 class HealthMetrics(BaseModel):
@@ -47,60 +58,22 @@ class MetricsSummary(BaseModel):
 # ─── ENDPOINTS ───────────────────────────
 
 @router.get("/metrics/summary", response_model=MetricsSummary)
-async def get_metrics_summary():
+async def get_metrics_summary(host: Optional[str] = None):
     """
     Get executive summary metrics with real trust scores
     """
-    scanner = DockerScanner()
-    containers = scanner.scan_containers()
-    
-    total = len(containers)
-    system_status_ok = True
+    aggregates = await _host_aggregates(host)
 
     try:
-        # Calculate metrics based on trust scores
-        trust_scores = [c.trust_score for c in containers]
-        average_trust_score = sum(trust_scores) / len(trust_scores) if trust_scores else 100.0
-
-        # Count critical and healthy
-        critical_containers = len([c for c in containers if c.trust_score < 40])
-        healthy_containers = len([c for c in containers if c.trust_score >= 80])
-        shadow_ai_count = len([c for c in containers if not c.is_sanctioned])
-
-        # Threat level based on worst trust score
-        if containers:
-            worst_trust = min(trust_scores)
-            if worst_trust < 40:
-                threat_level = "Critical"
-            elif worst_trust < 60:
-                threat_level = "High"
-            elif worst_trust < 80:
-                threat_level = "Elevated"
-            else:
-                threat_level = "Low"
-        else:
-            threat_level = "Low"
-
-        # System health
-        if critical_containers > 0:
-            system_health = "Critical"
-        elif shadow_ai_count > 0 and average_trust_score < 60:
-            system_health = "At Risk"
-        else:
-            system_health = "Healthy"
-
-        # Cost Savings (stopped containers * $250/day)
-        stopped_containers = len([c for c in containers if c.status != 'running'])
-        money_saved = stopped_containers * 250
-
         return MetricsSummary(
-            total_containers=total,
-            shadow_ai_detected=shadow_ai_count,
-            critical_risks=critical_containers,
-            system_health=system_health,
-            threat_level=threat_level,
-            money_saved=money_saved,
-            average_trust_score=round(average_trust_score, 2),
+            total_containers=aggregates.total_containers,
+            shadow_ai_detected=aggregates.shadow_ai_count,
+            critical_risks=aggregates.critical_containers,
+            system_health=aggregates.system_health,
+            threat_level=aggregates.threat_level,
+            # Cost Savings (stopped containers * $250/day)
+            money_saved=aggregates.cost["totalSaved"],
+            average_trust_score=round(aggregates.average_trust_score, 2),
         )
 
     except Exception as e:
@@ -117,36 +90,21 @@ async def get_metrics_summary():
 
 
 @router.get("/system/health", response_model=HealthMetrics)
-async def get_system_health():
+async def get_system_health(host: Optional[str] = None):
     """
     GET /system/health
     
     Returns aggregated average Trust Score and system health status
     """
-    scanner = DockerScanner()
-    containers = scanner.scan_containers()
+    aggregates = await _host_aggregates(host)
 
     try:
-        trust_scores = [c.trust_score for c in containers]
-        average_trust_score = sum(trust_scores) / len(trust_scores) if trust_scores else 100.0
-
-        critical_containers = len([c for c in containers if c.trust_score < 40])
-        healthy_containers = len([c for c in containers if c.trust_score >= 80])
-
-        # Determine status
-        if critical_containers > 2:
-            status = "Critical"
-        elif average_trust_score < 60:
-            status = "At Risk"
-        else:
-            status = "Healthy"
-
         return HealthMetrics(
-            average_trust_score=round(average_trust_score, 2),
-            total_containers=len(containers),
-            critical_containers=critical_containers,
-            healthy_containers=healthy_containers,
-            status=status,
+            average_trust_score=round(aggregates.average_trust_score, 2),
+            total_containers=aggregates.total_containers,
+            critical_containers=aggregates.critical_containers,
+            healthy_containers=aggregates.healthy_containers,
+            status=aggregates.health_status,
             timestamp=datetime.now().isoformat(),
         )
 
@@ -163,143 +121,83 @@ async def get_system_health():
 
 
 @router.get("/security/alerts", response_model=List[SecurityAlert])
-async def get_security_alerts():
+async def get_security_alerts(host: Optional[str] = None):
     """
     GET /security/alerts
     
     Returns real-time alerts for containers below 60% trust score.
-    Format: {timestamp, severity, source, message}
+    Alerts are built once per scan snapshot.
+    """
+    return (await _host_aggregates(host)).alerts
+
+
+@router.get("/system/scanner")
+async def get_scanner_status():
+    """
+    GET /system/scanner
+
+    Returns timing, stats-timeout and score cache figures from the last full scan
     """
     scanner = DockerScanner()
-    containers = scanner.scan_containers()
-    alerts: List[SecurityAlert] = []
+    return scanner.get_scan_metrics()
 
-    try:
-        alert_counter = 0
-
-        for container in containers:
-            # Generate alert if trust score < 60
-            if container.trust_score < 60:
-                alert_counter += 1
-                
-                # Determine severity based on trust score
-                if container.trust_score < 30:
-                    severity = "critical"
-                elif container.trust_score < 45:
-                    severity = "high"
-                elif container.trust_score < 60:
-                    severity = "medium"
-                else:
-                    severity = "low"
-
-                # Build message based on trust details
-                message = f"Container {container.name} has low trust score ({container.trust_score}/100)"
-                
-                if not container.is_sanctioned:
-                    message += " - SHADOW AI DETECTED"
-                
-                if container.threat_level == "Critical":
-                    message += " - CRITICAL THREAT LEVEL"
-
-                recommended_action = "Review container configuration"
-                if not container.is_sanctioned:
-                    recommended_action = "Quarantine or terminate container immediately"
-                elif container.trust_score < 30:
-                    recommended_action = "Quarantine for investigation"
-
-                alert = SecurityAlert(
-                    alert_id=f"alert_{container.id[:8]}_{alert_counter}",
-                    timestamp=datetime.now().isoformat(),
-                    severity=severity,
-                    source=container.name,
-                    container_id=container.id,
-                    trust_score=container.trust_score,
-                    message=message,
-                    recommended_action=recommended_action,
-                )
-                alerts.append(alert)
-
-        return alerts
 
-    except Exception as e:
-        logger.error(f"Error in get_security_alerts: {e}")
-        return []
+@router.get("/system/docker")
+async def get_docker_health():
+    """
+    GET /system/docker
 
+    Returns the connection and circuit breaker state of every Docker host
+    """
+    return {"hosts": all_hosts_health()}
 
-@router.get("/metrics/cost")
-async def get_cost_analytics():
+
+@router.get("/system/policy")
+async def get_scoring_policy():
     """
-    Cost analytics with real data
+    GET /system/policy
+
+    Returns the active scoring policy (reloaded automatically when the policy file changes)
     """
-    scanner = DockerScanner()
-    containers = scanner.scan_containers()
+    return get_policy().describe()
 
-    try:
-        active_count = len([c for c in containers if c.status == 'running'])
-        stopped_count = len([c for c in containers if c.status != 'running'])
-
-        # Real cost calculations
-        burn_rate_hourly = active_count * 12.5  # $12.50/hr per container
-        daily_burn = burn_rate_hourly * 24
-        projected_monthly = daily_burn * 30
-        total_saved = stopped_count * 250  # $250/day per stopped container
-
-        # Agent costs breakdown
-        agent_costs = []
-        for c in containers:
-            if c.status == 'running':
-                # Base cost + risk adjustment
-                cost = 300  # Base daily cost
-                trend = 0
-
-                if c.trust_score < 40:  # Critical
-                    cost += 150
-                    trend = 45
-                elif c.trust_score < 60:  # High risk
-                    cost += 75
-                    trend = 25
-                elif c.trust_score < 80:  # Medium risk
-                    cost += 30
-                    trend = 10
-
-                agent_costs.append({
-                    "agentName": c.name,
-                    "cost": cost,
-                    "trend": trend,
-                    "trustScore": c.trust_score,
-                })
-
-        agent_costs.sort(key=lambda x: x['cost'], reverse=True)
-
-        return {
-            "totalSpend": int(projected_monthly),
-            "totalSaved": total_saved,
-            "savingsPercent": int((stopped_count / (active_count + stopped_count + 0.001)) * 100),
-            "burnRate": int(daily_burn),
-            "projectedMonthly": int(projected_monthly),
-            "agentCosts": agent_costs,
-            "dailyBurn": [
-                {"date": "2025-01-01", "cost": int(daily_burn), "optimized": int(daily_burn * 0.8)},
-                {"date": "2025-01-02", "cost": int(daily_burn * 1.1), "optimized": int(daily_burn * 0.85)},
-            ],
-            "optimizationInsights": [
-                {
-                    "title": "Stop Shadow AI",
-                    "impact": f"Could save ${stopped_count * 250}/day",
-                    "savings": stopped_count * 250,
-                },
-            ],
-        }
 
-    except Exception as e:
-        logger.error(f"Error in get_cost_analytics: {e}")
-        return {
-            "totalSpend": 0,
-            "totalSaved": 0,
-            "savingsPercent": 0,
-            "burnRate": 0,
-            "projectedMonthly": 0,
-            "agentCosts": [],
-            "dailyBurn": [],
-            "optimizationInsights": [],
-        }
+@router.get("/metrics/cost")
+async def get_cost_analytics(host: Optional[str] = None):
+    """
+    Cost analytics with real data (precomputed per scan snapshot)
+    """
+    cost = (await _host_aggregates(host)).cost
+    # Host views chart that host's own running containers, not the fleet's
+    return {**cost, "dailyBurn": TimeSeriesStore().daily_burn(days=7, hourly_cost=HOURLY_COST_PER_CONTAINER, host=host)}
+
+
+@router.get("/metrics/timeseries")
+async def get_timeseries(
+    container_id: Optional[str] = None,
+    resolution: Optional[str] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    fields: Optional[str] = Query(None, description="Comma-separated field names"),
+):
+    """
+    GET /metrics/timeseries
+
+    Trust score and resource history for one container, or the fleet when
+    container_id is omitted. Points are columnar; resolution (raw, 1m, 1h, 1d)
+    is picked from the requested window when omitted.
+    """
+    if resolution is not None and resolution not in {name for name, _, _ in RESOLUTIONS}:
+        raise HTTPException(status_code=400, detail=f"Unknown resolution {resolution}")
+
+    key = container_id[:12] if container_id else FLEET_KEY
+    result = TimeSeriesStore().query(
+        key,
+        since=since.timestamp() if since else None,
+        until=until.timestamp() if until else None,
+        resolution=resolution,
+        fields=fields.split(",") if fields else None,
+    )
+    if result is None:
+        raise HTTPException(status_code=404, detail=f"No history for container {container_id}")
+    return {"container_id": container_id, **result}
@@ -21,7 +21,7 @@ async def get_alerts():
     Get all security alerts.
     Implementation: Get the list of containers from the scanner. For EVERY container found, manually create a SecurityAlert object.
     """
-    containers = scanner.scan_containers()
+    containers = (await scanner.get_snapshot_async()).containers
     
     alerts = []
     
@@ -0,0 +1,26 @@
+from fastapi import APIRouter, Header
+from fastapi.responses import StreamingResponse
+from typing import Optional
+from core.stream import SnapshotBroadcaster, parse_event_id
+
+router = APIRouter()
+
+
+@router.get("/stream")
+async def stream_updates(since: Optional[int] = None, last_event_id: Optional[str] = Header(None)):
+    """
+    Server-Sent Events stream of container, alert and audit deltas.
+    
+    Each event id is a snapshot version tagged with the backend's boot ID;
+    reconnecting clients resume via Last-Event-ID (or ?since=<version>) and
+    get a full snapshot if history has moved on or the backend restarted.
+    """
+    if since is None and last_event_id:
+        since = parse_event_id(last_event_id)
+
+    broadcaster = SnapshotBroadcaster()
+    return StreamingResponse(
+        broadcaster.stream(since),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -0,0 +1,200 @@
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Dict, List
+
+
+# Cost model (see README "Cost Intelligence")
+HOURLY_COST_PER_CONTAINER = 12.5
+DAILY_SAVING_PER_STOPPED = 250
+BASE_DAILY_AGENT_COST = 300
+
+
+@dataclass(frozen=True)
+class FleetAggregates:
+    """
+    Fleet-wide figures computed once per snapshot.
+    Observability endpoints serve these directly instead of re-walking the fleet.
+    """
+    total_containers: int = 0
+    average_trust_score: float = 100.0
+    min_trust_score: int = 100
+    # Trust bands: critical < 40 <= high < 60 <= elevated < 80 <= healthy
+    trust_histogram: Dict[str, int] = field(default_factory=lambda: {"critical": 0, "high": 0, "elevated": 0, "healthy": 0})
+    shadow_ai_count: int = 0
+    running_count: int = 0
+    stopped_count: int = 0
+    threat_level: str = "Low"
+    system_health: str = "Healthy"
+    health_status: str = "Healthy"
+    alerts: List[Dict[str, Any]] = field(default_factory=list)
+    cost: Dict[str, Any] = field(default_factory=dict)
+
+    @property
+    def critical_containers(self) -> int:
+        return self.trust_histogram["critical"]
+
+    @property
+    def healthy_containers(self) -> int:
+        return self.trust_histogram["healthy"]
+
+
+def _build_alert(container, counter: int, timestamp: str) -> Dict[str, Any]:
+    """Security alert for a container below the 60 trust threshold"""
+    if container.trust_score < 30:
+        severity = "critical"
+    elif container.trust_score < 45:
+        severity = "high"
+    else:
+        severity = "medium"
+
+    # Build message based on trust details
+    message = f"Container {container.name} has low trust score ({container.trust_score}/100)"
+    if not container.is_sanctioned:
+        message += " - SHADOW AI DETECTED"
+    if container.threat_level == "Critical":
+        message += " - CRITICAL THREAT LEVEL"
+
+    recommended_action = "Review container configuration"
+    if not container.is_sanctioned:
+        recommended_action = "Quarantine or terminate container immediately"
+    elif container.trust_score < 30:
+        recommended_action = "Quarantine for investigation"
+
+    return {
+        "alert_id": f"alert_{container.id[:8]}_{counter}",
+        "timestamp": timestamp,
+        "severity": severity,
+        "source": container.name,
+        "container_id": container.id,
+        "host": container.host,
+        "trust_score": container.trust_score,
+        "message": message,
+        "recommended_action": recommended_action,
+    }
+
+
+def _build_cost(containers, running_count: int, stopped_count: int) -> Dict[str, Any]:
+    burn_rate_hourly = running_count * HOURLY_COST_PER_CONTAINER
+    daily_burn = burn_rate_hourly * 24
+    projected_monthly = daily_burn * 30
+    total_saved = stopped_count * DAILY_SAVING_PER_STOPPED
+
+    # Agent costs breakdown: base cost + risk adjustment
+    agent_costs = []
+    for c in containers:
+        if c.status != "running":
+            continue
+        cost = BASE_DAILY_AGENT_COST
+        trend = 0
+        if c.trust_score < 40:  # Critical
+            cost += 150
+            trend = 45
+        elif c.trust_score < 60:  # High risk
+            cost += 75
+            trend = 25
+        elif c.trust_score < 80:  # Medium risk
+            cost += 30
+            trend = 10
+        agent_costs.append({
+            "agentName": c.name,
+            "cost": cost,
+            "trend": trend,
+            "trustScore": c.trust_score,
+        })
+    agent_costs.sort(key=lambda x: x["cost"], reverse=True)
+
+    return {
+        "totalSpend": int(projected_monthly),
+        "totalSaved": total_saved,
+        "savingsPercent": int((stopped_count / (running_count + stopped_count + 0.001)) * 100),
+        "burnRate": int(daily_burn),
+        "projectedMonthly": int(projected_monthly),
+        "agentCosts": agent_costs,
+        # Filled from the fleet time series when served
+        "dailyBurn": [],
+        "optimizationInsights": [
+            {
+                "title": "Stop Shadow AI",
+                "impact": f"Could save ${total_saved}/day",
+                "savings": total_saved,
+            },
+        ],
+    }
+
+
+def compute_fleet_aggregates(containers, timestamp: float) -> FleetAggregates:
+    """Single pass over the fleet producing every dashboard aggregate"""
+    if not containers:
+        return FleetAggregates(cost=_build_cost((), 0, 0))
+
+    histogram = {"critical": 0, "high": 0, "elevated": 0, "healthy": 0}
+    trust_total = 0
+    min_trust = 100
+    shadow_ai_count = 0
+    running_count = 0
+    alerts = []
+    alert_timestamp = datetime.fromtimestamp(timestamp).isoformat()
+
+    for c in containers:
+        score = c.trust_score
+        trust_total += score
+        min_trust = min(min_trust, score)
+        if score < 40:
+            histogram["critical"] += 1
+        elif score < 60:
+            histogram["high"] += 1
+        elif score < 80:
+            histogram["elevated"] += 1
+        else:
+            histogram["healthy"] += 1
+        if not c.is_sanctioned:
+            shadow_ai_count += 1
+        if c.status == "running":
+            running_count += 1
+        if score < 60:
+            alerts.append(_build_alert(c, len(alerts) + 1, alert_timestamp))
+
+    total = len(containers)
+    stopped_count = total - running_count
+    average = trust_total / total
+
+    # Threat level based on worst trust score
+    if min_trust < 40:
+        threat_level = "Critical"
+    elif min_trust < 60:
+        threat_level = "High"
+    elif min_trust < 80:
+        threat_level = "Elevated"
+    else:
+        threat_level = "Low"
+
+    # Executive summary health
+    if histogram["critical"] > 0:
+        system_health = "Critical"
+    elif shadow_ai_count > 0 and average < 60:
+        system_health = "At Risk"
+    else:
+        system_health = "Healthy"
+
+    # /system/health status
+    if histogram["critical"] > 2:
+        health_status = "Critical"
+    elif average < 60:
+        health_status = "At Risk"
+    else:
+        health_status = "Healthy"
+
+    return FleetAggregates(
+        total_containers=total,
+        average_trust_score=average,
+        min_trust_score=min_trust,
+        trust_histogram=histogram,
+        shadow_ai_count=shadow_ai_count,
+        running_count=running_count,
+        stopped_count=stopped_count,
+        threat_level=threat_level,
+        system_health=system_health,
+        health_status=health_status,
+        alerts=alerts,
+        cost=_build_cost(containers, running_count, stopped_count),
+    )
@@ -0,0 +1,373 @@
+import asyncio
+import json
+import logging
+import os
+import threading
+from collections import deque
+from typing import Any, AsyncIterator, Callable, Dict, Optional, Tuple
+from urllib.parse import urlencode, urlparse
+
+import docker
+import requests
+
+from core.docker_client import (
+    DEFAULT_HOST,
+    DOCKER_HOST_URLS,
+    DOCKER_POOL_SIZE,
+    DOCKER_TIMEOUT,
+    DockerConnectionManager,
+)
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SOCKET = "/var/run/docker.sock"
+
+
+class DockerUnavailable(Exception):
+    """The daemon could not be reached (or its circuit breaker is open)"""
+
+
+class DockerAPIError(Exception):
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+class DockerNotFound(DockerAPIError):
+    pass
+
+
+class DockerStreamError(Exception):
+    """One streaming response broke off; says nothing about the daemon as a whole"""
+
+
+def _resolve_endpoint(host: str) -> Optional[Tuple[str, Any]]:
+    """
+    ("unix", path) or ("tcp", (hostname, port)) for a host, or None when the
+    transport is not supported natively (TLS, ssh, npipe)
+    """
+    url = DOCKER_HOST_URLS.get(host)
+    if not url:
+        # Follow whatever the synchronous client connected to
+        url = DockerConnectionManager(host).health()["base_url"] or os.getenv("DOCKER_HOST") or f"unix://{DEFAULT_SOCKET}"
+    parsed = urlparse(url)
+    if parsed.scheme == "unix":
+        return "unix", parsed.path or DEFAULT_SOCKET
+    if parsed.scheme == "http+docker":
+        # docker-py's name for the local unix socket
+        env = urlparse(os.getenv("DOCKER_HOST", ""))
+        return "unix", env.path if env.scheme == "unix" else DEFAULT_SOCKET
+    if parsed.scheme in ("tcp", "http") and os.getenv("DOCKER_TLS_VERIFY") in (None, "", "0"):
+        return "tcp", (parsed.hostname, parsed.port or 2375)
+    return None
+
+
+class _Connection:
+    __slots__ = ("reader", "writer")
+
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.reader = reader
+        self.writer = writer
+
+    def usable(self) -> bool:
+        return not self.writer.is_closing() and not self.reader.at_eof()
+
+    def close(self):
+        try:
+            self.writer.close()
+        except:
+            pass
+
+
+class AsyncDockerClient:
+    """
+    asyncio-native Docker Engine API client with singleton pattern (one per host).
+    Speaks HTTP/1.1 over the unix socket or TCP and keeps idle keep-alive
+    connections for reuse. Transports it cannot speak fall back to the
+    synchronous client in a worker thread, so the event loop never blocks.
+    """
+    _instances: Dict[str, "AsyncDockerClient"] = {}
+    _instances_lock = threading.Lock()
+
+    def __new__(cls, host: Optional[str] = None):
+        host = host or DEFAULT_HOST
+        instance = cls._instances.get(host)
+        if instance is None:
+            with cls._instances_lock:
+                instance = cls._instances.get(host)
+                if instance is None:
+                    if host not in DOCKER_HOST_URLS:
+                        raise ValueError(f"Unknown Docker host {host}")
+                    instance = super(AsyncDockerClient, cls).__new__(cls)
+                    instance._initialize(host)
+                    cls._instances[host] = instance
+        return instance
+
+    def _initialize(self, host: str):
+        self.host = host
+        self._idle: deque = deque()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    @property
+    def connection(self) -> DockerConnectionManager:
+        return DockerConnectionManager(self.host)
+
+    # ─── CONNECTION POOL ───────────────────────────
+
+    async def _open(self, endpoint: Tuple[str, Any]) -> _Connection:
+        kind, address = endpoint
+        if kind == "unix":
+            reader, writer = await asyncio.open_unix_connection(address)
+        else:
+            reader, writer = await asyncio.open_connection(*address)
+        return _Connection(reader, writer)
+
+    async def _acquire(self, endpoint: Tuple[str, Any]) -> Tuple[_Connection, bool]:
+        """Idle connection if one is usable, else a new one; returns (connection, reused)"""
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            # Connections are bound to the loop that opened them
+            self._drop_idle()
+            self._loop = loop
+        while self._idle:
+            conn = self._idle.pop()
+            if conn.usable():
+                return conn, True
+            conn.close()
+        return await asyncio.wait_for(self._open(endpoint), DOCKER_TIMEOUT), False
+
+    def _release(self, conn: _Connection):
+        if conn.usable() and len(self._idle) < DOCKER_POOL_SIZE:
+            self._idle.append(conn)
+        else:
+            conn.close()
+
+    def _drop_idle(self):
+        while self._idle:
+            self._idle.pop().close()
+
+    # ─── HTTP ───────────────────────────
+
+    async def _send(self, conn: _Connection, method: str, target: str, body: Optional[bytes]):
+        head = f"{method} {target} HTTP/1.1\r\nHost: docker\r\nUser-Agent: sentinel\r\n"
+        if body is not None:
+            head += f"Content-Type: application/json\r\nContent-Length: {len(body)}\r\n"
+        elif method in ("POST", "PUT"):
+            head += "Content-Length: 0\r\n"
+        conn.writer.write((head + "\r\n").encode("latin-1") + (body or b""))
+        await conn.writer.drain()
+
+    async def _read_head(self, conn: _Connection) -> Tuple[int, Dict[str, str]]:
+        status_line = await conn.reader.readline()
+        if not status_line:
+            raise ConnectionResetError("Connection closed by Docker daemon")
+        status = int(status_line.split()[1])
+
+        headers = {}
+        while True:
+            line = await conn.reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+        return status, headers
+
+    async def _read_chunk(self, conn: _Connection) -> bytes:
+        """Next chunk of a chunked body (b"" at the end)"""
+        size = int((await conn.reader.readline()).split(b";")[0].strip() or b"0", 16)
+        if size == 0:
+            await conn.reader.readline()  # trailing CRLF
+            return b""
+        data = await conn.reader.readexactly(size)
+        await conn.reader.readline()
+        return data
+
+    async def _exchange(self, conn: _Connection, method: str, target: str, body: Optional[bytes]):
+        await self._send(conn, method, target, body)
+        status, headers = await self._read_head(conn)
+
+        keep_alive = headers.get("connection", "").lower() != "close"
+        if status in (204, 304) or method == "HEAD":
+            payload = b""
+        elif headers.get("transfer-encoding", "").lower() == "chunked":
+            chunks = []
+            while True:
+                chunk = await self._read_chunk(conn)
+                if not chunk:
+                    break
+                chunks.append(chunk)
+            payload = b"".join(chunks)
+        elif "content-length" in headers:
+            payload = await conn.reader.readexactly(int(headers["content-length"]))
+        else:
+            payload = await conn.reader.read()
+            keep_alive = False
+        return status, headers, payload, keep_alive
+
+    async def request(
+        self,
+        method: str,
+        path: str,
+        params: Optional[Dict[str, Any]] = None,
+        body: Any = None,
+    ) -> Tuple[int, Any]:
+        """
+        Perform one Engine API call natively. Returns (status, decoded body).
+        Raises DockerUnavailable, DockerNotFound or DockerAPIError.
+        """
+        endpoint = _resolve_endpoint(self.host)
+        if endpoint is None:
+            raise DockerUnavailable(f"No native transport for Docker host {self.host}")
+        if self.connection.circuit_state() == "open":
+            raise DockerUnavailable(f"Docker host {self.host} circuit is open")
+
+        target = path + (f"?{urlencode(params)}" if params else "")
+        data = json.dumps(body).encode("utf-8") if body is not None else None
+
+        for attempt in (0, 1):
+            conn, reused = None, False
+            try:
+                # Connect failures (missing socket, refused, timeout) land below too
+                conn, reused = await self._acquire(endpoint)
+                status, headers, payload, keep_alive = await asyncio.wait_for(
+                    self._exchange(conn, method, target, data), DOCKER_TIMEOUT
+                )
+            except (ConnectionError, asyncio.IncompleteReadError) as e:
+                if conn is not None:
+                    conn.close()
+                # A pooled connection the daemon already closed: retry once on a fresh one
+                if reused and attempt == 0:
+                    continue
+                self.connection.invalidate(e)
+                raise DockerUnavailable(str(e) or "Docker connection failed")
+            except (OSError, asyncio.TimeoutError) as e:
+                if conn is not None:
+                    conn.close()
+                self.connection.invalidate(e)
+                raise DockerUnavailable(str(e) or "Docker request timed out")
+            break
+
+        if keep_alive:
+            self._release(conn)
+        else:
+            conn.close()
+
+        decoded: Any = payload
+        if payload and "json" in headers.get("content-type", ""):
+            decoded = json.loads(payload)
+        if status >= 400:
+            message = decoded.get("message", "") if isinstance(decoded, dict) else payload.decode("utf-8", "replace")
+            if status == 404:
+                raise DockerNotFound(status, message)
+            raise DockerAPIError(status, message)
+        return status, decoded
+
+    async def stream_json(
+        self, path: str, params: Optional[Dict[str, Any]] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Follow a streaming endpoint (stats, events) on a dedicated connection,
+        yielding one decoded JSON object per line. Ends when the daemon closes
+        the stream; the connection is never returned to the pool.
+        A failing stream raises without touching the circuit breaker, which is
+        left to the pooled connection-level calls: one container's stream must
+        not take the host down for every other stream and governance call.
+        """
+        endpoint = _resolve_endpoint(self.host)
+        if endpoint is None:
+            raise DockerUnavailable(f"No native transport for Docker host {self.host}")
+        if self.connection.circuit_state() == "open":
+            raise DockerUnavailable(f"Docker host {self.host} circuit is open")
+        target = path + (f"?{urlencode(params)}" if params else "")
+
+        try:
+            conn = await asyncio.wait_for(self._open(endpoint), DOCKER_TIMEOUT)
+        except (OSError, asyncio.TimeoutError) as e:
+            raise DockerUnavailable(str(e) or "Docker connection timed out")
+        try:
+            await self._send(conn, "GET", target, None)
+            status, headers = await asyncio.wait_for(self._read_head(conn), DOCKER_TIMEOUT)
+            chunked = headers.get("transfer-encoding", "").lower() == "chunked"
+            if status >= 400:
+                payload = await (self._read_chunk(conn) if chunked else conn.reader.read())
+                message = payload.decode("utf-8", "replace")
+                if "json" in headers.get("content-type", ""):
+                    message = json.loads(payload).get("message", message)
+                if status == 404:
+                    raise DockerNotFound(status, message)
+                raise DockerAPIError(status, message)
+
+            buffer = b""
+            while True:
+                data = await (self._read_chunk(conn) if chunked else conn.reader.read(65536))
+                if not data:
+                    break
+                buffer += data
+                *lines, buffer = buffer.split(b"\n")
+                for line in lines:
+                    if line.strip():
+                        yield json.loads(line)
+        except (ConnectionError, asyncio.IncompleteReadError) as e:
+            raise DockerStreamError(str(e) or "Docker stream interrupted")
+        except (OSError, asyncio.TimeoutError) as e:
+            raise DockerStreamError(str(e) or "Docker stream timed out")
+        finally:
+            conn.close()
+
+    async def _call(self, method: str, path: str, fallback: Callable[[Any], Any], params: Dict[str, Any] = None):
+        """Native request, or the synchronous client in a worker thread for unsupported transports"""
+        if _resolve_endpoint(self.host) is not None:
+            return (await self.request(method, path, params))[1]
+        return await asyncio.to_thread(self._run_sync, fallback)
+
+    def _run_sync(self, fallback: Callable[[Any], Any]):
+        client = self.connection.get_client()
+        if client is None:
+            raise DockerUnavailable(f"Docker host {self.host} unreachable")
+        try:
+            return fallback(client.api)
+        except docker.errors.NotFound as e:
+            raise DockerNotFound(404, str(e.explanation or e))
+        except docker.errors.APIError as e:
+            raise DockerAPIError(e.status_code or 500, str(e.explanation or e))
+        except requests.exceptions.ConnectionError as e:
+            self.connection.invalidate(e)
+            raise DockerUnavailable(str(e))
+
+    # ─── ENGINE API ───────────────────────────
+
+    async def inspect_container(self, container_id: str) -> Dict[str, Any]:
+        return await self._call(
+            "GET", f"/containers/{container_id}/json", lambda api: api.inspect_container(container_id)
+        )
+
+    async def kill(self, container_id: str):
+        await self._call("POST", f"/containers/{container_id}/kill", lambda api: api.kill(container_id))
+
+    async def remove(self, container_id: str, force: bool = False):
+        await self._call(
+            "DELETE",
+            f"/containers/{container_id}",
+            lambda api: api.remove_container(container_id, force=force),
+            params={"force": "1" if force else "0"},
+        )
+
+    async def pause(self, container_id: str):
+        await self._call("POST", f"/containers/{container_id}/pause", lambda api: api.pause(container_id))
+
+    async def unpause(self, container_id: str):
+        await self._call("POST", f"/containers/{container_id}/unpause", lambda api: api.unpause(container_id))
+
+    async def container_stats(self, container_id: str) -> AsyncIterator[Dict[str, Any]]:
+        """Live stats payloads (about one per second) until the container stops"""
+        async for payload in self.stream_json(f"/containers/{container_id}/stats", {"stream": "1"}):
+            yield payload
+
+    def close(self):
+        self._drop_idle()
+
+
+def get_async_client(host: Optional[str] = None) -> AsyncDockerClient:
+    """Shared async Docker client for a host (default host when None)"""
+    return AsyncDockerClient(host)
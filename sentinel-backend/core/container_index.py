@@ -0,0 +1,74 @@
+from bisect import bisect_left
+from typing import Any, Dict, List, Optional, Sequence
+
+# Candidates listed in an ambiguity error
+AMBIGUOUS_SHOWN = 5
+
+
+class AmbiguousContainerId(LookupError):
+    """A name or ID prefix matches more than one container"""
+
+    def __init__(self, key: str, matches: List[Any]):
+        self.key = key
+        self.matches = matches
+        shown = ", ".join(f"{c.id} ({c.name}@{c.host})" for c in matches[:AMBIGUOUS_SHOWN])
+        more = "" if len(matches) <= AMBIGUOUS_SHOWN else ", ..."
+        super().__init__(f"'{key}' matches several containers: {shown}{more}")
+
+
+class ContainerIndex:
+    """
+    Container lookup built once per snapshot.
+    Full IDs and names resolve through dicts; IDs are also kept sorted, so a
+    short ID (any prefix) is found by binary search instead of a walk over
+    the whole fleet.
+    """
+
+    def __init__(self, containers: Sequence[Any] = ()):
+        entries = sorted(((c.full_id or c.id, i) for i, c in enumerate(containers)))
+        self._ids: List[str] = [container_id for container_id, _ in entries]
+        self._containers: List[Any] = [containers[i] for _, i in entries]
+        self._by_id: Dict[str, List[Any]] = {}
+        self._by_name: Dict[str, List[Any]] = {}
+        for container_id, container in zip(self._ids, self._containers):
+            # The same ID or name can exist on several Docker hosts
+            self._by_id.setdefault(container_id, []).append(container)
+            self._by_name.setdefault(container.name, []).append(container)
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def match(self, prefix: str, host: Optional[str] = None, limit: Optional[int] = None) -> List[Any]:
+        """Containers whose ID starts with prefix, optionally on one host (at most `limit`)"""
+        if not prefix:
+            return []
+        matches = []
+        i = bisect_left(self._ids, prefix)
+        while i < len(self._ids) and self._ids[i].startswith(prefix):
+            container = self._containers[i]
+            if host is None or container.host == host:
+                matches.append(container)
+                if limit is not None and len(matches) >= limit:
+                    break
+            i += 1
+        return matches
+
+    def resolve(self, key: str, host: Optional[str] = None) -> Optional[Any]:
+        """
+        Container for a full ID, name or unique ID prefix (Docker's own order),
+        optionally on one host. None when nothing matches; raises
+        AmbiguousContainerId when several containers do.
+        """
+        key = key.strip()
+        for candidates in (self._by_id.get(key), self._by_name.get(key.lstrip("/"))):
+            if candidates:
+                matches = [c for c in candidates if host is None or c.host == host]
+                if len(matches) == 1:
+                    return matches[0]
+                if matches:
+                    raise AmbiguousContainerId(key, matches)
+
+        matches = self.match(key, host, limit=AMBIGUOUS_SHOWN + 1)
+        if len(matches) > 1:
+            raise AmbiguousContainerId(key, matches)
+        return matches[0] if matches else None
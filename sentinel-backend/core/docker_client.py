@@ -0,0 +1,196 @@
+import docker
+import logging
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import urlparse
+
+logger = logging.getLogger(__name__)
+
+# Connection order: Docker Desktop TCP bridge, then the environment
+# (DOCKER_HOST / unix socket), then the Windows loopback TCP port
+DOCKER_TCP_URL = os.getenv("SENTINEL_DOCKER_TCP_URL", "tcp://host.docker.internal:2375")
+DOCKER_FALLBACK_TCP_URL = "tcp://127.0.0.1:2375"
+DOCKER_TIMEOUT = int(os.getenv("SENTINEL_DOCKER_TIMEOUT", "10"))
+
+# HTTP connections kept open to the daemon (stats workers + events + API routes)
+DOCKER_POOL_SIZE = int(os.getenv("SENTINEL_DOCKER_POOL_SIZE", "32"))
+
+# Reconnect backoff: 1s, 2s, 4s ... capped
+RECONNECT_BACKOFF_MAX = 60
+
+LOCAL_HOST = "local"
+
+
+def _parse_hosts(value: str) -> List[Tuple[str, Optional[str]]]:
+    """
+    Parse SENTINEL_DOCKER_HOSTS: comma-separated "name=url" or bare URLs.
+    Empty means a single "local" host using the default connection order.
+    """
+    hosts = []
+    for entry in (e.strip() for e in value.split(",")):
+        if not entry:
+            continue
+        name, sep, url = entry.partition("=")
+        if not sep:
+            url = entry
+            name = urlparse(url).hostname or url
+        hosts.append((name.strip(), url.strip()))
+    return hosts or [(LOCAL_HOST, None)]
+
+
+# Docker daemons to scan, e.g. "edge-1=tcp://10.0.0.5:2375,edge-2=ssh://ops@10.0.0.6"
+DOCKER_HOSTS = _parse_hosts(os.getenv("SENTINEL_DOCKER_HOSTS", ""))
+DOCKER_HOST_URLS: Dict[str, Optional[str]] = dict(DOCKER_HOSTS)
+DEFAULT_HOST = DOCKER_HOSTS[0][0]
+
+
+class DockerConnectionManager:
+    """
+    Docker connection per host with singleton pattern (one instance per host name).
+    Keeps one long-lived pooled client, reconnecting with backoff when it breaks.
+    The backoff window doubles as a circuit breaker: while it is open,
+    get_client() returns None immediately instead of waiting on a dead daemon.
+    """
+    _instances: Dict[str, "DockerConnectionManager"] = {}
+    _instances_lock = threading.Lock()
+
+    def __new__(cls, host: Optional[str] = None):
+        host = host or DEFAULT_HOST
+        instance = cls._instances.get(host)
+        if instance is None:
+            if host not in DOCKER_HOST_URLS:
+                raise ValueError(f"Unknown Docker host {host}")
+            with cls._instances_lock:
+                instance = cls._instances.get(host)
+                if instance is None:
+                    instance = super(DockerConnectionManager, cls).__new__(cls)
+                    instance._initialize(host)
+                    cls._instances[host] = instance
+        return instance
+
+    def _initialize(self, host: str = LOCAL_HOST):
+        self.host = host
+        self._url = DOCKER_HOST_URLS.get(host)
+        self._client: Optional[docker.DockerClient] = None
+        self._base_url: Optional[str] = None
+        self._lock = threading.Lock()
+        self._consecutive_failures = 0
+        self._next_attempt = 0.0
+        self._last_error: Optional[str] = None
+        self._connected_at: Optional[float] = None
+
+    def _candidates(self) -> List[Any]:
+        if self._url:
+            return [lambda: docker.DockerClient(base_url=self._url, timeout=DOCKER_TIMEOUT, max_pool_size=DOCKER_POOL_SIZE)]
+        return [
+            lambda: docker.DockerClient(base_url=DOCKER_TCP_URL, timeout=DOCKER_TIMEOUT, max_pool_size=DOCKER_POOL_SIZE),
+            lambda: docker.from_env(timeout=DOCKER_TIMEOUT, max_pool_size=DOCKER_POOL_SIZE),
+            lambda: docker.DockerClient(base_url=DOCKER_FALLBACK_TCP_URL, timeout=DOCKER_TIMEOUT, max_pool_size=DOCKER_POOL_SIZE),
+        ]
+
+    def _connect(self) -> Optional[docker.DockerClient]:
+        errors = []
+        for factory in self._candidates():
+            client = None
+            try:
+                client = factory()
+                client.ping()
+                return client
+            except Exception as e:
+                errors.append(str(e))
+                if client is not None:
+                    try:
+                        client.close()
+                    except:
+                        pass
+        self._last_error = "; ".join(errors)
+        return None
+
+    def get_client(self) -> Optional[docker.DockerClient]:
+        """
+        Return the shared client, connecting on first use.
+        Returns None while the daemon is unreachable and the backoff window is open.
+        """
+        client = self._client
+        if client is not None:
+            return client
+
+        with self._lock:
+            if self._client is not None:
+                return self._client
+            if time.monotonic() < self._next_attempt:
+                return None
+
+            client = self._connect()
+            if client is None:
+                self._consecutive_failures += 1
+                delay = min(2 ** (self._consecutive_failures - 1), RECONNECT_BACKOFF_MAX)
+                self._next_attempt = time.monotonic() + delay
+                logger.error(f"Failed to connect to Docker host {self.host} (retry in {delay}s): {self._last_error}")
+                return None
+
+            self._client = client
+            self._base_url = client.api.base_url
+            self._consecutive_failures = 0
+            self._next_attempt = 0.0
+            self._last_error = None
+            self._connected_at = time.time()
+            logger.info(f"Connected to Docker host {self.host} at {self._base_url}")
+            return client
+
+    def invalidate(self, error: Optional[Exception] = None):
+        """
+        Drop the shared client after a connection-level failure.
+        With an error the breaker opens: no reconnect until the backoff expires.
+        """
+        with self._lock:
+            client, self._client = self._client, None
+            if error is not None:
+                self._last_error = str(error)
+                self._consecutive_failures += 1
+                delay = min(2 ** (self._consecutive_failures - 1), RECONNECT_BACKOFF_MAX)
+                self._next_attempt = time.monotonic() + delay
+        if client is not None:
+            logger.warning(f"Docker connection to {self.host} dropped: {error}")
+            try:
+                client.close()
+            except:
+                pass
+
+    def circuit_state(self) -> str:
+        if self._client is not None:
+            return "closed"
+        return "open" if time.monotonic() < self._next_attempt else "half_open"
+
+    def health(self) -> Dict[str, Any]:
+        """Connection health for the observability API"""
+        return {
+            "host": self.host,
+            "connected": self._client is not None,
+            "circuit": self.circuit_state(),
+            "base_url": self._base_url,
+            "connected_at": self._connected_at,
+            "consecutive_failures": self._consecutive_failures,
+            "retry_in": max(round(self._next_attempt - time.monotonic(), 1), 0) if self._client is None else 0,
+            "last_error": self._last_error,
+            "pool_size": DOCKER_POOL_SIZE,
+        }
+
+    def close(self):
+        self.invalidate()
+
+
+def is_known_host(host: str) -> bool:
+    return host in DOCKER_HOST_URLS
+
+
+def all_hosts_health() -> List[Dict[str, Any]]:
+    """Connection health of every configured host"""
+    return [DockerConnectionManager(name).health() for name, _ in DOCKER_HOSTS]
+
+
+def get_docker_client(host: Optional[str] = None) -> Optional[docker.DockerClient]:
+    """Shared Docker client for a host (None while the daemon is unreachable)"""
+    return DockerConnectionManager(host).get_client()
@@ -1,11 +1,23 @@
+import atexit
+from bisect import bisect_left, bisect_right
 from datetime import datetime
-from typing import List, Dict, Optional
+from typing import Any, Iterator, List, Dict, Optional, Tuple
 from pydantic import BaseModel
 import logging
+import os
+import threading
+import time
+from db.session import AuditStore, open_audit_store
 
 # Don't name this 'logger' to avoid conflicts with InMemoryLogger
 _python_logger = logging.getLogger(__name__)
 
+# Ring buffer size (oldest entries are overwritten once full)
+AUDIT_LOG_CAPACITY = int(os.getenv("SENTINEL_AUDIT_CAPACITY", "100000"))
+
+# Entry fields with a secondary index
+INDEXED_FIELDS = ("container_id", "action", "status", "agentName")
+
 
 class AuditLogEntry(BaseModel):
     """Structured audit log entry"""
@@ -21,24 +33,107 @@ class AuditLogEntry(BaseModel):
     trust_score_change: Optional[Dict[str, int]] = None  # {before, after}
 
 
+class _SeqIndex:
+    """
+    Ascending sequence IDs for one index key.
+    Evictions advance a start offset (compacted lazily) so cursors can bisect.
+    """
+    __slots__ = ("seqs", "start")
+
+    def __init__(self):
+        self.seqs: List[int] = []
+        self.start = 0
+
+    def __len__(self) -> int:
+        return len(self.seqs) - self.start
+
+    def append(self, seq: int):
+        self.seqs.append(seq)
+
+    def evict(self, seq: int):
+        if len(self) and self.seqs[self.start] == seq:
+            self.start += 1
+            if self.start > 1024 and self.start * 2 > len(self.seqs):
+                del self.seqs[:self.start]
+                self.start = 0
+
+    def newest_before(self, before: int) -> Iterator[int]:
+        """Sequence IDs < before, newest first"""
+        i = bisect_left(self.seqs, before, lo=self.start)
+        for j in range(i - 1, self.start - 1, -1):
+            yield self.seqs[j]
+
+
 class InMemoryLogger:
     """
     In-memory audit logger with singleton pattern.
     Tracks container actions and trust score changes.
+
+    Entries live in a fixed-capacity ring buffer addressed by a monotonic
+    sequence ID, with secondary indexes by container_id, action and agent.
     """
     _instance = None
-    _logs: List[Dict] = []
     
     def __new__(cls):
         if cls._instance is None:
             cls._instance = super(InMemoryLogger, cls).__new__(cls)
-            cls._instance._initialize()
+            # Persisted unless SENTINEL_AUDIT_DB is empty
+            cls._instance._initialize(store=open_audit_store())
         return cls._instance
 
-    def _initialize(self):
-        """Initialize with startup event"""
+    def _initialize(self, capacity: int = AUDIT_LOG_CAPACITY, store: Optional[AuditStore] = None):
+        """Initialize with startup event, replaying persisted history first"""
+        self._capacity = capacity
+        self._buffer: List[Optional[Dict]] = [None] * capacity
+        self._seq = 0  # last assigned sequence ID
+        self._lock = threading.RLock()
+        # Index key -> sequence IDs (oldest first)
+        self._indexes: Dict[str, Dict[str, _SeqIndex]] = {field: {} for field in INDEXED_FIELDS}
+        self._store = store
+        if store is not None:
+            self._replay(store)
         self.log("System", "Archestra Sentinel", "Startup", "System Initialized")
 
+    def _replay(self, store: AuditStore):
+        """Load the latest `capacity` persisted entries and continue their sequence"""
+        try:
+            started = time.monotonic()
+            entries = store.load_recent(self._capacity)
+            for entry in entries:
+                self._buffer[(entry["seq"] - 1) % self._capacity] = entry
+                self._index(entry)
+            self._seq = max(store.max_seq(), entries[-1]["seq"] if entries else 0)
+            _python_logger.info(
+                f"Replayed {len(entries)} audit entries in {(time.monotonic() - started) * 1000:.0f}ms"
+            )
+        except Exception as e:
+            _python_logger.error(f"Audit log replay failed: {e}")
+
+    def _entry(self, seq: int) -> Optional[Dict]:
+        entry = self._buffer[(seq - 1) % self._capacity]
+        if entry is None or entry["seq"] != seq:
+            return None
+        return entry
+
+    def _index(self, entry: Dict):
+        for field, index in self._indexes.items():
+            key = entry.get(field)
+            if key is not None:
+                seqs = index.get(key)
+                if seqs is None:
+                    seqs = index[key] = _SeqIndex()
+                seqs.append(entry["seq"])
+
+    def _unindex(self, entry: Dict):
+        # The evicted entry is always the oldest one under each of its keys
+        for field, index in self._indexes.items():
+            key = entry.get(field)
+            seqs = index.get(key)
+            if seqs is not None:
+                seqs.evict(entry["seq"])
+                if not seqs:
+                    del index[key]
+
     def log(
         self,
         agent: str,
@@ -64,54 +159,228 @@ class InMemoryLogger:
             trust_score_change: {before: score1, after: score2}
         """
         try:
-            entry = {
-                "id": f"evt_{len(self._logs) + 1}_{int(datetime.now().timestamp() * 1000)}",
-                "timestamp": datetime.now().isoformat(),
-                "agentName": agent,
-                "action": action,
-                "status": status,
-                "details": details,
-                "tool": tool,
-                "duration": duration,
-                "container_id": container_id,
-                "trust_score_change": trust_score_change,
-            }
-            
-            # Prepend to keep newest first
-            self._logs.insert(0, entry)
-            
-            # Keep only last 100 entries for memory efficiency
-            if len(self._logs) > 100:
-                self._logs.pop()
+            with self._lock:
+                entry = self._append(
+                    datetime.now(), agent, action, status, details, tool, duration, container_id, trust_score_change
+                )
+                # Queued under the lock so the store sees entries in sequence order
+                if self._store is not None:
+                    self._store.append(entry)
             
             _python_logger.debug(f"Logged event: {action} for {agent}")
 
         except Exception as e:
             _python_logger.error(f"Error logging event: {e}")
 
+    def _append(
+        self,
+        now: datetime,
+        agent: str,
+        action: str,
+        status: str,
+        details: str,
+        tool: str = "Docker SDK",
+        duration: int = 0,
+        container_id: Optional[str] = None,
+        trust_score_change: Optional[Dict[str, int]] = None,
+    ) -> Dict:
+        """Assign the next sequence ID and store the entry in the ring (caller holds the lock)"""
+        self._seq += 1
+        seq = self._seq
+        ts = now.timestamp()
+        entry = {
+            "id": f"evt_{seq}_{int(ts * 1000)}",
+            "seq": seq,
+            "ts": ts,
+            "timestamp": now.isoformat(),
+            "agentName": agent,
+            "action": action,
+            "status": status,
+            "details": details,
+            "tool": tool,
+            "duration": duration,
+            "container_id": container_id,
+            "trust_score_change": trust_score_change,
+        }
+
+        # Overwrite the oldest slot once the ring is full
+        slot = (seq - 1) % self._capacity
+        evicted = self._buffer[slot]
+        if evicted is not None:
+            self._unindex(evicted)
+        self._buffer[slot] = entry
+        self._index(entry)
+        return entry
+
+    def log_batch(self, events: List[Dict[str, Any]]) -> int:
+        """
+        Log many events at once: one lock acquisition and one store commit.
+        Each event holds log() arguments (agent, action, status, details, ...).
+        Returns the number of entries written.
+        """
+        try:
+            with self._lock:
+                # Taken under the lock: timestamps must follow sequence order
+                now = datetime.now()
+                entries = [self._append(now, **event) for event in events]
+                if self._store is not None:
+                    self._store.append_many(entries)
+
+            _python_logger.debug(f"Logged {len(entries)} events in one batch")
+            return len(entries)
+
+        except Exception as e:
+            _python_logger.error(f"Error logging event batch: {e}")
+            return 0
+
+    def _collect(self, seqs, limit: Optional[int] = None) -> List[Dict]:
+        """Resolve sequence IDs (newest first) to entries"""
+        entries = []
+        for seq in seqs:
+            entry = self._entry(seq)
+            if entry is not None:
+                entries.append(entry)
+                if limit is not None and len(entries) >= limit:
+                    break
+        return entries
+
+    @property
+    def oldest_seq(self) -> int:
+        return max(self._seq - self._capacity + 1, 1)
+
     def get_logs(self) -> List[Dict]:
         """Get all logs (newest first)"""
-        return self._logs
+        with self._lock:
+            return self._collect(range(self._seq, self.oldest_seq - 1, -1))
 
     def get_logs_by_container(self, container_id: str) -> List[Dict]:
         """Get logs for specific container"""
-        return [log for log in self._logs if log.get("container_id") == container_id]
+        return self._get_indexed("container_id", container_id)
 
     def get_logs_by_action(self, action: str) -> List[Dict]:
         """Get logs for specific action type"""
-        return [log for log in self._logs if log.get("action") == action]
+        return self._get_indexed("action", action)
+
+    def get_logs_by_agent(self, agent: str) -> List[Dict]:
+        """Get logs for specific agent/container name"""
+        return self._get_indexed("agentName", agent)
+
+    def _get_indexed(self, field: str, key: str) -> List[Dict]:
+        with self._lock:
+            seqs = self._indexes[field].get(key)
+            return self._collect(seqs.newest_before(self._seq + 1)) if seqs else []
 
     def get_recent_logs(self, limit: int = 50) -> List[Dict]:
         """Get recent logs (newest first)"""
-        return self._logs[:limit]
+        with self._lock:
+            return self._collect(range(self._seq, self.oldest_seq - 1, -1), limit)
+
+    def query(
+        self,
+        before: Optional[int] = None,
+        limit: int = 50,
+        since: Optional[float] = None,
+        until: Optional[float] = None,
+        **filters: Any,
+    ) -> List[Dict]:
+        """
+        Entries with seq < before matching every filter (newest first).
+
+        filters: exact matches on indexed fields (container_id, action, status, agentName).
+        since/until: epoch-seconds time window, located by binary search.
+        Walks the smallest matching index from the cursor, and continues into
+        the persistent store once the in-memory window is exhausted.
+        """
+        filters = {field: value for field, value in filters.items() if value is not None}
+        unknown = set(filters) - set(INDEXED_FIELDS)
+        if unknown:
+            raise ValueError(f"Unsupported audit log filters: {', '.join(sorted(unknown))}")
+
+        entries: List[Dict] = []
+        with self._lock:
+            oldest = self.oldest_seq
+            low, high = self._seq_window(since, until)
+            cursor = high if before is None else min(before, high)
+
+            if filters:
+                candidates = [self._indexes[field].get(value) for field, value in filters.items()]
+                seqs = iter(()) if any(c is None for c in candidates) else min(candidates, key=len).newest_before(cursor)
+            else:
+                seqs = range(cursor - 1, low - 1, -1)
+
+            for seq in seqs:
+                if seq < low:
+                    break
+                entry = self._entry(seq)
+                if entry is not None and all(entry.get(field) == value for field, value in filters.items()):
+                    entries.append(entry)
+                    if len(entries) >= limit:
+                        return entries
+
+        # The window starts inside memory: nothing older on disk can match
+        if since is not None and low > oldest:
+            return entries
+
+        # In-memory window exhausted: continue below its oldest entry on disk
+        if self._store is not None:
+            boundary = min(cursor, oldest)
+            # Only entries below the boundary are read; later writes need not land first
+            self._store.wait_committed(boundary - 1)
+            entries.extend(self._store.query(boundary, limit - len(entries), since, until, filters))
+        return entries
+
+    def _ts_at(self, seq: int) -> float:
+        """Timestamp at a sequence ID; an empty slot takes the next entry's"""
+        while seq <= self._seq:
+            entry = self._entry(seq)
+            if entry is not None:
+                return entry["ts"]
+            seq += 1
+        return float("inf")
+
+    def _seq_window(self, since: Optional[float], until: Optional[float]) -> Tuple[int, int]:
+        """
+        In-memory sequence range [low, high) with since <= ts <= until
+        (caller holds the lock). Sequence order is time order, so both ends bisect.
+        """
+        oldest = self.oldest_seq
+        seqs = range(oldest, self._seq + 1)
+        low = oldest if since is None else oldest + bisect_left(seqs, since, key=self._ts_at)
+        high = self._seq + 1 if until is None else oldest + bisect_right(seqs, until, key=self._ts_at)
+        return low, max(high, low)
+
+    def get_logs_since(self, version: int) -> List[Dict]:
+        """Entries logged after `version` (newest first)"""
+        return self.changes_since(version)[0]
+
+    def changes_since(self, version: int) -> Tuple[List[Dict], int]:
+        """Entries logged after `version` (newest first) and the version they are current to"""
+        with self._lock:
+            return self._collect(range(self._seq, max(version, self.oldest_seq - 1), -1)), self._seq
+
+    @property
+    def version(self) -> int:
+        """Monotonic counter bumped on every change to the log (the last sequence ID)"""
+        return self._seq
+
+    def close(self):
+        """Flush and close the persistent store"""
+        if self._store is not None:
+            self._store.close()
+            self._store = None
 
     def clear_logs(self):
         """Clear all logs (for testing)"""
-        self._logs = []
+        with self._lock:
+            self._buffer = [None] * self._capacity
+            self._indexes = {field: {} for field in INDEXED_FIELDS}
+            # Sequence IDs never repeat; consume one so the version still moves
+            self._seq += 1
 
 
 # Global logger instance
 logger_instance = InMemoryLogger()
+atexit.register(logger_instance.close)
 
 
 # Convenience functions
@@ -120,11 +389,39 @@ def log(agent: str, action: str, status: str, details: str, **kwargs):
     logger_instance.log(agent, action, status, details, **kwargs)
 
 
+def log_batch(events: List[Dict[str, Any]]) -> int:
+    """Log several events using global logger (single commit)"""
+    return logger_instance.log_batch(events)
+
+
 def get_logs() -> List[Dict]:
     """Get all logs"""
     return logger_instance.get_logs()
 
 
+def get_logs_version() -> int:
+    """Current audit log version"""
+    return logger_instance.version
+
+
+def trust_score_change_event(
+    container_name: str,
+    container_id: str,
+    old_score: int,
+    new_score: int,
+    reason: str = "Scan update",
+) -> Dict[str, Any]:
+    """log() arguments for a trust score change (for log_batch)"""
+    return {
+        "agent": container_name,
+        "action": "Trust Score Updated",
+        "status": "Success",
+        "details": f"{reason}. Old: {old_score}, New: {new_score}",
+        "container_id": container_id,
+        "trust_score_change": {"before": old_score, "after": new_score},
+    }
+
+
 def log_trust_score_change(
     container_name: str,
     container_id: str,
@@ -133,11 +430,4 @@ def log_trust_score_change(
     reason: str = "Scan update",
 ):
     """Log a trust score change event"""
-    log(
-        container_name,
-        "Trust Score Updated",
-        "Success",
-        f"{reason}. Old: {old_score}, New: {new_score}",
-        container_id=container_id,
-        trust_score_change={"before": old_score, "after": new_score},
-    )
+    log(**trust_score_change_event(container_name, container_id, old_score, new_score, reason))
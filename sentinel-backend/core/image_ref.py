@@ -0,0 +1,160 @@
+import fnmatch
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Pattern, Tuple, Union
+
+DEFAULT_REGISTRY = "docker.io"
+HUB_REGISTRIES = frozenset({"docker.io", "index.docker.io", "registry-1.docker.io"})
+IMAGE_REF_CACHE_SIZE = 8192
+
+
+@dataclass(frozen=True)
+class ImageRef:
+    """
+    Parsed image reference: [registry/][namespace/]repository[:tag][@digest].
+    `name` is the reference as written without tag or digest.
+    Docker Hub references are normalized to registry docker.io and, for
+    official images, namespace "library".
+    """
+    original: str
+    name: str
+    registry: str
+    namespace: str
+    repository: str
+    tag: Optional[str] = None
+    digest: Optional[str] = None
+    explicit_registry: bool = False
+
+    @property
+    def path(self) -> str:
+        """namespace/repository as written, e.g. myorg/agent"""
+        return f"{self.namespace}/{self.repository}" if self.namespace else self.repository
+
+    @property
+    def is_hub(self) -> bool:
+        return self.registry in HUB_REGISTRIES
+
+    @property
+    def segments(self) -> Tuple[str, ...]:
+        """Registry followed by each path segment (trie key)"""
+        registry = DEFAULT_REGISTRY if self.is_hub else self.registry
+        return (registry, *self.path.split("/"))
+
+
+@lru_cache(maxsize=IMAGE_REF_CACHE_SIZE)
+def parse_image_ref(reference: str) -> ImageRef:
+    """Parse an image reference (memoized; references repeat across containers)"""
+    original = reference or ""
+    remainder = original.strip().lower()
+
+    digest = None
+    if "@" in remainder:
+        remainder, digest = remainder.split("@", 1)
+    elif remainder.startswith("sha256:"):
+        # Bare image ID
+        remainder, digest = "", remainder
+
+    registry, explicit = DEFAULT_REGISTRY, False
+    first, sep, rest = remainder.partition("/")
+    # Same rule as the Docker CLI: a leading segment with "." or ":" (or localhost) is a registry host
+    if sep and ("." in first or ":" in first or first == "localhost"):
+        registry, explicit, remainder = first, True, rest
+
+    tag = None
+    last_slash = remainder.rfind("/")
+    colon = remainder.rfind(":")
+    if colon > last_slash:
+        remainder, tag = remainder[:colon], remainder[colon + 1:]
+
+    name = f"{registry}/{remainder}" if explicit else remainder
+    namespace, _, repository = remainder.rpartition("/")
+    if not namespace and registry in HUB_REGISTRIES:
+        namespace = "library"
+
+    return ImageRef(
+        original=original,
+        name=name,
+        registry=registry,
+        namespace=namespace,
+        repository=repository,
+        tag=tag,
+        digest=digest,
+        explicit_registry=explicit,
+    )
+
+
+class _TrieNode:
+    __slots__ = ("children", "globs", "terminal", "tags")
+
+    def __init__(self):
+        self.children: Dict[str, "_TrieNode"] = {}
+        self.globs: List[Tuple[str, Pattern, "_TrieNode"]] = []
+        self.terminal = False
+        self.tags: Optional[set] = set()  # None = any tag
+
+    def child(self, segment: str) -> "_TrieNode":
+        if any(c in segment for c in "*?["):
+            for raw, _, node in self.globs:
+                if raw == segment:
+                    return node
+            node = _TrieNode()
+            self.globs.append((segment, re.compile(fnmatch.translate(segment)), node))
+            return node
+        return self.children.setdefault(segment, _TrieNode())
+
+
+class ImageMatcher:
+    """
+    Allowlist matcher for image references.
+    Patterns are parsed like image references and stored in a trie of
+    registry/path segments; segments may be globs (e.g. *-sentinel-backend).
+    A pattern with a tag only matches that tag. Digest entries
+    (sha256:...) match an image digest or image ID.
+    """
+
+    def __init__(self, patterns: Iterable[str]):
+        self._root = _TrieNode()
+        self._digests = set()
+        self.size = 0
+        for pattern in patterns:
+            self.add(pattern)
+
+    def add(self, pattern: str):
+        pattern = (pattern or "").strip().lower()
+        if not pattern:
+            return
+        self.size += 1
+        if pattern.startswith("sha256:"):
+            self._digests.add(pattern)
+            return
+        ref = parse_image_ref(pattern)
+        if ref.digest:
+            self._digests.add(ref.digest)
+            return
+        node = self._root
+        for segment in ref.segments:
+            node = node.child(segment)
+        if ref.tag is None:
+            node.tags = None
+        elif node.tags is not None:
+            node.tags.add(ref.tag)
+        node.terminal = True
+
+    def matches(self, image: Union[str, ImageRef], image_id: Optional[str] = None) -> bool:
+        ref = parse_image_ref(image) if isinstance(image, str) else image
+        if self._digests and ((ref.digest in self._digests) or (image_id and image_id.lower() in self._digests)):
+            return True
+        return self._match(self._root, ref.segments, 0, ref.tag or "latest")
+
+    def _match(self, node: _TrieNode, segments: Tuple[str, ...], depth: int, tag: str) -> bool:
+        if depth == len(segments):
+            return node.terminal and (node.tags is None or tag in node.tags)
+        segment = segments[depth]
+        child = node.children.get(segment)
+        if child is not None and self._match(child, segments, depth + 1, tag):
+            return True
+        for _, regex, glob_node in node.globs:
+            if regex.match(segment) and self._match(glob_node, segments, depth + 1, tag):
+                return True
+        return False
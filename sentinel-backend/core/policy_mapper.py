@@ -0,0 +1,260 @@
+import copy
+import json
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, FrozenSet, List, NamedTuple, Optional, Tuple, Union
+from core.image_ref import ImageMatcher, ImageRef
+
+logger = logging.getLogger(__name__)
+
+# Declarative scoring policy (JSON, or YAML when PyYAML is installed)
+POLICY_PATH = os.getenv(
+    "SENTINEL_POLICY_FILE",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "policy.json"),
+)
+# How often the policy file's mtime is checked for hot reload (seconds)
+POLICY_POLL_INTERVAL = float(os.getenv("SENTINEL_POLICY_POLL_INTERVAL", "2"))
+
+# Built-in policy; keys missing from the policy file fall back to these
+DEFAULT_POLICY: Dict[str, Any] = {
+    "weights": {"identity": 0.30, "configuration": 0.30, "network": 0.20, "resources": 0.20},
+    "identity": {
+        # Whitelist of sanctioned images (CRITICAL SECURITY)
+        # Image references; path segments may be globs (compose names images <project>-<service>)
+        "sanctioned_images": [
+            "archestra/platform",
+            "postgres",
+            "sentinel-backend",
+            "sentinel-frontend",
+            "*[-_]sentinel-backend",
+            "*[-_]sentinel-frontend",
+        ],
+        "scores": {"sanctioned": 100, "private_registry": 80, "namespace": 60, "unverified": 20},
+    },
+    "configuration": {
+        "root_users": ["", "0", "root"],
+        "deductions": {"root_user": 30, "privileged": 35, "writable_root_fs": 20, "no_cap_drop": 10},
+    },
+    "network": {
+        # Ports considered safe (if bound to localhost only)
+        "safe_bind_ips": ["127.0.0.1", "localhost", "::1"],
+        "critical_ports": [2375, 2376, 22, 23, 6379, 5432, 3306, 27017],
+        "deductions": {"critical_world": 40, "exposed_world": 20, "non_local": 5, "fallback_world": 25},
+    },
+    "resources": {
+        # A limit above this (or none at all) counts as unlimited
+        "memory_limit_max_bytes": 1024 * 1024 * 1024,
+        "high_mem_pct": 80,
+        "med_mem_pct": 50,
+        # CPU percent as `docker stats` reports it (100 = one full core)
+        "high_cpu_pct": 80,
+        "deductions": {"no_memory_limit": 25, "high_mem": 15, "med_mem": 5, "high_cpu": 10},
+    },
+}
+
+
+class Weights(NamedTuple):
+    identity: float
+    configuration: float
+    network: float
+    resources: float
+
+
+class IdentityScores(NamedTuple):
+    sanctioned: int
+    private_registry: int
+    namespace: int
+    unverified: int
+
+
+class ConfigDeductions(NamedTuple):
+    root_user: int
+    privileged: int
+    writable_root_fs: int
+    no_cap_drop: int
+
+
+class NetworkDeductions(NamedTuple):
+    critical_world: int
+    exposed_world: int
+    non_local: int
+    fallback_world: int
+
+
+class ResourceDeductions(NamedTuple):
+    no_memory_limit: int
+    high_mem: int
+    med_mem: int
+    high_cpu: int
+
+
+@dataclass(frozen=True)
+class CompiledPolicy:
+    """Scoring policy compiled into matcher structures and weight tables"""
+    version: int
+    source: str
+    loaded_at: float
+    weights: Weights
+    sanctioned_images: Tuple[str, ...]
+    sanctioned_matcher: ImageMatcher
+    identity_scores: IdentityScores
+    root_users: FrozenSet[str]
+    config_deductions: ConfigDeductions
+    safe_bind_ips: FrozenSet[str]
+    critical_ports: FrozenSet[int]
+    network_deductions: NetworkDeductions
+    memory_limit_max: int
+    high_mem_pct: float
+    med_mem_pct: float
+    high_cpu_pct: float
+    resource_deductions: ResourceDeductions
+
+    def is_sanctioned(self, image: Union[str, ImageRef], image_id: Optional[str] = None) -> bool:
+        """True when the image reference (or image ID) is on the sanctioned allowlist"""
+        return self.sanctioned_matcher.matches(image, image_id)
+
+    def describe(self) -> Dict[str, Any]:
+        return {
+            "version": self.version,
+            "source": self.source,
+            "loaded_at": self.loaded_at,
+            "weights": self.weights._asdict(),
+            "sanctioned_images": list(self.sanctioned_images),
+            "critical_ports": sorted(self.critical_ports),
+            "safe_bind_ips": sorted(self.safe_bind_ips),
+        }
+
+
+def _merge(base: Dict[str, Any], override: Dict[str, Any]) -> Dict[str, Any]:
+    merged = copy.deepcopy(base)
+    for key, value in (override or {}).items():
+        if isinstance(value, dict) and isinstance(merged.get(key), dict):
+            merged[key] = _merge(merged[key], value)
+        else:
+            merged[key] = value
+    return merged
+
+
+def compile_policy(raw: Dict[str, Any], version: int = 1, source: str = "defaults") -> CompiledPolicy:
+    """Validate a policy document (merged over the defaults) and compile it"""
+    spec = _merge(DEFAULT_POLICY, raw)
+    identity, config, network, resources = (
+        spec["identity"], spec["configuration"], spec["network"], spec["resources"]
+    )
+
+    sanctioned = tuple(str(s).lower() for s in identity["sanctioned_images"] if s)
+
+    weights = Weights(**{k: float(v) for k, v in spec["weights"].items()})
+    if abs(sum(weights) - 1.0) > 1e-6:
+        logger.warning(f"Policy weights sum to {sum(weights):.2f}, not 1.0")
+
+    return CompiledPolicy(
+        version=version,
+        source=source,
+        loaded_at=time.time(),
+        weights=weights,
+        sanctioned_images=sanctioned,
+        sanctioned_matcher=ImageMatcher(sanctioned),
+        identity_scores=IdentityScores(**{k: int(v) for k, v in identity["scores"].items()}),
+        root_users=frozenset(str(u) for u in config["root_users"]),
+        config_deductions=ConfigDeductions(**{k: int(v) for k, v in config["deductions"].items()}),
+        safe_bind_ips=frozenset(str(ip) for ip in network["safe_bind_ips"]),
+        critical_ports=frozenset(int(p) for p in network["critical_ports"]),
+        network_deductions=NetworkDeductions(**{k: int(v) for k, v in network["deductions"].items()}),
+        memory_limit_max=int(resources["memory_limit_max_bytes"]),
+        high_mem_pct=float(resources["high_mem_pct"]),
+        med_mem_pct=float(resources["med_mem_pct"]),
+        high_cpu_pct=float(resources["high_cpu_pct"]),
+        resource_deductions=ResourceDeductions(**{k: int(v) for k, v in resources["deductions"].items()}),
+    )
+
+
+def _read_policy_file(path: str) -> Dict[str, Any]:
+    with open(path, "r", encoding="utf-8") as f:
+        if path.endswith((".yaml", ".yml")):
+            import yaml
+            return yaml.safe_load(f) or {}
+        return json.load(f)
+
+
+class PolicyManager:
+    """
+    Active scoring policy with singleton pattern.
+    Polls the policy file's mtime and swaps in a newly compiled policy on change;
+    an invalid file is logged and the previous policy stays active.
+    """
+    _instance = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super(PolicyManager, cls).__new__(cls)
+            cls._instance._initialize()
+        return cls._instance
+
+    def _initialize(self, path: str = POLICY_PATH):
+        self._path = path
+        self._mtime: Optional[float] = None
+        self._lock = threading.Lock()
+        self._listeners: List[Callable[[CompiledPolicy], None]] = []
+        self._stop_event = threading.Event()
+        self._watcher: Optional[threading.Thread] = None
+        self._policy = compile_policy({})
+        self.reload()
+
+    @property
+    def policy(self) -> CompiledPolicy:
+        return self._policy
+
+    def add_reload_listener(self, listener: Callable[[CompiledPolicy], None]):
+        """Call `listener(policy)` after every successful reload"""
+        self._listeners.append(listener)
+
+    def reload(self, force: bool = False) -> bool:
+        """Recompile the policy if the file changed; returns True when a new policy was installed"""
+        try:
+            mtime = os.stat(self._path).st_mtime
+        except OSError:
+            return False
+
+        with self._lock:
+            if mtime == self._mtime and not force:
+                return False
+            self._mtime = mtime
+            try:
+                policy = compile_policy(
+                    _read_policy_file(self._path), version=self._policy.version + 1, source=self._path
+                )
+            except Exception as e:
+                logger.error(f"Policy reload failed, keeping version {self._policy.version}: {e}")
+                return False
+            self._policy = policy
+
+        logger.info(f"Loaded scoring policy v{policy.version} from {self._path}")
+        for listener in list(self._listeners):
+            try:
+                listener(policy)
+            except Exception as e:
+                logger.error(f"Policy reload listener failed: {e}")
+        return True
+
+    def start_watching(self):
+        if self._watcher and self._watcher.is_alive():
+            return
+        self._stop_event.clear()
+        self._watcher = threading.Thread(target=self._watch, daemon=True, name="policy-watcher")
+        self._watcher.start()
+
+    def _watch(self):
+        while not self._stop_event.wait(POLICY_POLL_INTERVAL):
+            self.reload()
+
+    def stop(self):
+        self._stop_event.set()
+
+
+def get_policy() -> CompiledPolicy:
+    """The currently active compiled policy"""
+    return PolicyManager().policy
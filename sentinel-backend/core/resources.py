@@ -0,0 +1,386 @@
+import logging
+import os
+import time
+from abc import ABC, abstractmethod
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from core.async_docker import _resolve_endpoint
+from core.stats_sampler import StatsSampler
+
+logger = logging.getLogger(__name__)
+
+# "auto" (cgroup files when the daemon is local and cgroup v2 is mounted), "cgroup" or "docker"
+RESOURCE_PROVIDER = os.getenv("SENTINEL_RESOURCE_PROVIDER", "auto").lower()
+# Host cgroup v2 mount (e.g. /host/sys/fs/cgroup when Sentinel itself runs in a container)
+CGROUP_ROOT = os.getenv("SENTINEL_CGROUP_ROOT", "/sys/fs/cgroup")
+
+# Stats are fetched through a bounded pool; each call gets STATS_TIMEOUT seconds from when it starts
+STATS_WORKERS = int(os.getenv("SENTINEL_STATS_WORKERS", "16"))
+STATS_TIMEOUT = float(os.getenv("SENTINEL_STATS_TIMEOUT", "3"))
+
+LIVE_STATUSES = ("running", "paused")
+
+# {container_id: (stats payload, stale)}
+StatsById = Dict[str, Tuple[Dict[str, Any], bool]]
+
+
+def _container_status(attrs: Dict[str, Any]) -> str:
+    return (attrs.get("State") or {}).get("Status", "unknown")
+
+
+class ResourceProvider(ABC):
+    """
+    Source of container resource figures for one Docker host.
+    Payloads are shaped like Docker stats (memory_stats, cpu_stats,
+    precpu_stats) so the trust evaluator scores them unchanged.
+    """
+    name = "none"
+
+    @abstractmethod
+    def collect(self, client, containers: List[Dict[str, Any]]) -> StatsById:
+        """Resource payloads for a batch of inspected containers"""
+
+    def latest(self, container_id: str) -> Dict[str, Any]:
+        """Last known payload for a container (no I/O)"""
+        return {}
+
+    def sync(self, running_ids: Iterable[str]):
+        """The set of live containers after a full sweep"""
+
+    def track(self, container_id: str):
+        """A container started"""
+
+    def untrack(self, container_id: str):
+        """A container stopped or was removed"""
+
+    def retain(self, container_ids: Iterable[str]):
+        """Forget state of containers that no longer exist"""
+
+    def stats(self) -> Dict[str, Any]:
+        return {"provider": self.name}
+
+    def stop(self):
+        pass
+
+
+class DockerStatsProvider(ResourceProvider):
+    """
+    Docker stats API backend: streamed payloads from the StatsSampler when
+    fresh, otherwise one-shot stats calls through a bounded pool
+    """
+    name = "docker"
+
+    def __init__(self, host: str):
+        self.host = host
+        self._workers = STATS_WORKERS
+        self._stats_pool = ThreadPoolExecutor(max_workers=self._workers, thread_name_prefix=f"stats-{host}")
+        self._last_stats: Dict[str, Dict[str, Any]] = {}
+        # Live stats streams; the one-shot pool only covers containers without a fresh sample
+        self._sampler = StatsSampler(host)
+
+    def _get_container_stats_safe(self, client, container_id: str) -> Dict[str, Any]:
+        try:
+            return client.api.stats(container_id, stream=False)
+        except:
+            return {}
+
+    def _timed_stats(self, client, container_id: str, started: Dict[str, float]) -> Dict[str, Any]:
+        started[container_id] = time.monotonic()
+        return self._get_container_stats_safe(client, container_id)
+
+    def collect(self, client, containers: List[Dict[str, Any]]) -> StatsById:
+        """
+        Fetch stats for many containers concurrently.
+        Returns: {container_id: (stats, stale)}. A call still running
+        STATS_TIMEOUT after it started is abandoned, and so is anything left
+        once the whole batch exceeds its budget; those fall back to the last
+        known stats and are flagged stale.
+        """
+        results = {}
+        futures = {}
+        started: Dict[str, float] = {}  # container ID -> when its call began (set by the worker)
+        for attrs in containers:
+            cid = attrs["Id"]
+            # Stopped containers have no live stats; an empty dict scores the same
+            if _container_status(attrs) not in LIVE_STATUSES:
+                results[cid] = ({}, False)
+                continue
+            streamed = self._sampler.latest_stats(cid)
+            if streamed is not None:
+                self._last_stats[cid] = streamed
+                results[cid] = (streamed, False)
+                continue
+            futures[self._stats_pool.submit(self._timed_stats, client, cid, started)] = cid
+
+        # Each worker handles at most `waves` calls back to back
+        waves = -(-len(futures) // self._workers)
+        budget_end = time.monotonic() + STATS_TIMEOUT * waves
+        pending = set(futures)
+        while pending:
+            # Wake at the earliest per-call deadline; calls only start when another finishes
+            deadline = min(
+                [budget_end] + [started[futures[f]] + STATS_TIMEOUT for f in pending if futures[f] in started]
+            )
+            done, pending = wait(pending, timeout=max(deadline - time.monotonic(), 0), return_when=FIRST_COMPLETED)
+            for future in done:
+                cid = futures[future]
+                stats = future.result()
+                if stats:
+                    self._last_stats[cid] = stats
+                results[cid] = (stats, False)
+
+            now = time.monotonic()
+            expired = [
+                f for f in pending
+                if now >= budget_end or (futures[f] in started and now - started[futures[f]] >= STATS_TIMEOUT)
+            ]
+            for future in expired:
+                # A hung call keeps its worker, but no longer holds up the sweep
+                future.cancel()
+                pending.discard(future)
+                cid = futures[future]
+                results[cid] = (self._last_stats.get(cid, {}), True)
+
+        return results
+
+    def latest(self, container_id: str) -> Dict[str, Any]:
+        return self._sampler.latest_stats(container_id) or self._last_stats.get(container_id, {})
+
+    def sync(self, running_ids: Iterable[str]):
+        self._sampler.sync(running_ids)
+
+    def track(self, container_id: str):
+        if self._sampler.supported:
+            self._sampler.track(container_id)
+
+    def untrack(self, container_id: str):
+        self._sampler.untrack(container_id)
+
+    def retain(self, container_ids: Iterable[str]):
+        keep = set(container_ids)
+        self._last_stats = {cid: st for cid, st in self._last_stats.items() if cid in keep}
+
+    def stats(self) -> Dict[str, Any]:
+        return {"provider": self.name, "stats_sampler": self._sampler.stats()}
+
+    def stop(self):
+        self._stats_pool.shutdown(wait=False, cancel_futures=True)
+        self._sampler.stop()
+
+
+def _read(path: str) -> str:
+    with open(path, "r") as f:
+        return f.read()
+
+
+class CgroupResourceProvider(ResourceProvider):
+    """
+    cgroup v2 file backend for a local daemon.
+    One pass lists the container cgroups under both the systemd
+    (system.slice/docker-<id>.scope) and cgroupfs (docker/<id>) layouts,
+    then reads memory.current, memory.max, cpu.stat and pids.current for
+    every container: microseconds each instead of a stats API round trip.
+    CPU percent is taken between consecutive collections. Containers
+    without a cgroup directory are handed to the fallback provider.
+    """
+    name = "cgroup"
+
+    def __init__(
+        self,
+        host: str,
+        root: str = CGROUP_ROOT,
+        fallback: Optional[ResourceProvider] = None,
+        clock: Callable[[], int] = time.monotonic_ns,
+    ):
+        self.host = host
+        self.root = root
+        self._fallback = fallback
+        self._clock = clock
+        self._online_cpus = os.cpu_count() or 1
+        try:
+            self._host_memory = os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES")
+        except (ValueError, OSError, AttributeError):
+            self._host_memory = 0
+        self._previous: Dict[str, Dict[str, Any]] = {}  # container ID -> last cpu_stats
+        self._payloads: Dict[str, Dict[str, Any]] = {}
+        # Container ID -> cgroup directory from the last listing
+        self._paths: Dict[str, str] = {}
+        self.reads = 0
+        self.read_errors = 0
+        self.fallbacks = 0
+        self.index_refreshes = 0
+
+    @staticmethod
+    def available(root: str = CGROUP_ROOT) -> bool:
+        """cgroup v2 unified hierarchy mounted at root"""
+        return os.path.exists(os.path.join(root, "cgroup.controllers"))
+
+    def _index(self) -> Dict[str, str]:
+        """Container ID -> cgroup directory, for both cgroup driver layouts"""
+        index = {}
+        layouts = (
+            ("system.slice", "docker-", ".scope"),  # systemd driver
+            ("docker", "", ""),                     # cgroupfs driver
+        )
+        for parent, prefix, suffix in layouts:
+            try:
+                entries = os.scandir(os.path.join(self.root, parent))
+            except OSError:
+                continue
+            with entries:
+                for entry in entries:
+                    name = entry.name
+                    if name.startswith(prefix) and name.endswith(suffix) and entry.is_dir(follow_symlinks=False):
+                        cid = name[len(prefix):len(name) - len(suffix)]
+                        if len(cid) == 64:
+                            index[cid] = entry.path
+        self.index_refreshes += 1
+        return index
+
+    def _path(self, container_id: str) -> Optional[str]:
+        """cgroup directory from the cached listing, re-listed only on a miss"""
+        path = self._paths.get(container_id)
+        if path is None:
+            self._paths = self._index()
+            path = self._paths.get(container_id)
+        return path
+
+    def _read_payload(self, container_id: str, path: str, now_ns: int) -> Dict[str, Any]:
+        memory_usage = int(_read(os.path.join(path, "memory.current")))
+        memory_max = _read(os.path.join(path, "memory.max")).strip()
+        # "max" = unlimited: report host memory, as Docker stats does
+        memory_limit = self._host_memory if memory_max == "max" else int(memory_max)
+
+        usage_usec = 0
+        for line in _read(os.path.join(path, "cpu.stat")).splitlines():
+            key, _, value = line.partition(" ")
+            if key == "usage_usec":
+                usage_usec = int(value)
+                break
+
+        try:
+            pids = int(_read(os.path.join(path, "pids.current")))
+        except (OSError, ValueError):
+            pids = 0
+
+        cpu_stats = {
+            "cpu_usage": {"total_usage": usage_usec * 1000},
+            # Wall time across all CPUs, so the Docker CPU percent formula applies
+            "system_cpu_usage": now_ns * self._online_cpus,
+            "online_cpus": self._online_cpus,
+        }
+        # First reading has no interval yet: report 0% rather than the lifetime average
+        precpu_stats = self._previous.get(container_id, cpu_stats)
+        self._previous[container_id] = cpu_stats
+        return {
+            "read": now_ns,
+            "memory_stats": {"usage": memory_usage, "limit": memory_limit},
+            "cpu_stats": cpu_stats,
+            "precpu_stats": precpu_stats,
+            "pids_stats": {"current": pids},
+        }
+
+    def collect(self, client, containers: List[Dict[str, Any]]) -> StatsById:
+        # One listing per batch, reused by track/sync until the next one
+        index = self._paths = self._index()
+        now_ns = self._clock()
+        results: StatsById = {}
+        missing = []
+        for attrs in containers:
+            cid = attrs["Id"]
+            if _container_status(attrs) not in LIVE_STATUSES:
+                results[cid] = ({}, False)
+                continue
+            path = index.get(cid)
+            if path is None:
+                missing.append(attrs)
+                continue
+            try:
+                payload = self._read_payload(cid, path, now_ns)
+                self.reads += 1
+            except (OSError, ValueError) as e:
+                # Container exited between the listing and the read
+                self.read_errors += 1
+                logger.debug(f"cgroup read failed for {cid[:12]}: {e}")
+                missing.append(attrs)
+                continue
+            self._payloads[cid] = payload
+            results[cid] = (payload, False)
+
+        if missing:
+            self.fallbacks += len(missing)
+            if self._fallback is not None:
+                results.update(self._fallback.collect(client, missing))
+            else:
+                results.update({attrs["Id"]: ({}, True) for attrs in missing})
+        return results
+
+    def latest(self, container_id: str) -> Dict[str, Any]:
+        payload = self._payloads.get(container_id)
+        if payload is None and self._fallback is not None:
+            return self._fallback.latest(container_id)
+        return payload or {}
+
+    def sync(self, running_ids: Iterable[str]):
+        # Only containers outside this cgroup tree need the fallback's streams
+        if self._fallback is not None:
+            running_ids = list(running_ids)
+            if any(cid not in self._paths for cid in running_ids):
+                self._paths = self._index()
+            self._fallback.sync(cid for cid in running_ids if cid not in self._paths)
+
+    def track(self, container_id: str):
+        if self._fallback is not None and self._path(container_id) is None:
+            self._fallback.track(container_id)
+
+    def untrack(self, container_id: str):
+        self._paths.pop(container_id, None)
+        self._previous.pop(container_id, None)
+        self._payloads.pop(container_id, None)
+        if self._fallback is not None:
+            self._fallback.untrack(container_id)
+
+    def retain(self, container_ids: Iterable[str]):
+        keep = set(container_ids)
+        self._previous = {cid: v for cid, v in self._previous.items() if cid in keep}
+        self._payloads = {cid: v for cid, v in self._payloads.items() if cid in keep}
+        if self._fallback is not None:
+            self._fallback.retain(keep)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "provider": self.name,
+            "root": self.root,
+            "reads": self.reads,
+            "read_errors": self.read_errors,
+            "fallbacks": self.fallbacks,
+            "index_refreshes": self.index_refreshes,
+            "fallback": self._fallback.stats() if self._fallback is not None else None,
+        }
+
+    def stop(self):
+        if self._fallback is not None:
+            self._fallback.stop()
+
+
+def select_resource_provider(host: str, mode: str = RESOURCE_PROVIDER, root: str = CGROUP_ROOT) -> ResourceProvider:
+    """
+    Pick the resource backend for a host at startup.
+    cgroup files only describe containers of the daemon on this machine,
+    so "auto" uses them for a unix-socket host when cgroup v2 is mounted.
+    """
+    docker_provider = DockerStatsProvider(host)
+    if mode == "docker":
+        return docker_provider
+
+    endpoint = _resolve_endpoint(host)
+    local = endpoint is not None and endpoint[0] == "unix"
+    if mode == "cgroup" or (mode == "auto" and local and CgroupResourceProvider.available(root)):
+        if not CgroupResourceProvider.available(root):
+            logger.warning(f"No cgroup v2 hierarchy at {root}; {host} will use Docker stats for every container")
+        logger.info(f"Resource provider for {host}: cgroup files at {root}")
+        return CgroupResourceProvider(host, root, fallback=docker_provider)
+
+    logger.info(f"Resource provider for {host}: Docker stats API")
+    return docker_provider
@@ -1,21 +1,66 @@
 import docker
-from typing import Dict, Any, List, Tuple
+from typing import Dict, Any, List, Optional, Tuple, Union
 import logging
 from datetime import datetime
+from core.image_ref import ImageRef, parse_image_ref
+from core.policy_mapper import CompiledPolicy, DEFAULT_POLICY, get_policy
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
 
 logger = logging.getLogger(__name__)
 
-# Whitelist of sanctioned images (CRITICAL SECURITY)
-SANCTIONED_IMAGES = [
-    "archestra/platform",
-    "postgres",
-    "sentinel-backend",
-    "sentinel-frontend",
-]
+# Built-in defaults; the active, hot-reloadable values come from core.policy_mapper
+SANCTIONED_IMAGES = list(DEFAULT_POLICY["identity"]["sanctioned_images"])
+SAFE_BIND_IPS = list(DEFAULT_POLICY["network"]["safe_bind_ips"])
+CRITICAL_PORTS_INTERNAL = list(DEFAULT_POLICY["network"]["critical_ports"])
+
+
+def resource_usage(container_stats: Dict[str, Any]) -> Tuple[int, float]:
+    """
+    Memory usage (bytes) and CPU percent from a Docker stats payload.
+    CPU percent uses the precpu sample, as `docker stats` does.
+    """
+    memory_usage = (container_stats.get("memory_stats") or {}).get("usage", 0) or 0
+    cpu_stats = container_stats.get("cpu_stats") or {}
+    precpu_stats = container_stats.get("precpu_stats") or {}
+    cpu_delta = (cpu_stats.get("cpu_usage", {}).get("total_usage", 0)
+                 - precpu_stats.get("cpu_usage", {}).get("total_usage", 0))
+    system_delta = cpu_stats.get("system_cpu_usage", 0) - precpu_stats.get("system_cpu_usage", 0)
+    cpu_percent = 0.0
+    if cpu_delta > 0 and system_delta > 0:
+        online_cpus = cpu_stats.get("online_cpus") or len(cpu_stats.get("cpu_usage", {}).get("percpu_usage") or []) or 1
+        cpu_percent = round(cpu_delta / system_delta * online_cpus * 100, 2)
+    return memory_usage, cpu_percent
+
+
+class BatchScores:
+    """
+    Scores for a batch of containers held as columns.
+    Explanation strings are only built when `details(i)` is called.
+    """
+
+    def __init__(self, identity, configuration, network, resources, trust, inputs):
+        self.identity = identity
+        self.configuration = configuration
+        self.network = network
+        self.resources = resources
+        self.trust = trust
+        self._inputs = inputs  # (attrs_list, image_names, stats_list, policy)
+
+    def __len__(self) -> int:
+        return len(self.trust)
+
+    def trust_scores(self) -> List[int]:
+        return [int(t) for t in self.trust]
 
-# Ports considered safe (if bound to localhost only)
-SAFE_BIND_IPS = ["127.0.0.1", "localhost", "::1"]
-CRITICAL_PORTS_INTERNAL = [2375, 2376, 22, 23, 6379, 5432, 3306, 27017]
+    def details(self, i: int) -> Dict[str, Any]:
+        """Full details dict for the i-th container, same shape as calculate_trust_score"""
+        attrs_list, image_names, stats_list, policy = self._inputs
+        _, details = TrustScoreEvaluator.calculate_trust_score(attrs_list[i], image_names[i], stats_list[i], policy)
+        return details
 
 
 class TrustScoreEvaluator:
@@ -30,48 +75,49 @@ class TrustScoreEvaluator:
     """
 
     @staticmethod
-    def _evaluate_identity(image_name: str) -> Tuple[int, str]:
+    def _evaluate_identity(
+        image: Union[str, ImageRef], policy: CompiledPolicy = None, image_id: Optional[str] = None
+    ) -> Tuple[int, str]:
         """
         V1: Identity Vector (30% weight)
         Checks if image is in sanctioned list or verified repository
         Returns: (score_0_100, explanation)
         """
+        policy = policy or get_policy()
+        scores = policy.identity_scores
         score = 0
         explanation = "Identity: "
 
-        # Extract image repo from full image name
-        image_repo = image_name.split(":")[0] if image_name else ""
+        ref = parse_image_ref(image) if isinstance(image, str) else image
+        image_repo = ref.name
         
-        # Check against whitelist
-        is_sanctioned = any(
-            sanctioned in image_repo.lower() for sanctioned in SANCTIONED_IMAGES
-        )
-        
-        if is_sanctioned:
-            score = 100
+        if policy.is_sanctioned(ref, image_id):
+            score = scores.sanctioned
             explanation += f"✓ Sanctioned image ({image_repo})"
-        elif "." in image_repo.split("/")[0] if "/" in image_repo else False:
+        elif ref.explicit_registry and not ref.is_hub:
             # Has registry (domain), likely private/verified
-            score = 80
+            score = scores.private_registry
             explanation += f"✓ Private registry detected ({image_repo})"
-        elif "/" in image_repo:
+        elif ref.namespace and ref.namespace != "library":
             # Has org/user namespace (e.g., myorg/image)
-            score = 60
+            score = scores.namespace
             explanation += f"⚠ Public namespace image ({image_repo})"
         else:
             # Unknown or Docker Hub library (potential Shadow AI)
-            score = 20
+            score = scores.unverified
             explanation += f"✗ Unverified/Shadow AI ({image_repo})"
         
         return score, explanation
 
     @staticmethod
-    def _evaluate_configuration(container_attrs: Dict[str, Any]) -> Tuple[int, str]:
+    def _evaluate_configuration(container_attrs: Dict[str, Any], policy: CompiledPolicy = None) -> Tuple[int, str]:
         """
         V2: Configuration Vector (30% weight)
         Checks: root user, privileged mode, ReadOnlyRootfs
         Returns: (score_0_100, explanation)
         """
+        policy = policy or get_policy()
+        deductions = policy.config_deductions
         score = 100  # Start perfect, deduct for issues
         explanation = "Config: "
         issues = []
@@ -81,23 +127,23 @@ class TrustScoreEvaluator:
 
         # Check 1: Root User
         user = config.get("User", "")
-        if user == "" or user == "0" or user == "root":
-            score -= 30
+        if user in policy.root_users:
+            score -= deductions.root_user
             issues.append("ROOT_USER")
         
         # Check 2: Privileged Mode
         if host_config.get("Privileged"):
-            score -= 35
+            score -= deductions.privileged
             issues.append("PRIVILEGED_MODE")
         
         # Check 3: ReadOnlyRootfs (absence is a risk)
         if not host_config.get("ReadonlyRootfs"):
-            score -= 20
+            score -= deductions.writable_root_fs
             issues.append("WRITABLE_ROOT_FS")
         
         # Check 4: Cap Drop (best practice)
         if not host_config.get("CapDrop"):
-            score -= 10
+            score -= deductions.no_cap_drop
             issues.append("NO_CAP_DROP")
 
         if issues:
@@ -108,12 +154,14 @@ class TrustScoreEvaluator:
         return max(score, 0), explanation
 
     @staticmethod
-    def _evaluate_network_exposure(container_attrs: Dict[str, Any]) -> Tuple[int, str]:
+    def _evaluate_network_exposure(container_attrs: Dict[str, Any], policy: CompiledPolicy = None) -> Tuple[int, str]:
         """
         V3: Network Exposure Vector (20% weight)
         Checks port bindings: 0.0.0.0 = HIGH RISK, 127.0.0.1 = SAFE
         Returns: (score_0_100, explanation)
         """
+        policy = policy or get_policy()
+        deductions = policy.network_deductions
         score = 100  # Start perfect
         explanation = "Network: "
         risks = []
@@ -137,15 +185,15 @@ class TrustScoreEvaluator:
                         
                         # Check for 0.0.0.0 binding (world-accessible)
                         if host_ip == "0.0.0.0" or host_ip == "":
-                            if port_num in CRITICAL_PORTS_INTERNAL:
-                                score -= 40
+                            if port_num in policy.critical_ports:
+                                score -= deductions.critical_world
                                 risks.append(f"CRITICAL:{port_num}/world")
                             else:
-                                score -= 20
+                                score -= deductions.exposed_world
                                 risks.append(f"EXPOSED:{port_num}")
                         # Check for safe binding
-                        elif host_ip not in SAFE_BIND_IPS:
-                            score -= 5
+                        elif host_ip not in policy.safe_bind_ips:
+                            score -= deductions.non_local
                             risks.append(f"NON_LOCAL:{host_ip}:{port_num}")
         
         # Method 2: NetworkSettings.Ports (fallback)
@@ -156,7 +204,7 @@ class TrustScoreEvaluator:
                     if bindings:
                         for binding in bindings:
                             if binding.get("HostIp") == "0.0.0.0":
-                                score -= 25
+                                score -= deductions.fallback_world
                                 risks.append(f"BINDING:{port_spec}/0.0.0.0")
 
         if risks:
@@ -167,12 +215,14 @@ class TrustScoreEvaluator:
         return max(score, 0), explanation
 
     @staticmethod
-    def _evaluate_resource_footprint(container_stats: Dict[str, Any]) -> Tuple[int, str]:
+    def _evaluate_resource_footprint(container_stats: Dict[str, Any], policy: CompiledPolicy = None) -> Tuple[int, str]:
         """
         V4: Resource Footprint Vector (20% weight)
         Checks CPU/Memory limits and actual usage
         Returns: (score_0_100, explanation)
         """
+        policy = policy or get_policy()
+        deductions = policy.resource_deductions
         score = 100
         explanation = "Resources: "
         warnings = []
@@ -182,30 +232,29 @@ class TrustScoreEvaluator:
         memory_limit = memory_stats.get("limit", 0)
         memory_usage = memory_stats.get("usage", 0)
 
-        # Extract CPU usage
-        cpu_stats = container_stats.get("cpu_stats", {})
-        cpu_usage = cpu_stats.get("cpu_usage", {}).get("total_usage", 0)
+        # CPU percent over the sampling interval (cumulative usage only measures age)
+        _, cpu_percent = resource_usage(container_stats)
 
         # Check 1: No Memory Limit (8GB system default = 8589934592 bytes ≈ 8GB)
-        # If memory_limit > 1GB on 8GB system, penalize as "unlimited"
-        if memory_limit > (1024 * 1024 * 1024) or memory_limit == 0:  # > 1GB or 0
-            score -= 25
+        # If memory_limit > 1GB (policy default) on 8GB system, penalize as "unlimited"
+        if memory_limit > policy.memory_limit_max or memory_limit == 0:
+            score -= deductions.no_memory_limit
             warnings.append(f"NO_MEMORY_LIMIT({memory_limit / 1024 / 1024 / 1024:.1f}GB)")
         
         # Check 2: Memory Usage High (> 80% of limit)
         if memory_limit > 0 and memory_usage > 0:
             usage_pct = (memory_usage / memory_limit) * 100
-            if usage_pct > 80:
-                score -= 15
+            if usage_pct > policy.high_mem_pct:
+                score -= deductions.high_mem
                 warnings.append(f"HIGH_MEM({usage_pct:.0f}%)")
-            elif usage_pct > 50:
-                score -= 5
+            elif usage_pct > policy.med_mem_pct:
+                score -= deductions.med_mem
                 warnings.append(f"MED_MEM({usage_pct:.0f}%)")
         
-        # Check 3: CPU Usage Detection (if > some threshold, concerning)
-        if cpu_usage > (100_000_000_000):  # Rough threshold
-            score -= 10
-            warnings.append("HIGH_CPU")
+        # Check 3: Sustained CPU load
+        if cpu_percent > policy.high_cpu_pct:
+            score -= deductions.high_cpu
+            warnings.append(f"HIGH_CPU({cpu_percent:.0f}%)")
 
         if warnings:
             explanation += f"⚠ {', '.join(warnings)}"
@@ -215,29 +264,50 @@ class TrustScoreEvaluator:
         return max(score, 0), explanation
 
     @classmethod
-    def calculate_trust_score(
-        cls, container_attrs: Dict[str, Any], image_name: str, container_stats: Dict[str, Any] = None
+    def evaluate_static_vectors(
+        cls, container_attrs: Dict[str, Any], image: Union[str, ImageRef], policy: CompiledPolicy = None
+    ) -> Dict[str, Tuple[int, str]]:
+        """
+        Evaluate the vectors that only change when a container is recreated
+        (identity, configuration, network)
+        
+        Returns: {vector_name: (score_0_100, explanation)}
+        """
+        policy = policy or get_policy()
+        return {
+            "identity": cls._evaluate_identity(image, policy, container_attrs.get("Image")),
+            "configuration": cls._evaluate_configuration(container_attrs, policy),
+            "network": cls._evaluate_network_exposure(container_attrs, policy),
+        }
+
+    @classmethod
+    def combine_vectors(
+        cls,
+        static_vectors: Dict[str, Tuple[int, str]],
+        container_stats: Dict[str, Any] = None,
+        policy: CompiledPolicy = None,
     ) -> Tuple[int, Dict[str, Any]]:
         """
-        Calculate final Trust Score (0-100) with all 4 vectors
+        Combine precomputed static vectors with a fresh resource vector
         
         Returns: (trust_score, details_dict)
         """
         if not container_stats:
             container_stats = {}
+        policy = policy or get_policy()
+        weights = policy.weights
 
-        # Calculate each vector
-        identity_score, identity_detail = cls._evaluate_identity(image_name)
-        config_score, config_detail = cls._evaluate_configuration(container_attrs)
-        network_score, network_detail = cls._evaluate_network_exposure(container_attrs)
-        resource_score, resource_detail = cls._evaluate_resource_footprint(container_stats)
+        identity_score, identity_detail = static_vectors["identity"]
+        config_score, config_detail = static_vectors["configuration"]
+        network_score, network_detail = static_vectors["network"]
+        resource_score, resource_detail = cls._evaluate_resource_footprint(container_stats, policy)
 
-        # Weighted average (30%, 30%, 20%, 20%)
+        # Weighted average (30%, 30%, 20%, 20% by default)
         trust_score = int(
-            (identity_score * 0.30)
-            + (config_score * 0.30)
-            + (network_score * 0.20)
-            + (resource_score * 0.20)
+            (identity_score * weights.identity)
+            + (config_score * weights.configuration)
+            + (network_score * weights.network)
+            + (resource_score * weights.resources)
         )
 
         details = {
@@ -253,6 +323,142 @@ class TrustScoreEvaluator:
 
         return trust_score, details
 
+    @classmethod
+    def calculate_trust_score(
+        cls,
+        container_attrs: Dict[str, Any],
+        image_name: Union[str, ImageRef],
+        container_stats: Dict[str, Any] = None,
+        policy: CompiledPolicy = None,
+    ) -> Tuple[int, Dict[str, Any]]:
+        """
+        Calculate final Trust Score (0-100) with all 4 vectors
+        
+        Returns: (trust_score, details_dict)
+        """
+        policy = policy or get_policy()
+        static_vectors = cls.evaluate_static_vectors(container_attrs, image_name, policy)
+        return cls.combine_vectors(static_vectors, container_stats, policy)
+
+    @staticmethod
+    def _network_features(container_attrs: Dict[str, Any], policy: CompiledPolicy) -> Tuple[int, int, int, int]:
+        """Count (critical world, exposed world, non-local, fallback 0.0.0.0) bindings"""
+        critical = exposed = non_local = fallback = 0
+        port_bindings = (container_attrs.get("HostConfig") or {}).get("PortBindings") or {}
+        for port_spec, bindings_list in port_bindings.items():
+            for binding in bindings_list or ():
+                host_ip = binding.get("HostIp", "")
+                try:
+                    port_num = int(port_spec.split("/")[0])
+                except:
+                    port_num = None
+                if host_ip == "0.0.0.0" or host_ip == "":
+                    if port_num in policy.critical_ports:
+                        critical += 1
+                    else:
+                        exposed += 1
+                elif host_ip not in policy.safe_bind_ips:
+                    non_local += 1
+        if not port_bindings:
+            ports = (container_attrs.get("NetworkSettings") or {}).get("Ports") or {}
+            for bindings in ports.values():
+                for binding in bindings or ():
+                    if binding.get("HostIp") == "0.0.0.0":
+                        fallback += 1
+        return critical, exposed, non_local, fallback
+
+    @classmethod
+    def score_batch(
+        cls,
+        attrs_list: List[Dict[str, Any]],
+        image_names: List[str],
+        stats_list: List[Dict[str, Any]] = None,
+        policy: CompiledPolicy = None,
+    ) -> BatchScores:
+        """
+        Score a whole fleet in one pass.
+        Features are extracted into columns and the four vectors plus the
+        weighted sum are computed with NumPy; results match calculate_trust_score.
+        Falls back to per-container scoring when NumPy is not installed.
+
+        Numbers only: details(i) re-runs the full evaluation. The scanner needs
+        explanations for every container and scores through the static-vector
+        cache instead (one evaluation per distinct spec), so this serves
+        score-only consumers such as bulk analysis of candidate policies.
+        """
+        policy = policy or get_policy()
+        w = policy.weights
+        count = len(attrs_list)
+        stats_list = list(stats_list) if stats_list is not None else [None] * count
+        stats_list = [st or {} for st in stats_list]
+        inputs = (list(attrs_list), list(image_names), stats_list, policy)
+
+        if np is None:
+            rows = [cls.calculate_trust_score(*args)[1]["vectors"] for args in zip(*inputs[:3])]
+            columns = [[r[v]["score"] for r in rows] for v in ("identity", "configuration", "network", "resources")]
+            trust = [
+                int(ident * w.identity + conf * w.configuration + net * w.network + res * w.resources)
+                for ident, conf, net, res in zip(*columns)
+            ]
+            return BatchScores(*columns, trust, inputs)
+
+        # Identity depends only on the image: score each distinct image once
+        image_keys = [(name, attrs.get("Image")) for name, attrs in zip(image_names, attrs_list)]
+        identity_by_image = {}
+        for key in image_keys:
+            if key not in identity_by_image:
+                identity_by_image[key] = cls._evaluate_identity(key[0], policy, key[1])[0]
+        identity = np.fromiter((identity_by_image[k] for k in image_keys), dtype=np.int64, count=count)
+
+        root = np.zeros(count, dtype=bool)
+        privileged = np.zeros(count, dtype=bool)
+        readonly = np.zeros(count, dtype=bool)
+        capdrop = np.zeros(count, dtype=bool)
+        ports = np.zeros((count, 4), dtype=np.int64)
+        memory_limit = np.zeros(count, dtype=np.float64)
+        memory_usage = np.zeros(count, dtype=np.float64)
+        cpu_percent = np.zeros(count, dtype=np.float64)
+
+        for n, (attrs, stats) in enumerate(zip(attrs_list, stats_list)):
+            host_config = attrs.get("HostConfig") or {}
+            user = (attrs.get("Config") or {}).get("User", "")
+            root[n] = user in policy.root_users
+            privileged[n] = bool(host_config.get("Privileged"))
+            readonly[n] = bool(host_config.get("ReadonlyRootfs"))
+            capdrop[n] = bool(host_config.get("CapDrop"))
+            ports[n] = cls._network_features(attrs, policy)
+            memory_stats = stats.get("memory_stats", {})
+            memory_limit[n] = memory_stats.get("limit", 0)
+            memory_usage[n] = memory_stats.get("usage", 0)
+            cpu_percent[n] = resource_usage(stats)[1]
+
+        cd = policy.config_deductions
+        configuration = np.maximum(
+            100 - cd.root_user * root - cd.privileged * privileged
+            - cd.writable_root_fs * ~readonly - cd.no_cap_drop * ~capdrop, 0
+        ).astype(np.int64)
+        network = np.maximum(100 - ports @ np.array(policy.network_deductions, dtype=np.int64), 0)
+
+        rd = policy.resource_deductions
+        no_limit = (memory_limit > policy.memory_limit_max) | (memory_limit == 0)
+        has_usage = (memory_limit > 0) & (memory_usage > 0)
+        usage_pct = np.zeros(count, dtype=np.float64)
+        np.multiply(np.divide(memory_usage, memory_limit, where=has_usage, out=usage_pct), 100, out=usage_pct)
+        high_mem = has_usage & (usage_pct > policy.high_mem_pct)
+        med_mem = has_usage & ~high_mem & (usage_pct > policy.med_mem_pct)
+        resources = np.maximum(
+            100 - rd.no_memory_limit * no_limit - rd.high_mem * high_mem - rd.med_mem * med_mem
+            - rd.high_cpu * (cpu_percent > policy.high_cpu_pct), 0
+        ).astype(np.int64)
+
+        # Same operation order as combine_vectors so the truncated result is identical
+        trust = (
+            identity * w.identity + configuration * w.configuration
+            + network * w.network + resources * w.resources
+        ).astype(np.int64)
+
+        return BatchScores(identity, configuration, network, resources, trust, inputs)
+
 
 # Backward compatibility
 def calculate_risk_score(container_attrs: Dict[str, Any], image_tags: list) -> int:
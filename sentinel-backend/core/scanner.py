@@ -1,21 +1,41 @@
+import asyncio
 import docker
+import os
 import sys
 import logging
 import time
 import threading
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Iterable, Optional, Tuple
 from pydantic import BaseModel
+from core.docker_client import DockerConnectionManager, DOCKER_HOSTS, DEFAULT_HOST
+from core.async_docker import DockerUnavailable
+from core.snapshot import ScanSnapshot, get_snapshot, publish_snapshot
+from core.score_cache import StaticVectorCache, fingerprint_container
+from core.timeseries import TimeSeriesStore
+from core.policy_mapper import CompiledPolicy, PolicyManager, get_policy
+from core.image_ref import parse_image_ref
+from core.resources import LIVE_STATUSES, ResourceProvider, select_resource_provider
+from core.scheduler import ScanScheduler
 
 logger = logging.getLogger(__name__)
 
-# GLOBAL CACHE
-DOCKER_CACHE = {
-    "containers": [],
-    "timestamp": 0
-}
+# A host's sweep is abandoned past this deadline and its circuit breaker opened
+HOST_SCAN_TIMEOUT = float(os.getenv("SENTINEL_HOST_SCAN_TIMEOUT", "60"))
+
+# Container lifecycle actions that trigger a targeted rescan
+CONTAINER_EVENTS = {"create", "start", "die", "destroy", "pause", "unpause", "update", "rename"}
+
+# Image actions that invalidate the image-ID -> tags index
+IMAGE_EVENTS = {"pull", "tag", "untag", "delete", "import", "load"}
+
+
+def _container_status(attrs: Dict[str, Any]) -> str:
+    return (attrs.get("State") or {}).get("Status", "unknown")
 
 class ContainerInfo(BaseModel):
     id: str
+    # 64-character Docker ID; `id` is the short form shown in the UI
+    full_id: str = ""
     name: str
     image: str
     status: str
@@ -25,152 +45,559 @@ class ContainerInfo(BaseModel):
     risk_score: int
     trust_score: int
     trust_details: Optional[Dict[str, Any]] = None
+    memory_usage: int = 0
+    cpu_percent: float = 0.0
+    host: str = DEFAULT_HOST
 
-class DockerScanner:
-    _instance = None
-    _background_thread = None
-    _stop_event = threading.Event()
 
-    def __init__(self):
-        pass
+class HostScanTimeout(Exception):
+    pass
 
-    @classmethod
-    def get_instance(cls):
-        if not cls._instance:
-            cls._instance = DockerScanner()
-        return cls._instance
+
+class HostScanner:
+    """
+    Scanner state for one Docker host.
+    Each host sweeps and follows its events stream on its own threads, so a
+    slow or dead daemon never delays the others.
+    """
+
+    def __init__(self, host: str, fleet: "DockerScanner"):
+        self.host = host
+        self._fleet = fleet
+        self._results: Dict[str, ContainerInfo] = {}
+        self._results_lock = threading.Lock()
+        self._event_stream = None
+        # cgroup files or the Docker stats API, chosen per host at startup
+        self._resources: ResourceProvider = select_resource_provider(host)
+        # Set by start_background_scanning(); events feed it churn and priorities
+        self._scheduler: Optional[ScanScheduler] = None
+        self._scan_metrics: Dict[str, Any] = {}
+        # One sweep at a time per host, whoever triggers it
+        self._sweep_lock = threading.Lock()
+        self.skipped_sweeps = 0
+        self._inspect_cache: Dict[str, Dict[str, Any]] = {}
+        self._image_tags: Optional[Dict[str, List[str]]] = None
+
+    @property
+    def connection(self) -> DockerConnectionManager:
+        return DockerConnectionManager(self.host)
 
     def _connect(self):
+        return self.connection.get_client()
+
+    def results(self) -> List[ContainerInfo]:
+        with self._results_lock:
+            return list(self._results.values())
+
+    def _refresh_image_index(self, client):
+        """Rebuild the image-ID -> tags index with a single images call"""
         try:
-            client = docker.DockerClient(base_url="tcp://host.docker.internal:2375", timeout=10)
-            client.ping()
-            return client
+            images = client.api.images()
+        except Exception as e:
+            logger.warning(f"Could not list images on {self.host}: {e}")
+            return
+        self._image_tags = {
+            image["Id"]: [t for t in (image.get("RepoTags") or []) if t != "<none>:<none>"]
+            for image in images
+        }
+
+    def _resolve_image_name(self, attrs: Dict[str, Any]) -> str:
+        tags = (self._image_tags or {}).get(attrs.get("Image"))
+        if tags:
+            return tags[0]
+        # Untagged image: fall back to the reference the container was created from
+        return (attrs.get("Config") or {}).get("Image") or "unknown"
+
+    def _build_container_info(self, attrs: Dict[str, Any], stats: Dict[str, Any], stale: bool = False) -> ContainerInfo:
+        """Score a single container from its inspect payload and stats"""
+        from core.risk_engine import TrustScoreEvaluator, resource_usage
+
+        container_id = attrs["Id"]
+        name = (attrs.get("Name") or "").lstrip("/")
+        # Handle Image name parsing safely
+        try:
+            image_name = self._resolve_image_name(attrs)
         except:
-            pass
-        
+            image_name = "unknown"
+
+        # Parsed once and shared by the sanctioned check and the identity vector
+        image_ref = parse_image_ref(image_name)
+
+        policy = get_policy()
+        is_sanctioned = policy.is_sanctioned(image_ref, attrs.get("Image"))
+
+        # CALCULATE TRUST SCORE (static vectors are reused until the config or policy changes)
+        score_cache = self._fleet._score_cache
         try:
-            client = docker.from_env(timeout=10)
-            client.ping()
-            return client
+            fingerprint = fingerprint_container(attrs, image_name, policy.version)
+            static_vectors = score_cache.get(container_id, fingerprint)
+            if static_vectors is None:
+                static_vectors = TrustScoreEvaluator.evaluate_static_vectors(attrs, image_ref, policy)
+                score_cache.put(container_id, fingerprint, static_vectors)
+            trust_score, trust_details = TrustScoreEvaluator.combine_vectors(static_vectors, stats, policy)
         except Exception as e:
-            logger.error(f"Failed to connect to Docker: {e}")
-            return None
+            logger.error(f"Trust calc failed for {name}: {e}")
+            trust_score = 50
+            trust_details = {"error": "calculation_failed"}
+
+        if stale and "vectors" in trust_details:
+            trust_details["vectors"]["resources"]["stale"] = True
 
-    def _get_container_stats_safe(self, container) -> Dict[str, Any]:
+        if trust_score >= 80: threat_level = "Low"
+        elif trust_score >= 60: threat_level = "Medium"
+        elif trust_score >= 40: threat_level = "High"
+        else: threat_level = "Critical"
+
+        if not is_sanctioned and trust_score < 60:
+            threat_level = "Critical"
+
+        # Determine type
+        ctype = "mcp_server"
         try:
-            return container.stats(stream=False)
+            name_lower = name.lower()
+            image_lower = image_name.lower()
+            agent_keywords = ['agent', 'ai', 'bot', 'sentinel', 'orchestrate', 'llm', 'gpt']
+            if any(k in name_lower for k in agent_keywords) or any(k in image_lower for k in agent_keywords):
+                ctype = "ai_agent"
         except:
-            return {}
+            pass
+
+        memory_usage, cpu_percent = resource_usage(stats or {})
+
+        return ContainerInfo(
+            id=container_id[:12],
+            full_id=container_id,
+            name=name,
+            image=image_name,
+            status=_container_status(attrs),
+            is_sanctioned=is_sanctioned,
+            type=ctype,
+            threat_level=threat_level,
+            risk_score=100 - trust_score,
+            trust_score=trust_score,
+            trust_details=trust_details,
+            memory_usage=memory_usage,
+            cpu_percent=cpu_percent,
+            host=self.host,
+        )
 
     def _perform_scan(self):
-        global DOCKER_CACHE
-        
+        """
+        Full sweep (reconciliation pass) of this host.
+        One containers list call drives the inventory; only new containers or
+        containers whose state changed are re-inspected.
+        Skipped when the previous sweep is still running (e.g. one that
+        outlived the fleet scan deadline); returns True if a sweep ran and
+        reached the daemon.
+        """
+        if not self._sweep_lock.acquire(blocking=False):
+            self.skipped_sweeps += 1
+            logger.warning(f"Previous sweep on {self.host} still running; skipping this one")
+            return False
+        try:
+            return self._sweep()
+        finally:
+            self._sweep_lock.release()
+
+    def _sweep(self) -> bool:
         client = self._connect()
         if not client:
-            return
+            return False
 
+        started = time.monotonic()
+        deadline = started + HOST_SCAN_TIMEOUT
         try:
-            containers = client.containers.list(all=True)
-        except:
-            return
+            summaries = client.api.containers(all=True)
 
-        results = []
-        from core.risk_engine import TrustScoreEvaluator, SANCTIONED_IMAGES
+            if self._image_tags is None:
+                self._refresh_image_index(client)
 
-        for container in containers:
+            inventory = []
+            inspected = 0
+            for summary in summaries:
+                if time.monotonic() > deadline:
+                    raise HostScanTimeout(f"sweep exceeded {HOST_SCAN_TIMEOUT}s")
+                cid = summary["Id"]
+                attrs = self._inspect_cache.get(cid)
+                if attrs is None or _container_status(attrs) != summary.get("State"):
+                    try:
+                        attrs = client.api.inspect_container(cid)
+                        inspected += 1
+                    except docker.errors.NotFound:
+                        # Removed while we were iterating
+                        continue
+                    except Exception as e:
+                        logger.error(f"Error inspecting container {cid[:12]} on {self.host}: {e}")
+                        continue
+                inventory.append(attrs)
+        except Exception as e:
+            # Keep the last known results; the breaker stops hammering the host
+            self.connection.invalidate(e)
+            self._scan_metrics = {**self._scan_metrics, "last_error": str(e), "timestamp": time.time()}
+            return False
+        self._inspect_cache = {attrs["Id"]: attrs for attrs in inventory}
+        self._resources.sync(attrs["Id"] for attrs in inventory if _container_status(attrs) in LIVE_STATUSES)
+
+        stats_by_id = self._resources.collect(client, inventory)
+        stale_count = sum(1 for _, stale in stats_by_id.values() if stale)
+
+        results = {}
+        for attrs in inventory:
             try:
-                name = container.name or ""
-                # Handle Image name parsing safely
-                try:
-                    image_tags = container.image.tags if container.image.tags else [str(container.image)]
-                    image_name = image_tags[0] if image_tags else "unknown"
-                except:
-                    image_name = "unknown"
-                    
-                image_repo = image_name.split(":")[0]
-
-                is_sanctioned = any(s in image_repo.lower() for s in SANCTIONED_IMAGES)
-                
-                # Fetch Stats
-                stats = self._get_container_stats_safe(container)
-
-                # CALCULATE TRUST SCORE
-                try:
-                    trust_score, trust_details = TrustScoreEvaluator.calculate_trust_score(
-                        container.attrs, image_name, stats
-                    )
-                except Exception as e:
-                    logger.error(f"Trust calc failed for {name}: {e}")
-                    trust_score = 50
-                    trust_details = {"error": "calculation_failed"}
-
-                if trust_score >= 80: threat_level = "Low"
-                elif trust_score >= 60: threat_level = "Medium"
-                elif trust_score >= 40: threat_level = "High"
-                else: threat_level = "Critical"
-
-                if not is_sanctioned and trust_score < 60:
-                    threat_level = "Critical"
-                
-                # Determine type
-                ctype = "mcp_server"
-                try:
-                    name_lower = name.lower()
-                    image_lower = image_name.lower()
-                    agent_keywords = ['agent', 'ai', 'bot', 'sentinel', 'orchestrate', 'llm', 'gpt']
-                    if any(k in name_lower for k in agent_keywords) or any(k in image_lower for k in agent_keywords):
-                        ctype = "ai_agent"
-                except:
-                    pass
-
-                info = ContainerInfo(
-                    id=container.short_id,
-                    name=name,
-                    image=image_name,
-                    status=container.status,
-                    is_sanctioned=is_sanctioned,
-                    type=ctype,
-                    threat_level=threat_level,
-                    risk_score=100 - trust_score,
-                    trust_score=trust_score,
-                    trust_details=trust_details,
-                )
-                results.append(info)
+                stats, stale = stats_by_id.get(attrs["Id"], ({}, False))
+                results[attrs["Id"]] = self._build_container_info(attrs, stats, stale)
+            except Exception as e:
+                logger.error(f"Error processing container {attrs.get('Name')}: {e}")
+                continue
+
+        with self._results_lock:
+            removed = [cid for cid in self._results if cid not in results]
+            self._results = results
+        self._fleet._publish(results.values())
+
+        # Drop remembered stats and cached scores for containers that no longer exist
+        self._resources.retain(results)
+        for cid in removed:
+            self._fleet._score_cache.evict(cid)
+
+        self._scan_metrics = {
+            "duration_ms": int((time.monotonic() - started) * 1000),
+            "containers": len(results),
+            "inspected": inspected,
+            "stats_timeouts": stale_count,
+            "timestamp": time.time(),
+        }
+        logger.info(
+            f"Background Scan Complete on {self.host}. Cached {len(results)} containers "
+            f"({inspected} inspected, {stale_count} with stale stats) in {self._scan_metrics['duration_ms']}ms."
+        )
+        return True
+
+    def _rescan_container(self, client, container_id: str):
+        """Re-inspect and re-score only the container that changed"""
+        self.rescan_containers(client, [container_id])
+
+    def rescan_containers(self, client, container_ids: Iterable[str]) -> List[ContainerInfo]:
+        """Re-inspect and re-score a few containers, publishing a single snapshot"""
+        inventory = []
+        gone = []
+        for container_id in container_ids:
+            try:
+                inventory.append(client.api.inspect_container(container_id))
+            except docker.errors.NotFound:
+                gone.append(container_id)
 
+        for attrs in inventory:
+            self._inspect_cache[attrs["Id"]] = attrs
+            if _container_status(attrs) in LIVE_STATUSES:
+                self._resources.track(attrs["Id"])
+            else:
+                self._resources.untrack(attrs["Id"])
+        stats_by_id = self._resources.collect(client, inventory) if inventory else {}
+
+        scored = {}
+        for attrs in inventory:
+            stats, stale = stats_by_id.get(attrs["Id"], ({}, False))
+            scored[attrs["Id"]] = self._build_container_info(attrs, stats, stale)
+        with self._results_lock:
+            self._results.update(scored)
+        infos = list(scored.values())
+        removed = [cid for cid in gone if self._forget_container(cid, publish=False)]
+
+        if infos or removed:
+            self._fleet._publish(infos)
+        return infos
+
+    def _rescore(self) -> List[ContainerInfo]:
+        """Re-score known containers from cached inspect payloads and stats (no Docker calls)"""
+        with self._results_lock:
+            previous = dict(self._results)
+
+        rescored = {}
+        for cid, old in previous.items():
+            attrs = self._inspect_cache.get(cid)
+            if attrs is None:
+                continue
+            stale = bool(((old.trust_details or {}).get("vectors") or {}).get("resources", {}).get("stale"))
+            try:
+                rescored[cid] = self._build_container_info(attrs, self._resources.latest(cid), stale)
             except Exception as e:
-                logger.error(f"Error processing container {container.name}: {e}")
+                logger.error(f"Re-score failed for {old.name}: {e}")
+
+        with self._results_lock:
+            # A sweep may have replaced the fleet meanwhile: only update containers still present
+            for cid, info in rescored.items():
+                if cid in self._results:
+                    self._results[cid] = info
+        return list(rescored.values())
+
+    def _forget_container(self, container_id: str, publish: bool = True) -> bool:
+        """Drop a destroyed container; returns True if it was known"""
+        if container_id not in self._results:
+            # Short ID from the rescan API
+            container_id = next((cid for cid in list(self._results) if cid.startswith(container_id)), container_id)
+        self._resources.untrack(container_id)
+        self._inspect_cache.pop(container_id, None)
+        self._fleet._score_cache.evict(container_id)
+        with self._results_lock:
+            removed = self._results.pop(container_id, None)
+        if removed is not None and publish:
+            self._fleet._publish()
+        return removed is not None
+
+    def _handle_event(self, client, event: Dict[str, Any]):
+        """Dispatch a single Docker container or image event"""
+        # Actions like "exec_start: sh" or "health_status: healthy" carry a suffix
+        action = (event.get("Action") or event.get("status") or "").split(":")[0].strip()
+
+        if event.get("Type") == "image":
+            if action in IMAGE_EVENTS:
+                self._refresh_image_index(client)
+            return
+
+        if action not in CONTAINER_EVENTS:
+            return
+
+        container_id = (event.get("Actor") or {}).get("ID") or event.get("id")
+        if not container_id:
+            return
+
+        if self._scheduler is not None:
+            self._scheduler.note_change(container_id)
+        if action == "destroy":
+            self._forget_container(container_id)
+        else:
+            self._rescan_container(client, container_id)
+        logger.debug(f"Event {action} handled for {container_id[:12]} on {self.host}")
+
+    def _watch_events(self, stop_event: threading.Event):
+        """Follow this host's Docker events stream, reconnecting until stopped"""
+        while not stop_event.is_set():
+            client = self._connect()
+            if not client:
+                stop_event.wait(5)
                 continue
-        
-        # ATOMIC UPDATE
-        DOCKER_CACHE["containers"] = results
-        DOCKER_CACHE["timestamp"] = time.time()
-        logger.info(f"Background Scan Complete. Cached {len(results)} containers.")
-        
+
+            try:
+                self._event_stream = client.events(decode=True, filters={"type": ["container", "image"]})
+                for event in self._event_stream:
+                    if stop_event.is_set():
+                        break
+                    try:
+                        self._handle_event(client, event)
+                    except Exception as e:
+                        logger.error(f"Error handling Docker event on {self.host}: {e}")
+            except Exception as e:
+                if not stop_event.is_set():
+                    logger.warning(f"Docker events stream on {self.host} interrupted: {e}")
+                    self.connection.invalidate(e)
+            finally:
+                self._event_stream = None
+
+            stop_event.wait(1)
+
+    def stop(self):
+        stream = self._event_stream
+        if stream is not None:
+            try:
+                stream.close()
+            except:
+                pass
+        self._resources.stop()
+
+    def get_scan_metrics(self) -> Dict[str, Any]:
+        return {
+            **self._scan_metrics,
+            "sweep_in_progress": self._sweep_lock.locked(),
+            "skipped_sweeps": self.skipped_sweeps,
+            "circuit": self.connection.circuit_state(),
+            "resources": self._resources.stats(),
+            "scheduler": self._scheduler.metrics() if self._scheduler is not None else None,
+        }
+
+
+class DockerScanner:
+    """
+    Docker scanner with singleton pattern.
+    Runs one HostScanner per configured Docker host and merges their results
+    into a single snapshot; containers are tagged with their host.
+    """
+    _instance = None
+    _background_thread = None
+    _stop_event = threading.Event()
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super(DockerScanner, cls).__new__(cls)
+            cls._instance._initialize()
+        return cls._instance
+
+    def _initialize(self):
+        self._publish_lock = threading.Lock()
+        self._initial_scan_lock = threading.Lock()
+        self._score_cache = StaticVectorCache()
+        self._timeseries = TimeSeriesStore()
+        self._hosts: Dict[str, HostScanner] = {name: HostScanner(name, self) for name, _ in DOCKER_HOSTS}
+        PolicyManager().add_reload_listener(self._on_policy_reload)
+
+    @classmethod
+    def get_instance(cls):
+        return cls()
+
+    def hosts(self) -> List[str]:
+        return list(self._hosts)
+
+    def host(self, name: str) -> HostScanner:
+        return self._hosts[name]
+
+    def _publish(self, changed: Iterable[ContainerInfo] = ()) -> ScanSnapshot:
+        """
+        Publish the merged per-host results as a new immutable snapshot and
+        record it, with a point for each of the `changed` containers, in the time series
+        """
+        # Held across publish and record so concurrent writers cannot interleave:
+        # snapshots and time-series points both go out in version order
+        with self._publish_lock:
+            containers = [c for scanner in self._hosts.values() for c in scanner.results()]
+            snapshot = publish_snapshot(containers)
+            self._timeseries.record(snapshot, changed)
+            return snapshot
+
+    def _perform_scan(self, timeout: float = HOST_SCAN_TIMEOUT):
+        """
+        Sweep every host concurrently; returns after `timeout` even if a host is still busy.
+        Hosts whose previous sweep has not finished are left alone.
+        """
+        threads = [
+            threading.Thread(target=scanner._perform_scan, daemon=True, name=f"scan-{name}")
+            for name, scanner in self._hosts.items()
+            if not scanner._sweep_lock.locked()
+        ]
+        for thread in threads:
+            thread.start()
+        deadline = time.monotonic() + timeout
+        for thread in threads:
+            thread.join(max(deadline - time.monotonic(), 0))
+
+    def _on_policy_reload(self, policy: CompiledPolicy):
+        """
+        Re-score the known fleet under a new policy from cached inspect payloads
+        and stats, without going back to the Docker daemons
+        """
+        started = time.monotonic()
+        rescored = [info for scanner in self._hosts.values() for info in scanner._rescore()]
+        if not rescored:
+            return
+        self._publish(rescored)
+        logger.info(
+            f"Re-scored {len(rescored)} containers under policy v{policy.version} "
+            f"in {int((time.monotonic() - started) * 1000)}ms"
+        )
+
+    def request_rescan(self, host: Optional[str] = None, container_ids: Optional[List[str]] = None) -> List[str]:
+        """
+        Wake the schedulers for an immediate rescan (full sweep when no IDs).
+        Returns the hosts without a running scheduler; the caller scans those itself.
+        """
+        unscheduled = []
+        for name, scanner in self._hosts.items():
+            if host is not None and name != host:
+                continue
+            if scanner._scheduler is not None:
+                scanner._scheduler.trigger(container_ids)
+            else:
+                unscheduled.append(name)
+        return unscheduled
+
+    def rescan_now(self, host: str, container_ids: Optional[List[str]] = None):
+        """Synchronous rescan of one host (used when background scanning is not running)"""
+        scanner = self._hosts[host]
+        if container_ids is None:
+            scanner._perform_scan()
+            return
+        client = scanner._connect()
+        if client is not None:
+            scanner.rescan_containers(client, container_ids)
+
+    def rescan_container(self, host: str, container_id: str) -> Optional[ContainerInfo]:
+        """
+        Inspect, fetch stats for and score one container right now, merging it
+        into a newly published snapshot. None when the container no longer exists.
+        """
+        scanner = self._hosts[host]
+        client = scanner._connect()
+        if client is None:
+            raise DockerUnavailable(f"Docker host {host} is unavailable")
         try:
-            client.close()
-        except:
-            pass
+            infos = scanner.rescan_containers(client, [container_id])
+        except docker.errors.APIError:
+            raise
+        except Exception as e:
+            scanner.connection.invalidate(e)
+            raise DockerUnavailable(str(e)) from e
+        return infos[0] if infos else None
+
+    def stop(self):
+        """Stop background scanning and close the events streams"""
+        self._stop_event.set()
+        for scanner in self._hosts.values():
+            if scanner._scheduler is not None:
+                scanner._scheduler.stop()
+            scanner.stop()
+
+    def get_scan_metrics(self) -> Dict[str, Any]:
+        """Per-host sweep figures plus the shared score cache"""
+        cache_stats = self._score_cache.stats()
+        return {
+            "hosts": {name: scanner.get_scan_metrics() for name, scanner in self._hosts.items()},
+            # Replicas sharing a spec are scored once
+            "unique_specs": cache_stats["unique_specs"],
+            "dedup_ratio": cache_stats["dedup_ratio"],
+            "score_cache": cache_stats,
+        }
+
+    def get_snapshot(self) -> ScanSnapshot:
+        """Current snapshot, performing the initial synchronous scan if none exists yet"""
+        snapshot = get_snapshot()
+        if snapshot.version == 0:
+            # Concurrent first requests wait for one initial scan instead of starting their own
+            with self._initial_scan_lock:
+                snapshot = get_snapshot()
+                if snapshot.version == 0:
+                    logger.info("Cache empty, performing initial synchronous scan...")
+                    self._perform_scan()
+                    snapshot = get_snapshot()
+        return snapshot
 
-    def scan_containers(self) -> List[ContainerInfo]:
-        global DOCKER_CACHE
-        if not DOCKER_CACHE["containers"] and DOCKER_CACHE["timestamp"] == 0:
-            logger.info("Cache empty, performing initial synchronous scan...")
-            self._perform_scan()
-            
-        return DOCKER_CACHE["containers"]
+    async def get_snapshot_async(self) -> ScanSnapshot:
+        """
+        get_snapshot() for the event loop: the published snapshot is read
+        directly, the initial synchronous scan runs in a worker thread
+        """
+        snapshot = get_snapshot()
+        if snapshot.version == 0:
+            snapshot = await asyncio.to_thread(self.get_snapshot)
+        return snapshot
+
+    def scan_containers(self) -> Tuple[ContainerInfo, ...]:
+        return self.get_snapshot().containers
 
 def start_background_scanning():
-    """Starts the background thread"""
+    """Starts an adaptive scan scheduler and a Docker events watcher per host"""
     scanner = DockerScanner.get_instance()
-    
-    def loop():
-        while not scanner._stop_event.is_set():
-            try:
-                scanner._perform_scan()
-            except Exception as e:
-                logger.error(f"Background scan error: {e}")
-            time.sleep(30)
-            
-    thread = threading.Thread(target=loop, daemon=True)
-    thread.start()
-    return thread
+    threads = []
+
+    for name in scanner.hosts():
+        host_scanner = scanner.host(name)
+        host_scanner._scheduler = ScanScheduler(host_scanner, scanner._stop_event)
+
+        thread = threading.Thread(target=host_scanner._scheduler.run, daemon=True, name=f"reconcile-{name}")
+        thread.start()
+        threads.append(thread)
+
+        events_thread = threading.Thread(
+            target=host_scanner._watch_events, args=(scanner._stop_event,), daemon=True, name=f"events-{name}"
+        )
+        events_thread.start()
+        threads.append(events_thread)
+    return threads
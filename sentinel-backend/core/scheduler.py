@@ -0,0 +1,229 @@
+import heapq
+import logging
+import os
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Full sweeps run between these bounds; churn pulls the interval toward the minimum
+SCAN_INTERVAL_MIN = float(os.getenv("SENTINEL_SCAN_INTERVAL_MIN", "15"))
+SCAN_INTERVAL_MAX = float(os.getenv("SENTINEL_RECONCILE_INTERVAL", "300"))
+# A sweep may take at most 1/SCAN_DUTY_FACTOR of wall time, whatever the churn
+SCAN_DUTY_FACTOR = float(os.getenv("SENTINEL_SCAN_DUTY_FACTOR", "10"))
+
+# Targeted rescans between sweeps, by risk tier (stable sanctioned containers wait for sweeps)
+HOT_RESCAN_INTERVAL = float(os.getenv("SENTINEL_HOT_RESCAN_INTERVAL", "30"))
+WARM_RESCAN_INTERVAL = float(os.getenv("SENTINEL_WARM_RESCAN_INTERVAL", "120"))
+# A container counts as recently changed (hot) for this long after an event
+RECENT_CHANGE_WINDOW = 300
+# Most containers re-scanned per tick, so priority rescans stay cheap on large fleets
+PRIORITY_BATCH = int(os.getenv("SENTINEL_PRIORITY_BATCH", "32"))
+# Delay before retrying a sweep or priority rescan that could not reach the daemon
+RESCAN_RETRY_BACKOFF = float(os.getenv("SENTINEL_RESCAN_RETRY_BACKOFF", "10"))
+
+HOT_TRUST_BELOW = 60
+WARM_TRUST_BELOW = 80
+
+
+class ScanScheduler:
+    """
+    Adaptive scan scheduler for one Docker host.
+
+    Full sweeps are spaced by observed churn (container starts, stops and
+    config changes per minute), never closer than SCAN_DUTY_FACTOR times
+    the last sweep's duration. Between sweeps, low-trust, unsanctioned and
+    recently changed containers are re-scanned in small batches from a
+    due-time heap. The loop sleeps on an Event, so stop() and trigger()
+    take effect immediately.
+    """
+
+    def __init__(self, host_scanner, stop_event: threading.Event):
+        self._scanner = host_scanner
+        self._stop_event = stop_event
+        self._wake = threading.Event()
+        self._lock = threading.Lock()
+
+        self._full_requested = True  # first sweep right away
+        self._requested: Set[str] = set()
+        self._heap: List[Tuple[float, str]] = []
+        self._next_due: Dict[str, float] = {}
+        self._changed_at: Dict[str, float] = {}
+        self._pending_changes = 0
+
+        self._interval = SCAN_INTERVAL_MAX
+        self._next_sweep = 0.0
+        self._last_sweep_at: Optional[float] = None
+        self._churn_rate = 0.0  # changes per minute (smoothed)
+        self.sweeps = 0
+        self.priority_rescans = 0
+        self.deferred_rescans = 0
+        self.failed_sweeps = 0
+
+    # ─── SIGNALS ───────────────────────────
+
+    def trigger(self, container_ids: Optional[Iterable[str]] = None):
+        """Rescan now: the given containers, or a full sweep when None"""
+        with self._lock:
+            if container_ids is None:
+                self._full_requested = True
+            else:
+                self._requested.update(container_ids)
+        self._wake.set()
+
+    def note_change(self, container_id: str):
+        """A Docker event touched this container: count churn and keep it hot"""
+        # Keyed like ContainerInfo.id (short ID)
+        container_id = container_id[:12]
+        now = time.monotonic()
+        with self._lock:
+            self._changed_at[container_id] = now
+            self._pending_changes += 1
+            self._schedule(container_id, now + HOT_RESCAN_INTERVAL)
+
+    def stop(self):
+        self._wake.set()
+
+    # ─── PRIORITIES ───────────────────────────
+
+    def _schedule(self, container_id: str, due: float):
+        self._next_due[container_id] = due
+        heapq.heappush(self._heap, (due, container_id))
+
+    def _tier_interval(self, info, now: float) -> Optional[float]:
+        if now - self._changed_at.get(info.id, float("-inf")) < RECENT_CHANGE_WINDOW or info.trust_score < HOT_TRUST_BELOW:
+            return HOT_RESCAN_INTERVAL
+        if not info.is_sanctioned or info.trust_score < WARM_TRUST_BELOW:
+            return WARM_RESCAN_INTERVAL
+        return None
+
+    def _reschedule(self, infos, now: float):
+        """Place containers back in the heap by their current tier"""
+        with self._lock:
+            for info in infos:
+                interval = self._tier_interval(info, now)
+                if interval is None:
+                    self._next_due.pop(info.id, None)
+                else:
+                    self._schedule(info.id, now + interval)
+
+    def _defer(self, container_ids: List[str], due: float):
+        """Put a batch that could not be rescanned back in the heap"""
+        with self._lock:
+            for cid in container_ids:
+                # Keep an earlier deadline set by an event during the attempt
+                self._schedule(cid, min(due, self._next_due.get(cid, due)))
+            self.deferred_rescans += len(container_ids)
+
+    def _take_due(self, now: float) -> List[str]:
+        """Explicit requests first, then the most overdue containers, at most PRIORITY_BATCH"""
+        with self._lock:
+            batch = list(self._requested)[:PRIORITY_BATCH]
+            self._requested.difference_update(batch)
+            while self._heap and len(batch) < PRIORITY_BATCH and self._heap[0][0] <= now:
+                due, cid = heapq.heappop(self._heap)
+                # Skip entries superseded by a later _schedule() call
+                if self._next_due.get(cid) == due:
+                    del self._next_due[cid]
+                    batch.append(cid)
+        return batch
+
+    # ─── SWEEPS ───────────────────────────
+
+    def _after_sweep(self, before: Dict[str, Any], now: float):
+        after = {info.id: info for info in self._scanner.results()}
+        status_changes = sum(1 for cid in before.keys() & after.keys() if before[cid].status != after[cid].status)
+        with self._lock:
+            churn = len(before.keys() ^ after.keys()) + status_changes + self._pending_changes
+            self._pending_changes = 0
+            # Forget change marks that have cooled down or belong to removed containers
+            self._changed_at = {
+                cid: at for cid, at in self._changed_at.items()
+                if cid in after and now - at < RECENT_CHANGE_WINDOW
+            }
+            # Containers that vanished leave stale heap entries; _take_due skips them
+            self._next_due = {cid: due for cid, due in self._next_due.items() if cid in after}
+
+        if self._last_sweep_at is not None:
+            minutes = max((now - self._last_sweep_at) / 60, 1 / 60)
+            self._churn_rate = 0.5 * self._churn_rate + 0.5 * (churn / minutes)
+        self._last_sweep_at = now
+
+        duration = (self._scanner.get_scan_metrics().get("duration_ms") or 0) / 1000
+        interval = min(SCAN_INTERVAL_MAX / (1 + self._churn_rate), SCAN_INTERVAL_MAX)
+        self._interval = max(interval, SCAN_INTERVAL_MIN, duration * SCAN_DUTY_FACTOR)
+        self._next_sweep = now + self._interval
+        self._reschedule(after.values(), now)
+
+    def _sweep(self):
+        before = {info.id: info for info in self._scanner.results()}
+        try:
+            swept = self._scanner._perform_scan()
+        except Exception as e:
+            logger.error(f"Background scan error on {self._scanner.host}: {e}")
+            swept = False
+        self.sweeps += 1
+        if not swept:
+            # Daemon unreachable or sweep skipped: retry soon, leave churn and interval alone
+            self.failed_sweeps += 1
+            self._next_sweep = time.monotonic() + RESCAN_RETRY_BACKOFF
+            return
+        self._after_sweep(before, time.monotonic())
+
+    def _rescan(self, container_ids: List[str]):
+        client = self._scanner._connect()
+        if client is None:
+            # Daemon unreachable (breaker open): retry after the backoff
+            self._defer(container_ids, time.monotonic() + RESCAN_RETRY_BACKOFF)
+            return
+        try:
+            infos = self._scanner.rescan_containers(client, container_ids)
+        except Exception as e:
+            logger.error(f"Priority rescan error on {self._scanner.host}: {e}")
+            self._defer(container_ids, time.monotonic() + RESCAN_RETRY_BACKOFF)
+            return
+        self.priority_rescans += len(container_ids)
+        self._reschedule(infos, time.monotonic())
+
+    def _next_wake(self, now: float) -> float:
+        with self._lock:
+            if self._full_requested or self._requested:
+                return 0.0
+            wake_at = self._next_sweep
+            if self._heap:
+                wake_at = min(wake_at, self._heap[0][0])
+        return max(wake_at - now, 0.0)
+
+    def run(self):
+        """Scheduler loop (runs on the host's reconcile thread until stopped)"""
+        while not self._stop_event.is_set():
+            # Cleared before the work so a trigger during it is not lost
+            self._wake.clear()
+            now = time.monotonic()
+            with self._lock:
+                full = self._full_requested or now >= self._next_sweep
+                self._full_requested = False
+            if full:
+                self._sweep()
+            else:
+                due = self._take_due(now)
+                if due:
+                    self._rescan(due)
+            self._wake.wait(self._next_wake(time.monotonic()))
+
+    def metrics(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        with self._lock:
+            hot = sum(1 for due in self._next_due.values() if due - now <= HOT_RESCAN_INTERVAL)
+            return {
+                "interval": round(self._interval, 1),
+                "next_sweep_in": round(max(self._next_sweep - now, 0), 1),
+                "churn_per_min": round(self._churn_rate, 2),
+                "prioritized": len(self._next_due),
+                "hot": hot,
+                "sweeps": self.sweeps,
+                "priority_rescans": self.priority_rescans,
+                "deferred_rescans": self.deferred_rescans,
+                "failed_sweeps": self.failed_sweeps,
+            }
@@ -0,0 +1,142 @@
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple, Iterable
+
+# Upper bound on cached static vector results (one entry per unique container spec)
+SCORE_CACHE_SIZE = int(os.getenv("SENTINEL_SCORE_CACHE_SIZE", "4096"))
+
+
+def _binding_ips(bindings_by_port: Optional[Dict[str, Any]]) -> List[Tuple[str, List[str]]]:
+    """(port spec, host IPs) pairs in payload order; host ports are per replica and not scored"""
+    return [
+        (port_spec, [b.get("HostIp", "") for b in (bindings or ())])
+        for port_spec, bindings in (bindings_by_port or {}).items()
+    ]
+
+
+def fingerprint_container(container_attrs: Dict[str, Any], image_name: str, policy_version: int = 0) -> str:
+    """
+    Canonical spec hash over exactly the inputs of the static vectors.
+    Replicas of the same image and HostConfig share a fingerprint even though
+    their names, IDs and published host ports differ. It changes when the
+    container is recreated or updated, or when a new scoring policy is loaded.
+    Keep in sync with the checks in TrustScoreEvaluator.
+    """
+    config = container_attrs.get("Config", {}) or {}
+    host_config = container_attrs.get("HostConfig", {}) or {}
+    port_bindings = host_config.get("PortBindings")
+    spec = {
+        "image": image_name,
+        "image_id": container_attrs.get("Image"),
+        "user": config.get("User", ""),
+        "privileged": bool(host_config.get("Privileged")),
+        "readonly_rootfs": bool(host_config.get("ReadonlyRootfs")),
+        "cap_drop": bool(host_config.get("CapDrop")),
+        "port_bindings": _binding_ips(port_bindings),
+        "policy": policy_version,
+    }
+    # NetworkSettings.Ports is only consulted when there are no PortBindings
+    if not port_bindings:
+        spec["ports"] = _binding_ips((container_attrs.get("NetworkSettings", {}) or {}).get("Ports"))
+
+    payload = json.dumps(spec, sort_keys=True, default=str)
+    return hashlib.blake2b(payload.encode("utf-8"), digest_size=16).hexdigest()
+
+
+class StaticVectorCache:
+    """
+    Bounded LRU cache of static vector results keyed by canonical spec hash.
+    Every container maps to its spec's entry, so replicas are scored once;
+    entries no container references anymore are evicted first.
+    """
+
+    def __init__(self, max_entries: int = SCORE_CACHE_SIZE):
+        self._max_entries = max_entries
+        # fingerprint -> [vectors, refcount]
+        self._entries: "OrderedDict[str, list]" = OrderedDict()
+        self._owners: Dict[str, str] = {}  # container ID -> fingerprint
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _bind(self, container_id: str, fingerprint: str):
+        previous = self._owners.get(container_id)
+        if previous == fingerprint:
+            return
+        if previous is not None:
+            self._release(previous)
+        self._owners[container_id] = fingerprint
+        self._entries[fingerprint][1] += 1
+
+    def _release(self, fingerprint: str):
+        entry = self._entries.get(fingerprint)
+        if entry is not None:
+            entry[1] -= 1
+
+    def _unbind(self, container_id: str):
+        fingerprint = self._owners.pop(container_id, None)
+        if fingerprint is not None:
+            self._release(fingerprint)
+
+    def get(self, container_id: str, fingerprint: str) -> Optional[Dict[str, Tuple[int, str]]]:
+        with self._lock:
+            entry = self._entries.get(fingerprint)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(fingerprint)
+            self._bind(container_id, fingerprint)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, container_id: str, fingerprint: str, vectors: Dict[str, Tuple[int, str]]):
+        with self._lock:
+            if fingerprint not in self._entries:
+                self._entries[fingerprint] = [vectors, 0]
+            self._entries.move_to_end(fingerprint)
+            self._bind(container_id, fingerprint)
+            while len(self._entries) > self._max_entries:
+                self._evict_one()
+
+    def _evict_one(self):
+        # Least recently used unreferenced spec, else the least recently used one
+        victim = next((fp for fp, entry in self._entries.items() if entry[1] <= 0), None)
+        if victim is None:
+            victim = next(iter(self._entries))
+            for cid in [cid for cid, fp in self._owners.items() if fp == victim]:
+                del self._owners[cid]
+        del self._entries[victim]
+        self.evictions += 1
+
+    def evict(self, container_id: str):
+        """Drop a destroyed container's reference to its spec"""
+        with self._lock:
+            self._unbind(container_id)
+
+    def retain(self, container_ids: Iterable[str]):
+        """Drop references of containers that are no longer present"""
+        keep = set(container_ids)
+        with self._lock:
+            for cid in [cid for cid in self._owners if cid not in keep]:
+                self._unbind(cid)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            referenced = sum(1 for entry in self._entries.values() if entry[1] > 0)
+            return {
+                "entries": len(self._entries),
+                "max_entries": self._max_entries,
+                "containers": len(self._owners),
+                "unique_specs": referenced,
+                # Containers per distinct spec (1.0 = no replicas share a spec)
+                "dedup_ratio": round(len(self._owners) / referenced, 2) if referenced else 0.0,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_ratio": round(self.hits / lookups, 3) if lookups else 0.0,
+            }
@@ -0,0 +1,108 @@
+import logging
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from core.aggregates import FleetAggregates, compute_fleet_aggregates
+from core.container_index import ContainerIndex
+
+logger = logging.getLogger(__name__)
+
+# Distinguishes snapshot versions across restarts (the counter starts again at zero)
+BOOT_ID = f"{int(time.time() * 1000):x}"
+
+
+@dataclass(frozen=True)
+class ScanSnapshot:
+    """
+    Immutable view of the scanned fleet.
+    A new snapshot is swapped in with a single reference assignment, so
+    readers always see a consistent (containers, timestamp, aggregates) view without copying.
+    """
+    version: int
+    containers: Tuple[Any, ...]  # Tuple[ContainerInfo, ...]
+    timestamp: float
+    aggregates: FleetAggregates
+    # Per Docker host; hosts without containers are absent
+    host_aggregates: Dict[str, FleetAggregates] = field(default_factory=dict)
+    # ID, name and ID prefix lookups without walking `containers`
+    index: ContainerIndex = field(default_factory=ContainerIndex)
+
+    def aggregates_for(self, host: Optional[str] = None) -> FleetAggregates:
+        """Global aggregates, or those of a single host"""
+        if host is None:
+            return self.aggregates
+        return self.host_aggregates.get(host) or _EMPTY_AGGREGATES
+
+    def find_container(self, container_id: str, host: Optional[str] = None) -> Optional[Any]:
+        """
+        Container by full ID, name or unique ID prefix, optionally on one host.
+        Raises AmbiguousContainerId when several containers match.
+        """
+        return self.index.resolve(container_id, host)
+
+    def containers_for(self, host: Optional[str] = None) -> Tuple[Any, ...]:
+        if host is None:
+            return self.containers
+        return tuple(c for c in self.containers if c.host == host)
+
+
+_EMPTY_AGGREGATES = compute_fleet_aggregates((), 0)
+_EMPTY_SNAPSHOT = ScanSnapshot(version=0, containers=(), timestamp=0, aggregates=_EMPTY_AGGREGATES)
+
+# Readers never lock; writers serialize only to keep versions monotonic
+_current_snapshot = _EMPTY_SNAPSHOT
+_publish_lock = threading.Lock()
+
+# Called as listener(previous, snapshot) in publish order
+_publish_listeners: List[Callable[[ScanSnapshot, ScanSnapshot], None]] = []
+
+
+def get_snapshot() -> ScanSnapshot:
+    """Current snapshot (lock-free read)"""
+    return _current_snapshot
+
+
+def publish_snapshot(containers) -> ScanSnapshot:
+    """Publish a new snapshot with the next version number, its fleet aggregates and ID index"""
+    global _current_snapshot
+    containers = tuple(containers)
+    timestamp = time.time()
+    aggregates = compute_fleet_aggregates(containers, timestamp)
+
+    by_host: Dict[str, List[Any]] = {}
+    for c in containers:
+        by_host.setdefault(c.host, []).append(c)
+    if len(by_host) == 1:
+        host_aggregates = {host: aggregates for host in by_host}
+    else:
+        host_aggregates = {host: compute_fleet_aggregates(members, timestamp) for host, members in by_host.items()}
+
+    index = ContainerIndex(containers)
+
+    with _publish_lock:
+        snapshot = ScanSnapshot(
+            version=_current_snapshot.version + 1,
+            containers=containers,
+            timestamp=timestamp,
+            aggregates=aggregates,
+            host_aggregates=host_aggregates,
+            index=index,
+        )
+        previous, _current_snapshot = _current_snapshot, snapshot
+        for listener in _publish_listeners:
+            try:
+                listener(previous, snapshot)
+            except Exception as e:
+                logger.error(f"Snapshot listener failed: {e}")
+    return snapshot
+
+
+def add_publish_listener(listener: Callable[[ScanSnapshot, ScanSnapshot], None]):
+    """Register a callback run (under the publish lock) for every new snapshot"""
+    _publish_listeners.append(listener)
+
+
+def changed_since(version: int) -> bool:
+    """Cheap check whether anything was published after `version`"""
+    return _current_snapshot.version != version
@@ -0,0 +1,239 @@
+import asyncio
+import logging
+import os
+import threading
+import time
+from collections import deque
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional
+
+from core.async_docker import AsyncDockerClient, DockerAPIError, DockerStreamError, DockerUnavailable, _resolve_endpoint
+from core.risk_engine import resource_usage
+
+logger = logging.getLogger(__name__)
+
+# Samples kept per container (the daemon streams about one per second);
+# scoring sees CPU percent averaged over the window
+STATS_WINDOW = int(os.getenv("SENTINEL_STATS_WINDOW", "30"))
+# A streamed payload older than this is not used; the scanner falls back to a one-shot call
+STATS_MAX_AGE = float(os.getenv("SENTINEL_STATS_MAX_AGE", "10"))
+# Delay before reopening a stream that failed while its container still runs
+STREAM_RETRY_DELAY = 5
+
+
+class ResourceSample(NamedTuple):
+    """One point of a container's resource window (rates are per second)"""
+    ts: float
+    cpu_percent: float
+    memory_usage: int
+    memory_limit: int
+    memory_percent: float
+    net_rx_rate: float
+    net_tx_rate: float
+    blk_read_rate: float
+    blk_write_rate: float
+    # Cumulative CPU counters (ns), for averages over any span of the window
+    cpu_total: int
+    system_cpu: int
+
+
+def _io_counters(stats: Dict[str, Any]) -> tuple:
+    """Cumulative (net rx, net tx, block read, block write) bytes from a stats payload"""
+    rx = tx = 0
+    for network in (stats.get("networks") or {}).values():
+        rx += network.get("rx_bytes", 0)
+        tx += network.get("tx_bytes", 0)
+    read = write = 0
+    for entry in (stats.get("blkio_stats") or {}).get("io_service_bytes_recursive") or ():
+        op = (entry.get("op") or "").lower()
+        if op == "read":
+            read += entry.get("value", 0)
+        elif op == "write":
+            write += entry.get("value", 0)
+    return rx, tx, read, write
+
+
+class _Window:
+    __slots__ = ("payload", "received", "samples", "_counters")
+
+    def __init__(self):
+        self.payload: Optional[Dict[str, Any]] = None
+        self.received = 0.0
+        self.samples: deque = deque(maxlen=STATS_WINDOW)
+        self._counters = None
+
+    def add(self, stats: Dict[str, Any], now: float):
+        memory_usage, cpu_percent = resource_usage(stats)
+        memory_limit = (stats.get("memory_stats") or {}).get("limit", 0) or 0
+        counters = _io_counters(stats)
+        cpu_stats = stats.get("cpu_stats") or {}
+        rates = (0.0, 0.0, 0.0, 0.0)
+        if self._counters is not None and self.samples:
+            elapsed = now - self.samples[-1].ts
+            if elapsed > 0:
+                # Counters reset when the container restarts
+                rates = tuple(max(c - p, 0) / elapsed for c, p in zip(counters, self._counters))
+        self._counters = counters
+        self.payload = stats
+        self.received = now
+        self.samples.append(ResourceSample(
+            now,
+            cpu_percent,
+            memory_usage,
+            memory_limit,
+            round(memory_usage / memory_limit * 100, 2) if memory_limit else 0.0,
+            *rates,
+            (cpu_stats.get("cpu_usage") or {}).get("total_usage", 0),
+            cpu_stats.get("system_cpu_usage", 0),
+        ))
+
+    def smoothed(self) -> Optional[Dict[str, Any]]:
+        """
+        Latest payload with precpu_stats taken from the oldest usable sample,
+        so CPU percent is averaged over the window instead of the last second
+        """
+        if self.payload is None or len(self.samples) < 2:
+            return self.payload
+        latest = base = self.samples[-1]
+        for sample in reversed(self.samples):
+            # Counters reset when the container restarts: stop at the reset
+            if sample.cpu_total > base.cpu_total or sample.system_cpu > base.system_cpu:
+                break
+            base = sample
+        if base.system_cpu >= latest.system_cpu:
+            return self.payload
+        precpu_stats = {"cpu_usage": {"total_usage": base.cpu_total}, "system_cpu_usage": base.system_cpu}
+        return {**self.payload, "precpu_stats": precpu_stats}
+
+
+class StatsSampler:
+    """
+    Background stats sampler for one Docker host.
+    Keeps one streaming stats connection per running container, all
+    multiplexed on a private event loop thread, and folds each payload into
+    a small rolling window. The scanner reads the latest payload, with CPU
+    averaged over the window, instantly instead of paying for a blocking
+    one-shot stats call per container.
+    """
+
+    def __init__(self, host: str):
+        self.host = host
+        self._windows: Dict[str, _Window] = {}
+        self._streams: Dict[str, Any] = {}  # container ID -> concurrent future
+        self._lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self.samples_received = 0
+        self.stream_errors = 0
+
+    @property
+    def supported(self) -> bool:
+        """Streaming needs a transport the async client speaks natively"""
+        return _resolve_endpoint(self.host) is not None
+
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        if self._loop is None:
+            self._loop = asyncio.new_event_loop()
+            self._thread = threading.Thread(
+                target=self._loop.run_forever, daemon=True, name=f"stats-sampler-{self.host}"
+            )
+            self._thread.start()
+        return self._loop
+
+    # ─── STREAM MANAGEMENT ───────────────────────────
+
+    def track(self, container_id: str):
+        """Start streaming a running container's stats (no-op if already streaming)"""
+        with self._lock:
+            if container_id in self._streams:
+                return
+            loop = self._ensure_loop()
+            self._windows.setdefault(container_id, _Window())
+            future = asyncio.run_coroutine_threadsafe(self._follow(container_id), loop)
+            self._streams[container_id] = future
+        future.add_done_callback(lambda f: self._stream_done(container_id, f))
+
+    def _stream_done(self, container_id: str, future):
+        # Frees the slot so the container is streamed again after a restart
+        with self._lock:
+            if self._streams.get(container_id) is future:
+                del self._streams[container_id]
+
+    def untrack(self, container_id: str):
+        """Stop streaming a container and drop its window"""
+        with self._lock:
+            future = self._streams.pop(container_id, None)
+            self._windows.pop(container_id, None)
+        if future is not None:
+            future.cancel()
+
+    def sync(self, running_ids: Iterable[str]):
+        """Stream exactly the given running containers"""
+        if not self.supported:
+            return
+        running = set(running_ids)
+        for container_id in [cid for cid in list(self._windows) if cid not in running]:
+            self.untrack(container_id)
+        for container_id in running:
+            self.track(container_id)
+
+    async def _follow(self, container_id: str):
+        client = AsyncDockerClient(self.host)
+        # untrack() drops the window
+        while container_id in self._windows:
+            try:
+                async for stats in client.container_stats(container_id):
+                    window = self._windows.get(container_id)
+                    if window is None:
+                        return
+                    window.add(stats, time.time())
+                    self.samples_received += 1
+                # Stream ended: the container stopped
+                break
+            except asyncio.CancelledError:
+                raise
+            except (DockerUnavailable, DockerStreamError, DockerAPIError) as e:
+                self.stream_errors += 1
+                logger.debug(f"Stats stream for {container_id[:12]} on {self.host} failed: {e}")
+                if getattr(e, "status", None) == 404:
+                    break
+            except Exception as e:
+                self.stream_errors += 1
+                logger.warning(f"Stats stream for {container_id[:12]} on {self.host} failed: {e}")
+            await asyncio.sleep(STREAM_RETRY_DELAY)
+
+    # ─── READS ───────────────────────────
+
+    def latest_stats(self, container_id: str, max_age: float = STATS_MAX_AGE) -> Optional[Dict[str, Any]]:
+        """
+        Most recent streamed stats payload with CPU smoothed over the window,
+        or None when missing or older than max_age
+        """
+        window = self._windows.get(container_id)
+        if window is None or window.payload is None or time.time() - window.received > max_age:
+            return None
+        return window.smoothed()
+
+    def window(self, container_id: str) -> List[ResourceSample]:
+        """Rolling resource samples for a container (oldest first)"""
+        window = self._windows.get(container_id)
+        return list(window.samples) if window is not None else []
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "supported": self.supported,
+            "streams": len(self._streams),
+            "samples_received": self.samples_received,
+            "stream_errors": self.stream_errors,
+            "window": STATS_WINDOW,
+        }
+
+    def stop(self):
+        with self._lock:
+            futures = list(self._streams.values())
+            self._streams.clear()
+            self._windows.clear()
+        for future in futures:
+            future.cancel()
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._loop = None
@@ -0,0 +1,223 @@
+import asyncio
+import json
+import logging
+import os
+import threading
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Set, Tuple
+
+from core.event_logger import logger_instance as audit_logger
+from core.snapshot import BOOT_ID, ScanSnapshot, add_publish_listener, get_snapshot
+
+logger = logging.getLogger(__name__)
+
+# Delta frames kept for resume-from-version
+STREAM_HISTORY = int(os.getenv("SENTINEL_STREAM_HISTORY", "256"))
+# Frames buffered per client before it is considered lagging
+STREAM_QUEUE_SIZE = int(os.getenv("SENTINEL_STREAM_QUEUE_SIZE", "64"))
+STREAM_KEEPALIVE = 15
+
+
+def _container_key(container) -> str:
+    # Short IDs are only unique per Docker host
+    return f"{container.host}/{container.id}"
+
+
+def _score_key(container) -> Tuple[Any, ...]:
+    # trust_details carries a per-scan timestamp, so compare the scored fields only
+    return (
+        container.trust_score,
+        container.status,
+        container.threat_level,
+        container.is_sanctioned,
+        container.name,
+        container.image,
+    )
+
+
+def _sse_frame(event: str, version: int, data: Dict[str, Any]) -> str:
+    return f"id: {event_id(version)}\nevent: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+def event_id(version: int) -> str:
+    """SSE event id: the snapshot version, tagged with this process's boot ID"""
+    return f"{BOOT_ID}-{version}"
+
+
+def parse_event_id(value: str) -> Optional[int]:
+    """Snapshot version of an event id from this process, None for other boots or garbage"""
+    boot, _, version = value.rpartition("-")
+    if boot != BOOT_ID or not version.isdigit():
+        return None
+    return int(version)
+
+
+def compute_delta(previous: ScanSnapshot, snapshot: ScanSnapshot, audit_entries: List[Dict]) -> Optional[Dict[str, Any]]:
+    """Containers added/removed/re-scored, new alerts and audit entries between two snapshots"""
+    before = {_container_key(c): c for c in previous.containers}
+    added, rescored = [], []
+    seen = set()
+    for c in snapshot.containers:
+        key = _container_key(c)
+        seen.add(key)
+        old = before.get(key)
+        if old is None:
+            added.append(c.model_dump())
+        elif _score_key(old) != _score_key(c):
+            rescored.append(c.model_dump())
+    removed = [key for key in before if key not in seen]
+
+    # Alert IDs are positional, so identify alerts by (container, severity)
+    old_alerts = {(a["container_id"], a["severity"]) for a in previous.aggregates.alerts}
+    new_alerts = [a for a in snapshot.aggregates.alerts if (a["container_id"], a["severity"]) not in old_alerts]
+
+    if not (added or removed or rescored or new_alerts or audit_entries):
+        return None
+
+    return {
+        "version": snapshot.version,
+        "previous_version": previous.version,
+        "timestamp": snapshot.timestamp,
+        "added": added,
+        "removed": removed,
+        "rescored": rescored,
+        "alerts": new_alerts,
+        "audit": audit_entries,
+    }
+
+
+class _Subscriber:
+    def __init__(self, loop: asyncio.AbstractEventLoop):
+        self.loop = loop
+        self.queue: "asyncio.Queue[Tuple[int, str]]" = asyncio.Queue(maxsize=STREAM_QUEUE_SIZE)
+        self.lagging = False
+
+    def offer(self, version: int, frame: str):
+        """Runs on the subscriber's event loop"""
+        if self.lagging:
+            return
+        try:
+            self.queue.put_nowait((version, frame))
+        except asyncio.QueueFull:
+            # Slow client: stop buffering, it will be resynced with a full snapshot
+            self.lagging = True
+
+
+class SnapshotBroadcaster:
+    """
+    Fans snapshot deltas out to streaming clients with singleton pattern.
+    Each delta is computed and serialized once per snapshot, then shared by all subscribers.
+    """
+    _instance = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super(SnapshotBroadcaster, cls).__new__(cls)
+            cls._instance._initialize()
+        return cls._instance
+
+    def _initialize(self):
+        self._history: Deque[Tuple[int, str]] = deque(maxlen=STREAM_HISTORY)
+        self._subscribers: Set[_Subscriber] = set()
+        self._lock = threading.Lock()
+        self._audit_version = audit_logger.version
+        self._snapshot_frame: Optional[Tuple[int, str]] = None
+        add_publish_listener(self._on_publish)
+
+    def _on_publish(self, previous: ScanSnapshot, snapshot: ScanSnapshot):
+        # Entries and version read together, so nothing logged in between is sent twice
+        audit_entries, self._audit_version = audit_logger.changes_since(self._audit_version)
+
+        delta = compute_delta(previous, snapshot, audit_entries)
+        if delta is None:
+            return
+        frame = _sse_frame("delta", snapshot.version, delta)
+
+        with self._lock:
+            self._history.append((snapshot.version, frame))
+            subscribers = list(self._subscribers)
+        for sub in subscribers:
+            try:
+                sub.loop.call_soon_threadsafe(sub.offer, snapshot.version, frame)
+            except RuntimeError:
+                # Event loop already closed
+                self.unsubscribe(sub)
+
+    def snapshot_frame(self) -> Tuple[int, str]:
+        """Full-state frame for new or resyncing clients (serialized once per version)"""
+        snapshot = get_snapshot()
+        cached = self._snapshot_frame
+        if cached is not None and cached[0] == snapshot.version:
+            return cached
+        frame = _sse_frame("snapshot", snapshot.version, {
+            "version": snapshot.version,
+            "timestamp": snapshot.timestamp,
+            "containers": [c.model_dump() for c in snapshot.containers],
+            "alerts": snapshot.aggregates.alerts,
+        })
+        self._snapshot_frame = (snapshot.version, frame)
+        return self._snapshot_frame
+
+    def replay_since(self, version: int) -> Optional[List[Tuple[int, str]]]:
+        """Frames after `version`, or None if history no longer reaches back that far"""
+        current = get_snapshot().version
+        if version > current:
+            # Not a version of this process (e.g. from before a restart)
+            return None
+        if version == current:
+            return []
+        with self._lock:
+            history = list(self._history)
+        if not history or history[0][0] > version + 1:
+            return None
+        return [(v, frame) for v, frame in history if v > version]
+
+    def subscribe(self) -> _Subscriber:
+        sub = _Subscriber(asyncio.get_running_loop())
+        with self._lock:
+            self._subscribers.add(sub)
+        return sub
+
+    def unsubscribe(self, sub: _Subscriber):
+        with self._lock:
+            self._subscribers.discard(sub)
+
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
+
+    async def stream(self, since: Optional[int] = None):
+        """SSE generator: resume from `since` when possible, then follow live deltas"""
+        sub = self.subscribe()
+        try:
+            # Registered before replaying, so nothing published in between is lost
+            frames = self.replay_since(since) if since is not None else None
+            last_version = since or 0
+            if frames is None:
+                # Resync: the snapshot's version, not the client's, is the baseline
+                frames = [self.snapshot_frame()]
+                last_version = 0
+            for version, frame in frames:
+                last_version = max(last_version, version)
+                yield frame
+
+            while True:
+                if sub.lagging:
+                    # Drop the backlog and resync from the current state
+                    while not sub.queue.empty():
+                        sub.queue.get_nowait()
+                    sub.lagging = False
+                    version, frame = self.snapshot_frame()
+                    last_version = version
+                    yield frame
+                    continue
+                try:
+                    version, frame = await asyncio.wait_for(sub.queue.get(), timeout=STREAM_KEEPALIVE)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                if version <= last_version:
+                    continue
+                last_version = version
+                yield frame
+        finally:
+            self.unsubscribe(sub)
@@ -0,0 +1,268 @@
+import os
+import threading
+import time
+from array import array
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+# Per-container metrics recorded at every scan
+CONTAINER_FIELDS = ("trust", "identity", "configuration", "network", "resources", "memory", "cpu")
+# Fleet-wide metrics recorded at every scan
+FLEET_FIELDS = ("trust", "min_trust", "containers", "running", "shadow_ai", "memory", "cpu")
+FLEET_KEY = "__fleet__"
+# Fleet metrics of a single Docker host (for host-scoped views)
+HOST_KEY_PREFIX = "__host__:"
+
+
+def host_key(host: str) -> str:
+    return HOST_KEY_PREFIX + host
+
+# (name, bucket seconds, retention seconds); raw keeps every scan point
+RESOLUTIONS = (
+    ("raw", 0, 6 * 3600),
+    ("1m", 60, 24 * 3600),
+    ("1h", 3600, 30 * 86400),
+    ("1d", 86400, 365 * 86400),
+)
+RAW_CAPACITY = int(os.getenv("SENTINEL_TS_RAW_POINTS", "720"))
+MAX_SERIES = int(os.getenv("SENTINEL_TS_MAX_SERIES", "10000"))
+# Auto resolution picks the finest tier returning at most this many points
+MAX_QUERY_POINTS = 500
+# Slots a ring starts with; it doubles on demand up to its capacity
+RING_INITIAL_SLOTS = 16
+
+
+class _Ring:
+    """
+    Bounded columnar ring: one float64 timestamp array plus one float32 array per field.
+    Storage starts small and doubles until `capacity`, so short-lived series stay cheap.
+    """
+
+    def __init__(self, fields: Sequence[str], capacity: int):
+        self.capacity = capacity
+        self.size = min(RING_INITIAL_SLOTS, capacity)  # allocated slots
+        self.ts = array("d", bytes(8 * self.size))
+        self.columns = {f: array("f", bytes(4 * self.size)) for f in fields}
+        self.head = 0  # next write slot
+        self.count = 0
+
+    def _grow(self):
+        # Only called before the first wrap, so points already sit in slots 0..count-1
+        extra = min(self.size * 2, self.capacity) - self.size
+        self.ts.extend(array("d", bytes(8 * extra)))
+        for column in self.columns.values():
+            column.extend(array("f", bytes(4 * extra)))
+        self.size += extra
+        self.head = self.count
+
+    def append(self, ts: float, values: Sequence[float]):
+        if self.count == self.size < self.capacity:
+            self._grow()
+        slot = self.head
+        self.ts[slot] = ts
+        for column, value in zip(self.columns.values(), values):
+            column[slot] = value
+        self.head = (slot + 1) % self.size
+        self.count = min(self.count + 1, self.size)
+
+    def _slot(self, i: int) -> int:
+        """Physical slot of the i-th oldest point"""
+        return (self.head - self.count + i) % self.size
+
+    def last_ts(self) -> float:
+        return self.ts[self._slot(self.count - 1)] if self.count else 0.0
+
+    def _lower_bound(self, ts: float) -> int:
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self.ts[self._slot(mid)] < ts:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def range(self, since: float, until: float, fields: Sequence[str]) -> Dict[str, List[float]]:
+        start, end = self._lower_bound(since), self._lower_bound(until + 1e-6)
+        slots = [self._slot(i) for i in range(start, end)]
+        out = {"ts": [self.ts[s] for s in slots]}
+        for f in fields:
+            column = self.columns[f]
+            out[f] = [round(column[s], 3) for s in slots]
+        return out
+
+
+class _Series:
+    """One metric series: raw ring plus mean rollups per resolution"""
+
+    def __init__(self, fields: Sequence[str]):
+        self.fields = tuple(fields)
+        self.rings: Dict[str, _Ring] = {}
+        # Open bucket per rollup: [bucket_start, count, sums]
+        self.pending: Dict[str, list] = {}
+        for name, step, retention in RESOLUTIONS:
+            capacity = RAW_CAPACITY if step == 0 else max(retention // step, 1)
+            self.rings[name] = _Ring(self.fields, capacity)
+            if step:
+                self.pending[name] = [None, 0, [0.0] * len(self.fields)]
+
+    def append(self, ts: float, values: Sequence[float]):
+        # Rings are binary-searched and rollups close on a bucket change, so
+        # timestamps must never go backwards: a late point takes the last timestamp
+        ts = max(ts, self.last_ts())
+        self.rings["raw"].append(ts, values)
+        for name, step, _ in RESOLUTIONS:
+            if not step:
+                continue
+            bucket = ts - ts % step
+            acc = self.pending[name]
+            if acc[0] is not None and acc[0] != bucket and acc[1]:
+                self.rings[name].append(acc[0], [total / acc[1] for total in acc[2]])
+                acc[1], acc[2] = 0, [0.0] * len(self.fields)
+            acc[0] = bucket
+            acc[1] += 1
+            acc[2] = [total + v for total, v in zip(acc[2], values)]
+
+    def last_ts(self) -> float:
+        return self.rings["raw"].last_ts()
+
+    def query(self, resolution: str, since: float, until: float, fields: Sequence[str]) -> Dict[str, List[float]]:
+        out = self.rings[resolution].range(since, until, fields)
+        acc = self.pending.get(resolution)
+        # Include the still-open bucket so the newest data is visible
+        if acc and acc[1] and since <= acc[0] <= until:
+            out["ts"].append(acc[0])
+            for f in fields:
+                out[f].append(round(acc[2][self.fields.index(f)] / acc[1], 3))
+        return out
+
+
+def _fleet_values(aggregates, containers) -> List[float]:
+    return [
+        aggregates.average_trust_score,
+        aggregates.min_trust_score,
+        aggregates.total_containers,
+        aggregates.running_count,
+        aggregates.shadow_ai_count,
+        sum(c.memory_usage for c in containers),
+        sum(c.cpu_percent for c in containers),
+    ]
+
+
+def _container_values(container) -> List[float]:
+    vectors = (container.trust_details or {}).get("vectors", {})
+    return [
+        container.trust_score,
+        vectors.get("identity", {}).get("score", 0),
+        vectors.get("configuration", {}).get("score", 0),
+        vectors.get("network", {}).get("score", 0),
+        vectors.get("resources", {}).get("score", 0),
+        container.memory_usage,
+        container.cpu_percent,
+    ]
+
+
+class TimeSeriesStore:
+    """
+    Embedded time-series store with singleton pattern.
+    Records per-container and fleet metrics at every scan with raw -> 1m -> 1h -> 1d rollups.
+    """
+    _instance = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super(TimeSeriesStore, cls).__new__(cls)
+            cls._instance._initialize()
+        return cls._instance
+
+    def _initialize(self):
+        self._series: Dict[str, _Series] = {FLEET_KEY: _Series(FLEET_FIELDS)}
+        self._lock = threading.Lock()
+
+    def record(self, snapshot, containers: Optional[Iterable[Any]] = None, ts: Optional[float] = None):
+        """
+        Record fleet metrics from `snapshot` plus a point for each of `containers`
+        (all containers in the snapshot when None)
+        """
+        ts = ts or snapshot.timestamp or time.time()
+        if containers is None:
+            containers = snapshot.containers
+        by_host: Dict[str, List[Any]] = {}
+        for c in snapshot.containers:
+            by_host.setdefault(c.host, []).append(c)
+        with self._lock:
+            self._series[FLEET_KEY].append(ts, _fleet_values(snapshot.aggregates, snapshot.containers))
+            for host, aggregates in snapshot.host_aggregates.items():
+                key = host_key(host)
+                series = self._series.get(key)
+                if series is None:
+                    series = self._series[key] = _Series(FLEET_FIELDS)
+                series.append(ts, _fleet_values(aggregates, by_host.get(host, ())))
+            for c in containers:
+                series = self._series.get(c.id)
+                if series is None:
+                    if len(self._series) > MAX_SERIES:
+                        self._prune(ts)
+                    series = self._series[c.id] = _Series(CONTAINER_FIELDS)
+                series.append(ts, _container_values(c))
+
+    def _prune(self, now: float):
+        """Drop the series of containers not seen for longer than the longest retention"""
+        horizon = now - RESOLUTIONS[-1][2]
+        containers = [k for k in self._series if k != FLEET_KEY and not k.startswith(HOST_KEY_PREFIX)]
+        stale = [k for k in containers if self._series[k].last_ts() < horizon]
+        if not stale:
+            # Still full: evict the least recently updated series
+            stale = sorted(containers, key=lambda k: self._series[k].last_ts())[: max(len(self._series) // 10, 1)]
+        for k in stale:
+            del self._series[k]
+
+    def query(
+        self,
+        key: str = FLEET_KEY,
+        since: Optional[float] = None,
+        until: Optional[float] = None,
+        resolution: Optional[str] = None,
+        fields: Optional[Sequence[str]] = None,
+    ) -> Optional[Dict[str, Any]]:
+        """Columnar points for one series; picks the coarsest-needed tier when resolution is None"""
+        until = until or time.time()
+        since = since if since is not None else until - 3600
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                return None
+            fields = [f for f in (fields or series.fields) if f in series.fields]
+            if resolution is None:
+                resolution = _auto_resolution(since, until)
+            points = series.query(resolution, since, until, fields)
+        return {"resolution": resolution, "since": since, "until": until, "fields": fields, "points": points}
+
+    def daily_burn(self, days: int, hourly_cost: float, host: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Daily cost from the 1d rollup of running containers (fleet-wide, or one host's)"""
+        now = time.time()
+        key = FLEET_KEY if host is None else host_key(host)
+        result = self.query(key, since=now - days * 86400, until=now, resolution="1d", fields=["running"])
+        if result is None:
+            return []
+        points = result["points"]
+        burn = []
+        for ts, running in zip(points["ts"], points["running"]):
+            cost = running * hourly_cost * 24
+            burn.append({
+                "date": time.strftime("%Y-%m-%d", time.gmtime(ts)),
+                "cost": int(cost),
+                "optimized": int(cost * 0.8),
+            })
+        return burn
+
+
+def _auto_resolution(since: float, until: float) -> str:
+    span = max(until - since, 0)
+    now = time.time()
+    for name, step, retention in RESOLUTIONS:
+        if since < now - retention:
+            continue
+        expected = span / step if step else span / 30
+        if expected <= MAX_QUERY_POINTS:
+            return name
+    return RESOLUTIONS[-1][0]
@@ -0,0 +1,78 @@
+import json
+from datetime import datetime
+from typing import Any, Dict, Tuple
+
+# Append-only audit table; seq is the logger's monotonic sequence ID
+AUDIT_LOG_SCHEMA = """
+CREATE TABLE IF NOT EXISTS audit_log (
+    seq INTEGER PRIMARY KEY,
+    id TEXT NOT NULL,
+    ts REAL NOT NULL,
+    timestamp TEXT NOT NULL,
+    agent_name TEXT,
+    action TEXT,
+    status TEXT,
+    details TEXT,
+    tool TEXT,
+    duration INTEGER,
+    container_id TEXT,
+    trust_score_change TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_audit_log_ts ON audit_log (ts);
+CREATE INDEX IF NOT EXISTS idx_audit_log_container ON audit_log (container_id, seq);
+CREATE INDEX IF NOT EXISTS idx_audit_log_action ON audit_log (action, seq);
+CREATE INDEX IF NOT EXISTS idx_audit_log_status ON audit_log (status, seq);
+CREATE INDEX IF NOT EXISTS idx_audit_log_agent ON audit_log (agent_name, seq);
+"""
+
+# Entry field -> indexed column, for filtered queries
+AUDIT_LOG_FILTER_COLUMNS = {
+    "container_id": "container_id",
+    "action": "action",
+    "status": "status",
+    "agentName": "agent_name",
+}
+
+AUDIT_LOG_COLUMNS = (
+    "seq", "id", "ts", "timestamp", "agent_name", "action", "status",
+    "details", "tool", "duration", "container_id", "trust_score_change",
+)
+
+
+def entry_to_row(entry: Dict[str, Any]) -> Tuple[Any, ...]:
+    """Audit log entry dict -> audit_log row"""
+    change = entry.get("trust_score_change")
+    return (
+        entry["seq"],
+        entry["id"],
+        entry.get("ts") or datetime.fromisoformat(entry["timestamp"]).timestamp(),
+        entry["timestamp"],
+        entry.get("agentName"),
+        entry.get("action"),
+        entry.get("status"),
+        entry.get("details"),
+        entry.get("tool"),
+        entry.get("duration", 0),
+        entry.get("container_id"),
+        json.dumps(change) if change is not None else None,
+    )
+
+
+def row_to_entry(row: Tuple[Any, ...]) -> Dict[str, Any]:
+    """audit_log row -> audit log entry dict (same shape InMemoryLogger produces)"""
+    (seq, id_, ts, timestamp, agent_name, action, status,
+     details, tool, duration, container_id, change) = row
+    return {
+        "id": id_,
+        "seq": seq,
+        "ts": ts,
+        "timestamp": timestamp,
+        "agentName": agent_name,
+        "action": action,
+        "status": status,
+        "details": details,
+        "tool": tool,
+        "duration": duration,
+        "container_id": container_id,
+        "trust_score_change": json.loads(change) if change else None,
+    }
@@ -0,0 +1,205 @@
+import logging
+import os
+import queue
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from db.models import AUDIT_LOG_COLUMNS, AUDIT_LOG_FILTER_COLUMNS, AUDIT_LOG_SCHEMA, entry_to_row, row_to_entry
+
+logger = logging.getLogger(__name__)
+
+# Empty string disables persistence
+AUDIT_DB_PATH = os.getenv(
+    "SENTINEL_AUDIT_DB",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "audit.db"),
+)
+AUDIT_RETENTION_DAYS = float(os.getenv("SENTINEL_AUDIT_RETENTION_DAYS", "90"))
+AUDIT_MAX_ROWS = int(os.getenv("SENTINEL_AUDIT_MAX_ROWS", "5000000"))
+
+# Group commit: flush every FLUSH_INTERVAL seconds or BATCH_SIZE entries
+FLUSH_INTERVAL = 0.2
+BATCH_SIZE = 500
+COMPACT_INTERVAL = 3600
+# Longest a reader waits for queued entries to be committed before reading the store
+COMMIT_WAIT_TIMEOUT = 5
+
+_SELECT = f"SELECT {', '.join(AUDIT_LOG_COLUMNS)} FROM audit_log"
+_INSERT = (
+    f"INSERT OR REPLACE INTO audit_log ({', '.join(AUDIT_LOG_COLUMNS)}) "
+    f"VALUES ({', '.join('?' for _ in AUDIT_LOG_COLUMNS)})"
+)
+
+
+class AuditStore:
+    """
+    Durable append-only audit log in SQLite (WAL mode).
+    Writes are queued and group-committed by a background thread, off the request path.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+
+        self._read_conn = self._open()
+        self._read_conn.executescript(AUDIT_LOG_SCHEMA)
+        self._read_lock = threading.Lock()
+
+        # Highest sequence ID known to be on disk; readers wait on it instead of the whole queue
+        self._committed_seq = self.max_seq()
+        self._committed = threading.Condition()
+        self.commits = 0
+
+        self._queue: "queue.Queue[Optional[Dict[str, Any]]]" = queue.Queue()
+        self._writer = threading.Thread(target=self._write_loop, name="audit-writer", daemon=True)
+        self._writer.start()
+
+    def _open(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+        return conn
+
+    # ─── WRITES ───────────────────────────
+
+    def append(self, entry: Dict[str, Any]):
+        """
+        Queue an entry for the next group commit (never blocks on disk).
+        Entries must be queued in sequence order.
+        """
+        self._queue.put(entry)
+
+    def append_many(self, entries: List[Dict[str, Any]]):
+        """Queue several entries as one item; they land in the same commit"""
+        if entries:
+            self._queue.put(list(entries))
+
+    def _write_loop(self):
+        conn = self._open()
+        # Retention runs at startup too: dev servers restart long before COMPACT_INTERVAL
+        self._compact(conn)
+        last_compact = time.monotonic()
+        running = True
+        while running:
+            batch = []
+            taken = 0
+            try:
+                item = self._queue.get(timeout=FLUSH_INTERVAL)
+                taken += 1
+                while item is not None:
+                    if isinstance(item, list):
+                        batch.extend(item)
+                    else:
+                        batch.append(item)
+                    if len(batch) >= BATCH_SIZE:
+                        break
+                    item = self._queue.get_nowait()
+                    taken += 1
+                running = item is not None
+            except queue.Empty:
+                pass
+
+            if batch:
+                try:
+                    with conn:
+                        conn.executemany(_INSERT, [entry_to_row(e) for e in batch])
+                    self.commits += 1
+                except Exception as e:
+                    logger.error(f"Failed to persist {len(batch)} audit entries: {e}")
+                # Advanced on failure too, so readers never wait on a lost batch
+                with self._committed:
+                    self._committed_seq = max(self._committed_seq, max(e["seq"] for e in batch))
+                    self._committed.notify_all()
+            for _ in range(taken):
+                self._queue.task_done()
+
+            if time.monotonic() - last_compact > COMPACT_INTERVAL:
+                self._compact(conn)
+                last_compact = time.monotonic()
+        conn.close()
+
+    def _compact(self, conn: sqlite3.Connection):
+        """Apply age and size retention, then reclaim space"""
+        try:
+            with conn:
+                cutoff = time.time() - AUDIT_RETENTION_DAYS * 86400
+                conn.execute("DELETE FROM audit_log WHERE ts < ?", (cutoff,))
+                conn.execute(
+                    "DELETE FROM audit_log WHERE seq <= (SELECT MAX(seq) FROM audit_log) - ?",
+                    (AUDIT_MAX_ROWS,),
+                )
+            conn.execute("PRAGMA incremental_vacuum")
+            conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        except Exception as e:
+            logger.error(f"Audit log compaction failed: {e}")
+
+    def flush(self):
+        """Block until everything queued so far is committed"""
+        self._queue.join()
+
+    def wait_committed(self, seq: int, timeout: float = COMMIT_WAIT_TIMEOUT) -> bool:
+        """
+        Block until entries up to `seq` are committed. Unlike flush(), later
+        writes do not extend the wait. Returns False on timeout.
+        """
+        with self._committed:
+            return self._committed.wait_for(lambda: self._committed_seq >= seq, timeout)
+
+    def close(self):
+        self._queue.put(None)
+        self._writer.join(timeout=5)
+        with self._read_lock:
+            self._read_conn.close()
+
+    # ─── READS ───────────────────────────
+
+    def _query(self, sql: str, params=()) -> List[Dict[str, Any]]:
+        with self._read_lock:
+            rows = self._read_conn.execute(sql, params).fetchall()
+        return [row_to_entry(row) for row in rows]
+
+    def load_recent(self, limit: int) -> List[Dict[str, Any]]:
+        """Latest `limit` entries, oldest first (for replay into memory)"""
+        entries = self._query(f"{_SELECT} ORDER BY seq DESC LIMIT ?", (limit,))
+        entries.reverse()
+        return entries
+
+    def max_seq(self) -> int:
+        with self._read_lock:
+            row = self._read_conn.execute("SELECT MAX(seq) FROM audit_log").fetchone()
+        return row[0] or 0
+
+    def query(
+        self,
+        before: int,
+        limit: int,
+        since: Optional[float] = None,
+        until: Optional[float] = None,
+        filters: Optional[Dict[str, Any]] = None,
+    ) -> List[Dict[str, Any]]:
+        """Entries with seq < before matching the filters, newest first"""
+        clauses, params = ["seq < ?"], [before]
+        for field, value in (filters or {}).items():
+            clauses.append(f"{AUDIT_LOG_FILTER_COLUMNS[field]} = ?")
+            params.append(value)
+        if since is not None:
+            clauses.append("ts >= ?")
+            params.append(since)
+        if until is not None:
+            clauses.append("ts <= ?")
+            params.append(until)
+        params.append(limit)
+        return self._query(f"{_SELECT} WHERE {' AND '.join(clauses)} ORDER BY seq DESC LIMIT ?", params)
+
+
+def open_audit_store() -> Optional[AuditStore]:
+    """Open the configured audit store, or None when persistence is disabled/unavailable"""
+    if not AUDIT_DB_PATH:
+        return None
+    try:
+        return AuditStore(AUDIT_DB_PATH)
+    except Exception as e:
+        logger.error(f"Audit log persistence disabled, could not open {AUDIT_DB_PATH}: {e}")
+        return None
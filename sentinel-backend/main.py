@@ -1,10 +1,30 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from api.v1 import discovery, governance, observability, security
-from core.scanner import start_background_scanning
+from api.v1 import discovery, governance, observability, security, stream
+from api.conditional import ConditionalGetMiddleware
+from core.scanner import DockerScanner, start_background_scanning
+from core.event_logger import logger_instance
+from core.stream import SnapshotBroadcaster
+from core.policy_mapper import PolicyManager
 
 app = FastAPI(title="Archestra Sentinel Brain")
 
+# Conditional GETs keyed to the scan snapshot + audit log versions.
+# Added before CORS so 304 responses still get CORS headers.
+# Docker/scanner status is live state not covered by those versions.
+app.add_middleware(
+    ConditionalGetMiddleware,
+    prefix="/api/v1",
+    exclude=(
+        "/api/v1/system/docker",
+        "/api/v1/system/scanner",
+        "/api/v1/system/policy",
+        "/api/v1/stream",
+    ),
+    # On-demand rescans must reach the route
+    bypass_params=("refresh",),
+)
+
 # CORS Configuration
 # Force allow_origins=["*"]
 app.add_middleware(
@@ -13,6 +33,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "X-Next-Cursor"],
 )
 
 # Include Routers
@@ -20,12 +41,24 @@ app.include_router(discovery.router, prefix="/api/v1")
 app.include_router(governance.router, prefix="/api/v1")
 app.include_router(observability.router, prefix="/api/v1")
 app.include_router(security.router, prefix="/api/v1")
+app.include_router(stream.router, prefix="/api/v1")
 
 @app.on_event("startup")
 async def startup_event():
+    # Compute deltas for streaming clients from the first snapshot on
+    SnapshotBroadcaster()
     # Start the background scanner thread
     print("Starting Background Docker Scanner...")
     start_background_scanning()
+    # Hot-reload the scoring policy file
+    PolicyManager().start_watching()
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    DockerScanner().stop()
+    PolicyManager().stop()
+    # Commit queued audit entries before exiting
+    logger_instance.close()
 
 @app.get("/")
 async def root():
@@ -6,11 +6,14 @@ Tests all Trust Intelligence Engine components
 
 import sys
 import os
+import tempfile
 import json
 from datetime import datetime
 
 # Add sentinel-backend to path
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'sentinel-backend'))
+# Keep test runs out of the real audit database
+os.environ.setdefault("SENTINEL_AUDIT_DB", os.path.join(tempfile.mkdtemp(prefix="sentinel-test-"), "audit.db"))
 
 def test_risk_engine():
     """Test the new TrustScoreEvaluator"""
@@ -63,10 +66,70 @@ def test_risk_engine():
         return False
 
 
+def test_score_cache():
+    """Test static vector caching keyed on the canonical spec fingerprint"""
+    print("\n" + "="*60)
+    print("TEST 2: Score Cache - Config Fingerprints")
+    print("="*60)
+    
+    try:
+        from core.risk_engine import TrustScoreEvaluator
+        from core.score_cache import StaticVectorCache, fingerprint_container
+
+        attrs = {
+            "Config": {"User": ""},
+            "HostConfig": {"Privileged": True, "PortBindings": {"22/tcp": [{"HostIp": "0.0.0.0", "HostPort": "22"}]}},
+        }
+        stats = {"memory_stats": {"limit": 512 * 1024 * 1024, "usage": 450 * 1024 * 1024}}
+
+        print("\n✓ Testing cached vectors give the same score...")
+        cache = StaticVectorCache(max_entries=2)
+        fp = fingerprint_container(attrs, "rogue:latest")
+        assert cache.get("c1", fp) is None
+        cache.put("c1", fp, TrustScoreEvaluator.evaluate_static_vectors(attrs, "rogue:latest"))
+        cached = cache.get("c1", fp)
+        score, _ = TrustScoreEvaluator.combine_vectors(cached, stats)
+        expected, _ = TrustScoreEvaluator.calculate_trust_score(attrs, "rogue:latest", stats)
+        assert score == expected, f"{score} != {expected}"
+        print(f"  Cached score: {score}, full score: {expected}")
+
+        print("\n✓ Testing config change invalidates the entry...")
+        changed = {**attrs, "HostConfig": {**attrs["HostConfig"], "Privileged": False}}
+        assert cache.get("c1", fingerprint_container(changed, "rogue:latest")) is None
+
+        print("\n✓ Testing replicas share one entry...")
+        replica = {**attrs, "HostConfig": {**attrs["HostConfig"], "PortBindings": {"22/tcp": [{"HostIp": "0.0.0.0", "HostPort": "2222"}]}}}
+        assert fingerprint_container(replica, "rogue:latest") == fp, "Host ports must not split replicas"
+        assert cache.get("c2", fp) is cached
+        cache.put("c3", fp, cached)
+        stats_out = cache.stats()
+        assert stats_out["entries"] == 1 and stats_out["containers"] == 3 and stats_out["dedup_ratio"] == 3.0
+
+        print("\n✓ Testing bounded size and eviction...")
+        cache.evict("c3")
+        other = fingerprint_container(changed, "rogue:latest")
+        cache.put("c4", other, cached)
+        cache.retain(["c4"])
+        cache.put("c5", fingerprint_container(attrs, "other:1"), cached)
+        stats_out = cache.stats()
+        assert stats_out["entries"] == 2 and stats_out["evictions"] == 1, stats_out
+        assert cache.get("c1", fp) is None, "Unreferenced spec is evicted first"
+        print(f"  Cache stats: {stats_out}")
+
+        print("\n✓ Score cache tests PASSED")
+        return True
+        
+    except Exception as e:
+        print(f"\n✗ Score cache test FAILED: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+
 def test_scanner():
     """Test the DockerScanner with new Trust Score"""
     print("\n" + "="*60)
-    print("TEST 2: Scanner - Docker Integration")
+    print("TEST 3: Scanner - Docker Integration")
     print("="*60)
     
     try:
@@ -98,10 +161,103 @@ def test_scanner():
         return False
 
 
+def test_event_driven_scanner():
+    """Test targeted rescans driven by Docker events"""
+    print("\n" + "="*60)
+    print("TEST 4: Scanner - Docker Events")
+    print("="*60)
+    
+    try:
+        import docker
+        from core.docker_client import DEFAULT_HOST
+        from core.scanner import DockerScanner
+        from core.snapshot import get_snapshot
+
+        class FakeAPI:
+            def __init__(self):
+                self.alive = {}
+
+            def inspect_container(self, cid):
+                if cid not in self.alive:
+                    raise docker.errors.NotFound("gone")
+                return self.alive[cid]
+
+            def stats(self, cid, stream=False):
+                return {}
+
+            def images(self):
+                return [{"Id": "sha256:rogue", "RepoTags": ["unknown_rogue_image:latest"]}]
+
+        class FakeClient:
+            api = FakeAPI()
+
+        scanner = DockerScanner().host(DEFAULT_HOST)
+        client = FakeClient()
+        cid = "f" * 64
+        client.api.alive[cid] = {
+            "Id": cid,
+            "Name": f"/rogue-{cid[:4]}",
+            "Image": "sha256:rogue",
+            "State": {"Status": "running"},
+            "Config": {"User": "", "Image": "unknown_rogue_image"},
+            "HostConfig": {"Privileged": True},
+        }
+
+        print("\n✓ Testing start event triggers targeted rescan...")
+        scanner._handle_event(client, {"Type": "image", "Action": "pull", "Actor": {"ID": "unknown_rogue_image"}})
+        scanner._handle_event(client, {"Type": "container", "Action": "start", "Actor": {"ID": cid}})
+        cached = [c for c in get_snapshot().containers if c.id == cid[:12]]
+        assert cached and cached[0].image == "unknown_rogue_image:latest"
+        print(f"  Snapshot v{get_snapshot().version}: {len(get_snapshot().containers)} container(s)")
+
+        print("\n✓ Testing prefix index lookups...")
+        snapshot = get_snapshot()
+        for key in (cid, cid[:12], cid[:5]):
+            assert snapshot.find_container(key) is cached[0], key
+        assert snapshot.find_container(cid[:12], host=DEFAULT_HOST) is cached[0]
+        assert snapshot.find_container(cid[:12], host="elsewhere") is None
+        assert snapshot.find_container("0" * 12) is None
+        assert snapshot.find_container(f"rogue-{cid[:4]}") is cached[0], "names resolve too"
+
+        print("\n✓ Testing ambiguous prefixes are rejected...")
+        from types import SimpleNamespace
+        from core.container_index import AmbiguousContainerId, ContainerIndex
+        twins = [
+            SimpleNamespace(id=f"abc{n}".ljust(12, "0"), full_id=f"abc{n}".ljust(64, "0"), name=f"twin{n}", host=DEFAULT_HOST)
+            for n in range(2)
+        ]
+        index = ContainerIndex(twins)
+        assert index.resolve("abc1") is twins[1]
+        try:
+            index.resolve("abc")
+            raise AssertionError("ambiguous prefix resolved")
+        except AmbiguousContainerId as e:
+            assert len(e.matches) == 2
+
+        print("\n✓ Testing a sweep is skipped while the previous one still runs...")
+        with scanner._sweep_lock:
+            assert scanner._perform_scan() is False
+        assert scanner.get_scan_metrics()["skipped_sweeps"] >= 1
+
+        print("\n✓ Testing destroy event evicts the container...")
+        del client.api.alive[cid]
+        scanner._handle_event(client, {"Type": "container", "Action": "destroy", "Actor": {"ID": cid}})
+        assert not any(c.id == cid[:12] for c in get_snapshot().containers)
+
+        print("\n✓ Scanner events tests PASSED")
+        return True
+        
+    except Exception as e:
+        print(f"\n✗ Scanner events test FAILED: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+
 def test_models():
     """Test Pydantic models for type safety"""
     print("\n" + "="*60)
-    print("TEST 3: Pydantic Models - Type Safety")
+    print("TEST 5: Pydantic Models - Type Safety")
     print("="*60)
     
     try:
@@ -160,7 +316,7 @@ def test_models():
 def test_event_logger():
     """Test enhanced event logging"""
     print("\n" + "="*60)
-    print("TEST 4: Event Logger - Audit Trail")
+    print("TEST 6: Event Logger - Audit Trail")
     print("="*60)
     
     try:
@@ -197,6 +353,1029 @@ def test_event_logger():
         return False
 
 
+def test_audit_ring_buffer():
+    """Test ring buffer capacity, sequence IDs and secondary indexes"""
+    print("\n" + "="*60)
+    print("TEST 7: Event Logger - Ring Buffer")
+    print("="*60)
+    
+    try:
+        from core.event_logger import InMemoryLogger
+
+        audit = object.__new__(InMemoryLogger)
+        audit._initialize(capacity=4)
+
+        print("\n✓ Testing wrap-around keeps newest entries...")
+        for i in range(10):
+            audit.log(f"agent-{i % 2}", "Quarantine" if i % 2 else "Scan", "Success", f"event {i}", container_id=f"c{i % 3}")
+        seqs = [e["seq"] for e in audit.get_logs()]
+        assert seqs == [11, 10, 9, 8], seqs
+        assert len({e["id"] for e in audit.get_logs()}) == 4, "IDs must not collide"
+        print(f"  Retained sequence IDs: {seqs}")
+
+        print("\n✓ Testing indexes drop evicted entries...")
+        assert [e["seq"] for e in audit.get_logs_by_action("Quarantine")] == [11, 9]
+        assert [e["seq"] for e in audit.get_logs_by_container("c0")] == [11, 8]
+        assert [e["seq"] for e in audit.get_logs_by_agent("agent-0")] == [10, 8]
+        assert [e["seq"] for e in audit.get_logs_since(9)] == [11, 10]
+        entries, version = audit.changes_since(9)
+        assert [e["seq"] for e in entries] == [11, 10] and version == audit.version == 11
+
+        print("\n✓ Testing cursor pagination with filters...")
+        page = audit.query(limit=1, action="Quarantine", status="Success")
+        assert [e["seq"] for e in page] == [11]
+        page = audit.query(before=page[-1]["seq"], limit=1, action="Quarantine", status="Success")
+        assert [e["seq"] for e in page] == [9]
+        assert audit.query(limit=5, agentName="nobody") == []
+
+        print("\n✓ Testing since/until windows...")
+        for entry in audit.get_logs():
+            entry["ts"] = float(entry["seq"])  # one entry per second
+        assert [e["seq"] for e in audit.query(since=9.5, until=10.5)] == [10]
+        assert [e["seq"] for e in audit.query(until=9, action="Quarantine")] == [9]
+        assert audit.query(since=12) == [] and audit.query(until=7) == []
+
+        print("\n✓ Ring buffer tests PASSED")
+        return True
+        
+    except Exception as e:
+        print(f"\n✗ Ring buffer test FAILED: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+
+def test_timeseries():
+    """Test time-series rings, rollups and resolution selection"""
+    print("\n" + "="*60)
+    print("TEST 8: Time Series - Rollups")
+    print("="*60)
+    
+    try:
+        from core.timeseries import _Series, CONTAINER_FIELDS, _auto_resolution
+
+        series = _Series(CONTAINER_FIELDS)
+        base = 1_700_000_000 - 1_700_000_000 % 3600
+
+        print("\n✓ Testing 1m rollup averages closed buckets...")
+        for i in range(180):  # 90 minutes of 30s scans
+            series.append(base + i * 30, [50 + i % 2 * 10, 100, 100, 100, 80, 1024, 5.0])
+        minutes = series.query("1m", base, base + 60, ["trust"])
+        assert minutes["ts"] == [base, base + 60], minutes["ts"]
+        assert minutes["trust"] == [55.0, 55.0], minutes["trust"]
+        hours = series.query("1h", base, base + 7200, ["memory"])
+        assert hours["ts"] == [base, base + 3600] and hours["memory"] == [1024.0, 1024.0]
+        print(f"  1m buckets: {len(series.query('1m', 0, base + 9999, ['trust'])['ts'])}")
+
+        print("\n✓ Testing raw ring wraps at capacity...")
+        raw = series.rings["raw"]
+        for i in range(raw.capacity):
+            series.append(base + 10_000 + i, [70] * len(CONTAINER_FIELDS))
+        points = series.query("raw", 0, base + 100_000, ["trust"])
+        assert len(points["ts"]) == raw.capacity and points["ts"][0] == base + 10_000
+
+        print("\n✓ Testing an out-of-order point keeps the series sorted...")
+        late = _Series(CONTAINER_FIELDS)
+        for offset, trust in ((0, 10), (70, 20), (30, 30), (130, 40)):
+            late.append(base + offset, [trust] * len(CONTAINER_FIELDS))
+        points = late.query("raw", base, base + 200, ["trust"])
+        assert points["ts"] == [base, base + 70, base + 70, base + 130], points["ts"]
+        assert late.query("raw", base + 60, base + 100, ["trust"])["trust"] == [20.0, 30.0]
+        # The late point joins the open minute instead of reopening a closed one
+        minutes = late.query("1m", base, base + 200, ["trust"])
+        assert minutes["ts"] == [base, base + 60, base + 120] and minutes["trust"] == [10.0, 25.0, 40.0], minutes
+
+        print("\n✓ Testing rings allocate on demand...")
+        from core.timeseries import RING_INITIAL_SLOTS
+        fresh = _Series(CONTAINER_FIELDS)
+        fresh.append(base, [70] * len(CONTAINER_FIELDS))
+        assert all(ring.size <= RING_INITIAL_SLOTS for ring in fresh.rings.values())
+        assert raw.size == raw.capacity
+
+        print("\n✓ Testing host-scoped daily burn...")
+        import time
+        from types import SimpleNamespace
+        from core.aggregates import compute_fleet_aggregates
+        from core.snapshot import ScanSnapshot
+        from core.timeseries import TimeSeriesStore
+        store = object.__new__(TimeSeriesStore)
+        store._initialize()
+        now = time.time()
+        fleet = [
+            SimpleNamespace(id=f"c{i}", host="a" if i < 3 else "b", status="running", trust_score=90,
+                            is_sanctioned=True, threat_level="Low", name=f"c{i}", memory_usage=0, cpu_percent=0.0,
+                            trust_details=None)
+            for i in range(4)
+        ]
+        by_host = {h: compute_fleet_aggregates([c for c in fleet if c.host == h], now) for h in ("a", "b")}
+        snap = ScanSnapshot(1, tuple(fleet), now, compute_fleet_aggregates(fleet, now), by_host)
+        store.record(snap, ())
+        burn = lambda host=None: store.daily_burn(7, 10, host)[-1]["cost"]
+        assert (burn(), burn("a"), burn("b")) == (4 * 240, 3 * 240, 240), (burn(), burn("a"), burn("b"))
+        assert store.daily_burn(7, 10, "unknown") == []
+
+        print("\n✓ Testing auto resolution picks coarser tiers for long windows...")
+        now = time.time()
+        assert _auto_resolution(now - 600, now) == "raw"
+        assert _auto_resolution(now - 86400, now) == "1h"
+        assert _auto_resolution(now - 90 * 86400, now) == "1d"
+
+        print("\n✓ Time series tests PASSED")
+        return True
+        
+    except Exception as e:
+        print(f"\n✗ Time series test FAILED: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+
+def test_batch_scoring():
+    """Test score_batch matches per-container scoring"""
+    print("\n" + "="*60)
+    print("TEST 9: RiskEngine - Batch Scoring")
+    print("="*60)
+    
+    try:
+        from core.risk_engine import TrustScoreEvaluator
+
+        attrs_list = [
+            {"Config": {"User": "app"}, "HostConfig": {"ReadonlyRootfs": True, "CapDrop": ["ALL"]}},
+            {"Config": {"User": ""}, "HostConfig": {"Privileged": True, "PortBindings": {"6379/tcp": [{"HostIp": "0.0.0.0"}]}}},
+            {"Config": {"User": "root"}, "HostConfig": {}, "NetworkSettings": {"Ports": {"80/tcp": [{"HostIp": "0.0.0.0"}]}}},
+        ]
+        images = ["postgres:15", "unknown-ai:latest", "myorg/agent:1"]
+        stats_list = [
+            {"memory_stats": {"limit": 512 * 1024 * 1024, "usage": 450 * 1024 * 1024}},
+            None,
+            {
+                "memory_stats": {"limit": 256 * 1024 * 1024, "usage": 1},
+                # 100% of one core over the sample interval
+                "cpu_stats": {"cpu_usage": {"total_usage": 2 * 10**9}, "system_cpu_usage": 4 * 10**9, "online_cpus": 2},
+                "precpu_stats": {"cpu_usage": {"total_usage": 10**9}, "system_cpu_usage": 2 * 10**9},
+            },
+        ]
+
+        print("\n✓ Testing batch scores equal calculate_trust_score...")
+        batch = TrustScoreEvaluator.score_batch(attrs_list, images, stats_list)
+        expected = [
+            TrustScoreEvaluator.calculate_trust_score(a, i, s)
+            for a, i, s in zip(attrs_list, images, stats_list)
+        ]
+        assert batch.trust_scores() == [score for score, _ in expected], batch.trust_scores()
+        print(f"  Trust scores: {batch.trust_scores()}")
+
+        print("\n✓ Testing lazy details...")
+        assert batch.details(1)["vectors"] == expected[1][1]["vectors"]
+
+        print("\n✓ Batch scoring tests PASSED")
+        return True
+        
+    except Exception as e:
+        print(f"\n✗ Batch scoring test FAILED: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+
+def test_policy_reload():
+    """Test policy compilation, hot reload and invalid files"""
+    print("\n" + "="*60)
+    print("TEST 10: Policy - Hot Reload")
+    print("="*60)
+    
+    try:
+        import json, os, tempfile
+        from core.policy_mapper import PolicyManager
+        from core.risk_engine import TrustScoreEvaluator
+
+        path = os.path.join(tempfile.mkdtemp(), "policy.json")
+        with open(path, "w") as f:
+            json.dump({"identity": {"sanctioned_images": ["myorg/agent"]}}, f)
+
+        manager = object.__new__(PolicyManager)
+        manager._initialize(path=path)
+        reloads = []
+        manager.add_reload_listener(reloads.append)
+
+        print("\n✓ Testing file overrides merge over defaults...")
+        policy = manager.policy
+        assert policy.is_sanctioned("myorg/agent") and not policy.is_sanctioned("postgres")
+        assert 6379 in policy.critical_ports
+        score, _ = TrustScoreEvaluator._evaluate_identity("myorg/agent:1", policy)
+        assert score == 100, score
+
+        print("\n✓ Testing changed file is recompiled and listeners notified...")
+        with open(path, "w") as f:
+            json.dump({"weights": {"identity": 0.4, "configuration": 0.2, "network": 0.2, "resources": 0.2}}, f)
+        os.utime(path, (1, 1))
+        assert manager.reload() and len(reloads) == 1
+        assert manager.policy.version == policy.version + 1
+        assert manager.policy.weights.identity == 0.4
+        assert not manager.reload(), "Unchanged file must not reload"
+
+        print("\n✓ Testing invalid file keeps the previous policy...")
+        with open(path, "w") as f:
+            f.write("{not json")
+        os.utime(path, (2, 2))
+        assert not manager.reload()
+        assert manager.policy.weights.identity == 0.4
+
+        print("\n✓ Policy tests PASSED")
+        return True
+        
+    except Exception as e:
+        print(f"\n✗ Policy test FAILED: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+
+def test_image_ref():
+    """Test image reference parsing and sanctioned-image matching"""
+    print("\n" + "="*60)
+    print("TEST 11: Image References - Parser and Matcher")
+    print("="*60)
+    
+    try:
+        from core.image_ref import parse_image_ref, ImageMatcher
+
+        print("\n✓ Testing registry with port, tag and digest...")
+        ref = parse_image_ref("registry:5000/org/img:tag")
+        assert (ref.registry, ref.namespace, ref.repository, ref.tag) == ("registry:5000", "org", "img", "tag")
+        ref = parse_image_ref("ghcr.io/a/b@sha256:ff")
+        assert (ref.registry, ref.path, ref.tag, ref.digest) == ("ghcr.io", "a/b", None, "sha256:ff")
+        ref = parse_image_ref("postgres:15")
+        assert (ref.registry, ref.namespace, ref.repository, ref.tag) == ("docker.io", "library", "postgres", "15")
+
+        print("\n✓ Testing trie matching is exact per segment...")
+        matcher = ImageMatcher(["postgres", "archestra/platform", "*-sentinel-backend", "redis:7", "sha256:abc"])
+        assert matcher.matches("postgres:16") and matcher.matches("docker.io/library/postgres")
+        assert not matcher.matches("my-postgres-miner")
+        assert not matcher.matches("bitnami/postgres")
+        assert matcher.matches("archestra-sentinel-backend")
+        assert matcher.matches("redis:7") and not matcher.matches("redis:6")
+        assert matcher.matches("unknown", image_id="sha256:abc")
+
+        print("\n✓ Image reference tests PASSED")
+        return True
+        
+    except Exception as e:
+        print(f"\n✗ Image reference test FAILED: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+
+def test_governance_batch():
+    """Test batched audit writes and the batch selector"""
+    print("\n" + "="*60)
+    print("TEST 12: Governance - Batch Actions")
+    print("="*60)
+    
+    try:
+        from core.event_logger import InMemoryLogger, trust_score_change_event
+        from core.scanner import ContainerInfo
+        from api.v1.governance import BatchSelector
+
+        audit = object.__new__(InMemoryLogger)
+        audit._initialize(capacity=8)
+
+        print("\n✓ Testing log_batch assigns consecutive sequence IDs...")
+        written = audit.log_batch([
+            {"agent": "a", "action": "Quarantine", "status": "Success", "details": "paused", "container_id": "c1"},
+            trust_score_change_event("a", "c1", 30, 20, "Container quarantined"),
+            {"agent": "b", "action": "Quarantine", "status": "Failed", "details": "not found", "container_id": "c2"},
+        ])
+        assert written == 3
+        assert [e["seq"] for e in audit.get_logs()][:3] == [4, 3, 2]
+        assert [e["seq"] for e in audit.get_logs_by_container("c1")] == [3, 2]
+        assert audit.get_logs()[1]["trust_score_change"] == {"before": 30, "after": 20}
+        print(f"  Batch of {written} written, version {audit.version}")
+
+        print("\n✓ Testing selector criteria...")
+        def container(trust, sanctioned):
+            return ContainerInfo(
+                id="x" * 64, name="n", image="i", status="running", is_sanctioned=sanctioned,
+                threat_level="Critical", risk_score=100 - trust, trust_score=trust,
+            )
+        selector = BatchSelector(trust_score_below=40, sanctioned=False)
+        assert selector.matches(container(20, False))
+        assert not selector.matches(container(20, True))
+        assert not selector.matches(container(40, False))
+        assert BatchSelector().is_empty() and not selector.is_empty()
+
+        print("\n✓ Governance batch tests PASSED")
+        return True
+        
+    except Exception as e:
+        print(f"\n✗ Governance batch test FAILED: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+
+def test_stats_sampler():
+    """Test the rolling resource window built from streamed stats"""
+    print("\n" + "="*60)
+    print("TEST 13: Stats Sampler - Rolling Window")
+    print("="*60)
+    
+    try:
+        from core.stats_sampler import _Window, StatsSampler
+
+        def payload(n):
+            return {
+                "memory_stats": {"usage": 256, "limit": 1024},
+                "cpu_stats": {"cpu_usage": {"total_usage": (n + 1) * 10**9}, "system_cpu_usage": (n + 1) * 4 * 10**9, "online_cpus": 2},
+                "precpu_stats": {"cpu_usage": {"total_usage": n * 10**9}, "system_cpu_usage": n * 4 * 10**9},
+                "networks": {"eth0": {"rx_bytes": 500 * n, "tx_bytes": 100 * n}},
+                "blkio_stats": {"io_service_bytes_recursive": [{"op": "Write", "value": 4096 * n}]},
+            }
+
+        print("\n✓ Testing CPU percent, memory percent and rates...")
+        window = _Window()
+        for n in range(3):
+            window.add(payload(n), 100.0 + n * 2)
+        latest = window.samples[-1]
+        assert latest.cpu_percent == 50.0, latest
+        assert latest.memory_percent == 25.0
+        assert (latest.net_rx_rate, latest.net_tx_rate, latest.blk_write_rate) == (250.0, 50.0, 2048.0), latest
+        assert window.samples[0].net_rx_rate == 0.0, "first sample has no rate"
+        print(f"  Latest sample: cpu={latest.cpu_percent}% mem={latest.memory_percent}% rx={latest.net_rx_rate}B/s")
+
+        print("\n✓ Testing scoring sees CPU averaged over the window...")
+        from core.risk_engine import resource_usage
+        busy = _Window()
+        # 1 core-second per second, then an idle second: 25% then 0% of 2 CPUs over 4s of system time
+        for n, total in enumerate((0, 10**9, 10**9)):
+            stats = payload(n)
+            stats["cpu_stats"]["cpu_usage"]["total_usage"] = total
+            busy.add(stats, 100.0 + n)
+        assert busy.samples[-1].cpu_percent == 0.0, "last second alone was idle"
+        assert resource_usage(busy.smoothed()) == (256, 25.0), resource_usage(busy.smoothed())
+        # A restart resets the counters: only samples since then are averaged
+        restarted = payload(3)
+        restarted["cpu_stats"]["cpu_usage"]["total_usage"] = 10**8
+        busy.add(restarted, 103.0)
+        assert busy.smoothed() is busy.payload
+
+        print("\n✓ Testing stale payloads are not served...")
+        sampler = StatsSampler("local")
+        sampler._windows["c1"] = window
+        assert sampler.latest_stats("c1") is None, "payload from t=104 is stale"
+        assert len(sampler.window("c1")) == 3
+        assert sampler.window("missing") == []
+
+        print("\n✓ Stats sampler tests PASSED")
+        return True
+        
+    except Exception as e:
+        print(f"\n✗ Stats sampler test FAILED: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+
+def test_cgroup_resources():
+    """Test the cgroup v2 resource provider against a fake cgroup tree"""
+    print("\n" + "="*60)
+    print("TEST 14: Resources - cgroup v2 Provider")
+    print("="*60)
+    
+    try:
+        import tempfile
+        from core.resources import CgroupResourceProvider, ResourceProvider
+        from core.risk_engine import resource_usage
+
+        systemd_id, cgroupfs_id, remote_id = "a" * 64, "b" * 64, "c" * 64
+
+        class FakeFallback(ResourceProvider):
+            name = "fake"
+            def __init__(self):
+                self.asked = []
+            def collect(self, client, containers):
+                self.asked += [attrs["Id"] for attrs in containers]
+                return {attrs["Id"]: ({"memory_stats": {"usage": 1}}, False) for attrs in containers}
+
+        def write_cgroup(path, memory, memory_max, usage_usec, pids):
+            os.makedirs(path, exist_ok=True)
+            for name, value in (("memory.current", memory), ("memory.max", memory_max),
+                                ("cpu.stat", f"usage_usec {usage_usec}\nuser_usec 0\n"), ("pids.current", pids)):
+                with open(os.path.join(path, name), "w") as f:
+                    f.write(f"{value}\n")
+
+        with tempfile.TemporaryDirectory() as root:
+            open(os.path.join(root, "cgroup.controllers"), "w").close()
+            systemd_path = os.path.join(root, "system.slice", f"docker-{systemd_id}.scope")
+            cgroupfs_path = os.path.join(root, "docker", cgroupfs_id)
+            write_cgroup(systemd_path, 512, 1024, 1_000_000, 7)
+            write_cgroup(cgroupfs_path, 256, "max", 0, 1)
+
+            clock = [10**12]
+            fallback = FakeFallback()
+            provider = CgroupResourceProvider("local", root, fallback=fallback, clock=lambda: clock[0])
+            running = [{"Id": cid, "State": {"Status": "running"}} for cid in (systemd_id, cgroupfs_id, remote_id)]
+
+            print("\n✓ Testing both cgroup layouts are discovered...")
+            assert CgroupResourceProvider.available(root)
+            assert set(provider._index()) == {systemd_id, cgroupfs_id}
+
+            print("\n✓ Testing payloads are Docker-stats shaped...")
+            first = provider.collect(None, running)
+            stats, stale = first[systemd_id]
+            assert not stale
+            assert stats["memory_stats"] == {"usage": 512, "limit": 1024}
+            assert stats["pids_stats"]["current"] == 7
+            assert resource_usage(stats) == (512, 0.0), "no interval on the first reading"
+            assert first[cgroupfs_id][0]["memory_stats"]["limit"] == provider._host_memory, "max = host memory"
+            assert fallback.asked == [remote_id], fallback.asked
+
+            print("\n✓ Testing CPU percent between collections...")
+            # Half a core for 2 seconds of wall time
+            write_cgroup(systemd_path, 512, 1024, 2_000_000, 7)
+            clock[0] += 2 * 10**9
+            second = provider.collect(None, running[:1])
+            _, cpu_percent = resource_usage(second[systemd_id][0])
+            assert cpu_percent == 50.0, cpu_percent
+            print(f"  CPU: {cpu_percent}%  stats: {provider.stats()['reads']} reads")
+
+            print("\n✓ Testing track reuses the listing and re-lists only on a miss...")
+            class TrackingFallback(FakeFallback):
+                def track(self, container_id):
+                    self.asked.append(container_id)
+            fallback = TrackingFallback()
+            provider = CgroupResourceProvider("local", root, fallback=fallback, clock=lambda: clock[0])
+            provider.collect(None, running)
+            refreshes = provider.index_refreshes
+            provider.track(systemd_id)
+            assert provider.index_refreshes == refreshes and fallback.asked == [remote_id]
+            late_id = "d" * 64
+            write_cgroup(os.path.join(root, "docker", late_id), 64, "max", 0, 1)
+            provider.track(late_id)
+            provider.track(remote_id)
+            assert provider.index_refreshes == refreshes + 2
+            assert fallback.asked == [remote_id, remote_id], fallback.asked
+            try:
+                ResourceProvider()
+                assert False, "collect is abstract"
+            except TypeError:
+                pass
+
+            print("\n✓ Testing a vanished cgroup falls back...")
+            import shutil
+            shutil.rmtree(cgroupfs_path)
+            provider.collect(None, running[1:2])
+            assert fallback.asked[-1] == cgroupfs_id
+
+        print("\n✓ cgroup provider tests PASSED")
+        return True
+        
+    except Exception as e:
+        print(f"\n✗ cgroup provider test FAILED: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+
+def test_scan_scheduler():
+    """Test adaptive intervals, risk tiers and immediate wake-ups"""
+    print("\n" + "="*60)
+    print("TEST 15: Scanner - Adaptive Scheduler")
+    print("="*60)
+    
+    try:
+        import threading
+        import time
+        from types import SimpleNamespace
+        from core import scheduler as sched
+
+        def info(cid, trust, sanctioned, status="running"):
+            return SimpleNamespace(id=cid, trust_score=trust, is_sanctioned=sanctioned, status=status)
+
+        class FakeHostScanner:
+            host = "local"
+            def __init__(self):
+                self.fleet = [info("risky", 30, False), info("rogue0000000", 70, False), info("stable", 95, True)]
+                self.sweeps = 0
+                self.rescanned = []
+                self.arriving = []
+            def results(self):
+                return list(self.fleet)
+            def _perform_scan(self):
+                self.sweeps += 1
+                if self._connect() is None:
+                    return False
+                self.fleet, self.arriving = self.fleet + self.arriving, []
+                return True
+            def get_scan_metrics(self):
+                return {"duration_ms": 2000}
+            def _connect(self):
+                return object()
+            def rescan_containers(self, client, ids):
+                self.rescanned.append(list(ids))
+                return [c for c in self.fleet if c.id in ids]
+
+        host = FakeHostScanner()
+        stop = threading.Event()
+        scheduler = sched.ScanScheduler(host, stop)
+
+        print("\n✓ Testing risk tiers after a sweep...")
+        scheduler._sweep()
+        now = time.monotonic()
+        assert set(scheduler._next_due) == {"risky", "rogue0000000"}, "stable sanctioned containers wait for sweeps"
+        assert scheduler._next_due["risky"] - now <= sched.HOT_RESCAN_INTERVAL
+        assert scheduler._next_due["rogue0000000"] - now > sched.HOT_RESCAN_INTERVAL
+        # Quiet fleet: interval at the maximum
+        assert scheduler._interval == sched.SCAN_INTERVAL_MAX
+
+        print("\n✓ Testing churn shortens the interval, bounded by scan cost...")
+        host.arriving = [info(f"new{i}", 90, True) for i in range(30)]
+        scheduler._last_sweep_at = time.monotonic() - 60
+        scheduler._sweep()
+        assert max(sched.SCAN_INTERVAL_MIN, 2 * sched.SCAN_DUTY_FACTOR) <= scheduler._interval < sched.SCAN_INTERVAL_MAX
+        print(f"  Interval after churn: {scheduler._interval:.1f}s ({scheduler.metrics()['churn_per_min']}/min)")
+
+        print("\n✓ Testing due containers come most-overdue first, requests before them...")
+        scheduler.note_change("rogue0000000" + "x" * 52)  # events carry full IDs
+        scheduler.trigger(["stable"])
+        due = scheduler._take_due(time.monotonic() + sched.WARM_RESCAN_INTERVAL + 1)
+        assert due[0] == "stable" and set(due[1:]) == {"risky", "rogue0000000"}, due
+
+        print("\n✓ Testing an unreachable daemon puts the batch back with a backoff...")
+        host._connect = lambda: None
+        started = time.monotonic()
+        scheduler._rescan(due)
+        assert set(scheduler._next_due) >= set(due), scheduler._next_due
+        assert all(scheduler._next_due[cid] >= started + sched.RESCAN_RETRY_BACKOFF for cid in due)
+        assert scheduler._take_due(time.monotonic()) == []
+        retried = scheduler._take_due(time.monotonic() + sched.RESCAN_RETRY_BACKOFF + 1)
+        assert set(retried) == set(due) and scheduler.metrics()["deferred_rescans"] == len(due), retried
+
+        print("\n✓ Testing an unreachable daemon retries the sweep after the backoff...")
+        interval, churn = scheduler._interval, scheduler._churn_rate
+        started = time.monotonic()
+        scheduler._sweep()
+        assert scheduler._next_sweep - started <= sched.RESCAN_RETRY_BACKOFF + 1
+        assert scheduler._next_sweep - started < interval, "not the adaptive interval"
+        assert (scheduler._interval, scheduler._churn_rate) == (interval, churn)
+        assert scheduler.metrics()["failed_sweeps"] == 1
+        del host._connect
+
+        print("\n✓ Testing stop wakes the loop immediately...")
+        thread = threading.Thread(target=scheduler.run, daemon=True)
+        thread.start()
+        time.sleep(0.2)
+        started = time.monotonic()
+        stop.set()
+        scheduler.stop()
+        thread.join(2)
+        assert not thread.is_alive() and time.monotonic() - started < 1
+
+        print("\n✓ Scheduler tests PASSED")
+        return True
+        
+    except Exception as e:
+        print(f"\n✗ Scheduler test FAILED: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+
+def test_async_docker_unreachable():
+    """Test connect failures map to DockerUnavailable and open the breaker"""
+    print("\n" + "="*60)
+    print("TEST 16: Async Docker Client - Unreachable Daemon")
+    print("="*60)
+    
+    import core.async_docker as async_docker
+    from core.docker_client import DEFAULT_HOST, DockerConnectionManager
+
+    resolve = async_docker._resolve_endpoint
+    manager = DockerConnectionManager(DEFAULT_HOST)
+    try:
+        import asyncio
+        from api.v1.governance import _apply_batch_action
+
+        async_docker._resolve_endpoint = lambda host: ("unix", "/nonexistent/docker.sock")
+        client = async_docker.AsyncDockerClient(DEFAULT_HOST)
+
+        async def scenario():
+            print("\n✓ Testing a missing socket raises DockerUnavailable...")
+            try:
+                await client.inspect_container("abc")
+                raise AssertionError("request succeeded without a daemon")
+            except async_docker.DockerUnavailable:
+                pass
+            assert manager.circuit_state() == "open", manager.circuit_state()
+
+            print("\n✓ Testing streams short-circuit while the breaker is open...")
+            try:
+                async for _ in client.container_stats("abc"):
+                    pass
+                raise AssertionError("stream opened without a daemon")
+            except async_docker.DockerUnavailable as e:
+                assert "circuit is open" in str(e)
+
+            print("\n✓ Testing batch items report unavailable, not failed...")
+            result, events = await _apply_batch_action("terminate", "abc", None, DEFAULT_HOST)
+            assert result.outcome == "unavailable" and events == [], result
+
+            print("\n✓ Testing one broken stream leaves the breaker alone...")
+            manager._consecutive_failures = 0
+            manager._next_attempt = 0.0
+            class Writer:
+                def write(self, data):
+                    pass
+                async def drain(self):
+                    pass
+                def is_closing(self):
+                    return False
+                def close(self):
+                    pass
+            async def open_broken(endpoint):
+                reader = asyncio.StreamReader()
+                reader.feed_data(b"HTTP/1.1 200 OK\r\nTransfer-Encoding: chunked\r\n\r\n3\r\n{}\n\r\n10\r\n{\"cpu")
+                reader.feed_eof()
+                return async_docker._Connection(reader, Writer())
+            client._open = open_broken
+            received = []
+            try:
+                async for payload in client.container_stats("abc"):
+                    received.append(payload)
+                raise AssertionError("truncated stream ended cleanly")
+            except async_docker.DockerStreamError:
+                pass
+            finally:
+                del client._open
+            assert received == [{}], received
+            assert manager._consecutive_failures == 0 and manager.circuit_state() != "open", manager.circuit_state()
+
+        asyncio.run(scenario())
+        print("\n✓ Async Docker client tests PASSED")
+        return True
+        
+    except Exception as e:
+        print(f"\n✗ Async Docker client test FAILED: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+    finally:
+        async_docker._resolve_endpoint = resolve
+        manager._consecutive_failures = 0
+        manager._next_attempt = 0.0
+
+
+def test_audit_store():
+    """Test SQLite group commit, replay on restart and cursor paging into the store"""
+    print("\n" + "="*60)
+    print("TEST 17: Audit Store - Persistence")
+    print("="*60)
+    
+    try:
+        import sqlite3
+        import time
+        from db.session import AuditStore, BATCH_SIZE, AUDIT_RETENTION_DAYS
+        from core.event_logger import InMemoryLogger
+
+        path = os.path.join(tempfile.mkdtemp(prefix="sentinel-audit-"), "audit.db")
+
+        def open_logger(capacity):
+            audit = object.__new__(InMemoryLogger)
+            audit._initialize(capacity=capacity, store=AuditStore(path))
+            return audit
+
+        print("\n✓ Testing group commit...")
+        audit = open_logger(4)
+        for i in range(1000):
+            audit.log(f"agent-{i % 2}", "Quarantine" if i % 2 else "Scan", "Success", f"event {i}")
+        assert audit._store.wait_committed(audit.version), "writer never caught up"
+        store = audit._store
+        rows = sqlite3.connect(path).execute("SELECT COUNT(*) FROM audit_log").fetchone()[0]
+        assert rows == 1001, rows
+        assert store.commits < 1001 // 10, f"{store.commits} commits for 1001 entries"
+        print(f"  1001 entries in {store.commits} commits (batch size {BATCH_SIZE})")
+
+        print("\n✓ Testing replay on restart continues the sequence...")
+        last = audit.version
+        audit.close()
+        audit = open_logger(4)
+        seqs = [e["seq"] for e in audit.get_logs()]
+        assert seqs == [last + 1, last, last - 1, last - 2], seqs
+        assert audit.get_logs()[0]["agentName"] == "System"
+
+        print("\n✓ Testing cursor paging falls through to SQLite...")
+        page = audit.query(limit=8)
+        assert [e["seq"] for e in page] == list(range(last + 1, last - 7, -1)), [e["seq"] for e in page]
+        page = audit.query(before=page[-1]["seq"], limit=3, action="Quarantine")
+        assert [e["seq"] for e in page] == [last - 8, last - 10, last - 12], [e["seq"] for e in page]
+        assert all(e["action"] == "Quarantine" for e in page)
+
+        print("\n✓ Testing retention runs at startup...")
+        expired = dict(audit.get_logs()[0], seq=last + 100, id="evt_old", ts=time.time() - (AUDIT_RETENTION_DAYS + 1) * 86400)
+        audit._store.append(expired)
+        audit.close()
+        audit = open_logger(4)
+        audit._store.flush()  # the writer compacts before its first commit
+        assert sqlite3.connect(path).execute("SELECT COUNT(*) FROM audit_log WHERE seq = ?", (last + 100,)).fetchone()[0] == 0
+        audit.close()
+
+        print("\n✓ Audit store tests PASSED")
+        return True
+        
+    except Exception as e:
+        print(f"\n✗ Audit store test FAILED: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+
+def test_stats_pool_deadlines():
+    """Test one-shot stats calls are cut off per call and fall back to stale values"""
+    print("\n" + "="*60)
+    print("TEST 18: Resources - Stats Pool Deadlines")
+    print("="*60)
+    
+    import core.resources as resources
+    saved = (resources.STATS_WORKERS, resources.STATS_TIMEOUT)
+    release = None
+    provider = None
+    try:
+        import threading
+        import time
+        from core.docker_client import DEFAULT_HOST
+
+        release = threading.Event()
+
+        class SlowAPI:
+            def stats(self, cid, stream=False):
+                if cid.startswith("hung"):
+                    release.wait(10)
+                elif cid.startswith("slow"):
+                    time.sleep(0.1)
+                return {"memory_stats": {"usage": 1}, "id": cid}
+
+        class SlowClient:
+            api = SlowAPI()
+
+        resources.STATS_WORKERS, resources.STATS_TIMEOUT = 2, 0.3
+        provider = resources.DockerStatsProvider(DEFAULT_HOST)
+        provider._last_stats["hung0"] = {"memory_stats": {"usage": 42}}
+        containers = [{"Id": cid, "State": {"Status": "running"}} for cid in ("hung0", "slow1", "slow2", "slow3")]
+
+        print("\n✓ Testing a hung call costs one timeout, not the batch budget...")
+        started = time.monotonic()
+        results = provider.collect(SlowClient(), containers)
+        elapsed = time.monotonic() - started
+        # Budget is 2 waves x 0.3s; the hung call is abandoned 0.3s after it starts
+        assert elapsed < 0.5, f"collect took {elapsed:.2f}s"
+        print(f"  4 containers (1 hung) in {elapsed * 1000:.0f}ms")
+
+        print("\n✓ Testing the hung container returns its cached stats, flagged stale...")
+        assert results["hung0"] == ({"memory_stats": {"usage": 42}}, True)
+        assert all(results[c] == ({"memory_stats": {"usage": 1}, "id": c}, False) for c in ("slow1", "slow2", "slow3"))
+
+        print("\n✓ Testing the batch budget still bounds calls that never start...")
+        containers = [{"Id": f"hung{i}", "State": {"Status": "running"}} for i in range(4)]
+        started = time.monotonic()
+        results = provider.collect(SlowClient(), containers)
+        elapsed = time.monotonic() - started
+        assert elapsed < 0.8, f"collect took {elapsed:.2f}s"
+        assert all(stale for _, stale in results.values()) and len(results) == 4
+
+        print("\n✓ Stats pool tests PASSED")
+        return True
+        
+    except Exception as e:
+        print(f"\n✗ Stats pool test FAILED: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+    finally:
+        resources.STATS_WORKERS, resources.STATS_TIMEOUT = saved
+        if release is not None:
+            release.set()
+        if provider is not None:
+            provider.stop()
+
+
+def test_conditional_get():
+    """Test ETag / If-None-Match handling under /api/v1"""
+    print("\n" + "="*60)
+    print("TEST 19: API - Conditional GETs")
+    print("="*60)
+    
+    from core.scanner import DockerScanner
+    rescan_container = DockerScanner.rescan_container
+    try:
+        from fastapi.testclient import TestClient
+        from starlette.responses import PlainTextResponse
+        from main import app
+        from api.conditional import ConditionalGetMiddleware
+        from core.event_logger import log
+        from core.snapshot import publish_snapshot
+
+        publish_snapshot([])
+        client = TestClient(app)
+        url = "/api/v1/discovery/containers"
+
+        print("\n✓ Testing 304 on a matching If-None-Match...")
+        first = client.get(url)
+        etag = first.headers["etag"]
+        assert first.status_code == 200 and etag.startswith('W/"')
+        cached = client.get(url, headers={"If-None-Match": etag})
+        assert cached.status_code == 304 and cached.content == b"" and cached.headers["etag"] == etag
+
+        print("\n✓ Testing a snapshot publish changes the ETag...")
+        publish_snapshot([])
+        fresh = client.get(url, headers={"If-None-Match": etag})
+        assert fresh.status_code == 200 and fresh.headers["etag"] != etag
+        etag = fresh.headers["etag"]
+
+        print("\n✓ Testing an audit write changes the ETag...")
+        log("test", "Scan", "Success", "conditional GET test")
+        fresh = client.get(url, headers={"If-None-Match": etag})
+        assert fresh.status_code == 200 and fresh.headers["etag"] != etag
+        etag = fresh.headers["etag"]
+
+        print("\n✓ Testing ?refresh=true reaches the route despite a matching ETag...")
+        calls = []
+        DockerScanner.rescan_container = lambda self, host, container_id: calls.append(container_id)
+        refreshed = client.get(f"{url}/abc?refresh=true", headers={"If-None-Match": etag})
+        assert refreshed.status_code == 404 and calls == ["abc"], (refreshed.status_code, calls)
+        assert client.get(f"{url}?refresh=false", headers={"If-None-Match": etag}).status_code == 304
+        assert client.get(f"{url}?refresh=1", headers={"If-None-Match": etag}).status_code == 200
+
+        print("\n✓ Testing excluded paths pass through untouched...")
+        config = next(m for m in app.user_middleware if m.cls is ConditionalGetMiddleware).kwargs
+        passthrough = TestClient(ConditionalGetMiddleware(PlainTextResponse("live"), **config))
+        assert "/api/v1/stream" in config["exclude"]
+        for path in config["exclude"]:
+            response = passthrough.get(path, headers={"If-None-Match": "*"})
+            assert response.status_code == 200 and "etag" not in response.headers, path
+        assert passthrough.get("/api/v1/discovery/containers", headers={"If-None-Match": "*"}).status_code == 304
+
+        print("\n✓ Conditional GET tests PASSED")
+        return True
+        
+    except Exception as e:
+        print(f"\n✗ Conditional GET test FAILED: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+    finally:
+        DockerScanner.rescan_container = rescan_container
+
+
+def test_snapshot_broadcaster():
+    """Test stream deltas, resume by Last-Event-ID and slow-subscriber resync"""
+    print("\n" + "="*60)
+    print("TEST 20: Stream - Snapshot Broadcaster")
+    print("="*60)
+    
+    import asyncio
+    import core.stream as stream_module
+    queue_size = stream_module.STREAM_QUEUE_SIZE
+    try:
+        from core.scanner import ContainerInfo
+        from core.event_logger import log
+        from core.snapshot import publish_snapshot
+        from core.stream import SnapshotBroadcaster, compute_delta, event_id
+        from api.v1.stream import stream_updates
+
+        def container(cid, trust, host="local"):
+            return ContainerInfo(
+                id=cid, name=f"mcp-{cid}", image="i", status="running", is_sanctioned=True,
+                threat_level="Low", risk_score=100 - trust, trust_score=trust, host=host,
+            )
+
+        def frame_event(frame):
+            return frame.split("\n")[1].split(": ", 1)[1]
+
+        broadcaster = SnapshotBroadcaster()
+
+        print("\n✓ Testing delta computation...")
+        before = publish_snapshot([container("a", 90), container("b", 90), container("a", 90, host="remote")])
+        log("test", "Scan", "Success", "stream delta test")
+        after = publish_snapshot([container("a", 50), container("c", 90), container("a", 90, host="remote")])
+        delta = compute_delta(before, after, [{"details": "x"}])
+        assert [c["id"] for c in delta["added"]] == ["c"]
+        assert delta["removed"] == ["local/b"]
+        assert [(c["host"], c["trust_score"]) for c in delta["rescored"]] == [("local", 50)]
+        assert [a["container_id"] for a in delta["alerts"]] == ["a"]
+        assert compute_delta(after, after, []) is None
+        version, frame = broadcaster.replay_since(before.version)[0]
+        assert version == after.version and frame.startswith(f"id: {event_id(after.version)}\nevent: delta\n")
+        assert any(e["details"] == "stream delta test" for e in json.loads(frame.split("data: ", 1)[1])["audit"])
+
+        print("\n✓ Testing resume from Last-Event-ID...")
+        resumed_from = after.version
+        latest = publish_snapshot([container("a", 70), container("c", 90)])
+        async def first_frames(last_event_id, count):
+            response = await stream_updates(since=None, last_event_id=last_event_id)
+            frames = []
+            async for frame in response.body_iterator:
+                frames.append(frame)
+                if len(frames) == count:
+                    break
+            await response.body_iterator.aclose()
+            return frames
+        frames = asyncio.run(first_frames(event_id(before.version), 2))
+        assert [frame_event(f) for f in frames] == ["delta", "delta"]
+        assert [f.split("\n")[0] for f in frames] == [f"id: {event_id(resumed_from)}", f"id: {event_id(latest.version)}"]
+        # History no longer reaching back means a full snapshot
+        frames = asyncio.run(first_frames(event_id(0), 1))
+        assert frame_event(frames[0]) == "snapshot" and frames[0].startswith(f"id: {event_id(latest.version)}\n")
+        assert broadcaster.subscriber_count() == 0
+
+        print("\n✓ Testing resume after a backend restart...")
+        # An id from another boot, even one naming a current version, is not trusted
+        frames = asyncio.run(first_frames(f"0-{before.version}", 1))
+        assert frame_event(frames[0]) == "snapshot", frames[0]
+        async def resume_ahead():
+            # Versions restarted below the client's last seen one
+            stream = broadcaster.stream(since=latest.version + 500)
+            first = await stream.__anext__()
+            changed = publish_snapshot([container("a", 75), container("c", 90)])
+            second = await asyncio.wait_for(stream.__anext__(), 2)
+            await stream.aclose()
+            return first, second, changed
+        first, second, changed = asyncio.run(resume_ahead())
+        assert frame_event(first) == "snapshot" and first.startswith(f"id: {event_id(latest.version)}\n")
+        assert frame_event(second) == "delta" and second.startswith(f"id: {event_id(changed.version)}\n")
+
+        print("\n✓ Testing a slow subscriber is resynced with a full snapshot...")
+        stream_module.STREAM_QUEUE_SIZE = 2
+        async def slow_client():
+            stream = broadcaster.stream()
+            assert frame_event(await stream.__anext__()) == "snapshot"
+            sub = next(iter(broadcaster._subscribers))
+            for trust in range(80, 85):
+                current = publish_snapshot([container("a", trust)]).version
+            # Let the queued offers run on this loop
+            await asyncio.sleep(0)
+            assert sub.lagging and sub.queue.full()
+            frame = await stream.__anext__()
+            await stream.aclose()
+            return sub, frame, current
+        sub, frame, current = asyncio.run(slow_client())
+        assert frame_event(frame) == "snapshot" and frame.startswith(f"id: {event_id(current)}\n")
+        assert not sub.lagging and sub.queue.empty()
+        assert broadcaster.subscriber_count() == 0
+
+        print("\n✓ Snapshot broadcaster tests PASSED")
+        return True
+        
+    except Exception as e:
+        print(f"\n✗ Snapshot broadcaster test FAILED: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+    finally:
+        stream_module.STREAM_QUEUE_SIZE = queue_size
+
+
+def test_rescan_trigger():
+    """Test POST /discovery/rescan returns before the scan runs"""
+    print("\n" + "="*60)
+    print("TEST 21: API - Rescan Trigger")
+    print("="*60)
+    
+    from core.scanner import DockerScanner
+    rescan_now = DockerScanner.rescan_now
+    try:
+        import asyncio
+        from fastapi import BackgroundTasks
+        from fastapi.testclient import TestClient
+        from main import app
+        from api.v1.discovery import RescanRequest, trigger_rescan
+
+        calls = []
+        DockerScanner.rescan_now = lambda self, host, container_ids=None: calls.append((host, container_ids))
+
+        print("\n✓ Testing hosts without a scheduler are scanned after the response...")
+        tasks = BackgroundTasks()
+        body = asyncio.run(trigger_rescan(tasks, RescanRequest(container_ids=["abc"])))
+        assert body["scheduled"] == "containers" and calls == [], calls
+        assert [task.args for task in tasks.tasks] == [(host, ["abc"]) for host in DockerScanner().hosts()]
+
+        print("\n✓ Testing the endpoint answers 202 and runs the queued scan...")
+        response = TestClient(app).post("/api/v1/discovery/rescan", json={})
+        assert response.status_code == 202 and response.json()["scheduled"] == "full"
+        assert calls == [(host, None) for host in DockerScanner().hosts()], calls
+
+        print("\n✓ Rescan trigger tests PASSED")
+        return True
+        
+    except Exception as e:
+        print(f"\n✗ Rescan trigger test FAILED: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+    finally:
+        DockerScanner.rescan_now = rescan_now
+
+
 def main():
     """Run all tests"""
     print("\n" + "█"*60)
@@ -205,9 +1384,26 @@ def main():
     
     results = {
         "RiskEngine": test_risk_engine(),
+        "ScoreCache": test_score_cache(),
         "Scanner": test_scanner(),
+        "ScannerEvents": test_event_driven_scanner(),
         "Models": test_models(),
         "EventLogger": test_event_logger(),
+        "AuditRingBuffer": test_audit_ring_buffer(),
+        "TimeSeries": test_timeseries(),
+        "BatchScoring": test_batch_scoring(),
+        "PolicyReload": test_policy_reload(),
+        "ImageRef": test_image_ref(),
+        "GovernanceBatch": test_governance_batch(),
+        "StatsSampler": test_stats_sampler(),
+        "CgroupResources": test_cgroup_resources(),
+        "ScanScheduler": test_scan_scheduler(),
+        "AsyncDockerUnreachable": test_async_docker_unreachable(),
+        "AuditStore": test_audit_store(),
+        "StatsPoolDeadlines": test_stats_pool_deadlines(),
+        "ConditionalGet": test_conditional_get(),
+        "SnapshotBroadcaster": test_snapshot_broadcaster(),
+        "RescanTrigger": test_rescan_trigger(),
     }
     
     print("\n" + "="*60)
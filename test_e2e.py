@@ -5,7 +5,10 @@ Demonstrates the full Trust Intelligence Engine workflow
 
 import sys
 import os
+import tempfile
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'sentinel-backend'))
+# Keep test runs out of the real audit database
+os.environ.setdefault("SENTINEL_AUDIT_DB", os.path.join(tempfile.mkdtemp(prefix="sentinel-test-"), "audit.db"))
 
 from core.risk_engine import TrustScoreEvaluator, SANCTIONED_IMAGES
 from core.scanner import DockerScanner
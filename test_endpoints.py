@@ -5,7 +5,10 @@ Verifies that all new endpoints are properly wired
 
 import sys
 import os
+import tempfile
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'sentinel-backend'))
+# Keep test runs out of the real audit database
+os.environ.setdefault("SENTINEL_AUDIT_DB", os.path.join(tempfile.mkdtemp(prefix="sentinel-test-"), "audit.db"))
 
 print("\n" + "="*60)
 print("API ENDPOINT INTEGRATION TEST")
@@ -45,10 +48,16 @@ try:
         "/api/v1/system/health",
         "/api/v1/security/alerts",
         "/api/v1/metrics/cost",
+        "/api/v1/metrics/timeseries",
+        "/api/v1/system/policy",
         "/api/v1/discovery/shadow-ai",
         "/api/v1/governance/audit-logs",
         "/api/v1/governance/terminate/{container_id}",
         "/api/v1/governance/quarantine/{container_id}",
+        "/api/v1/governance/batch",
+        "/api/v1/discovery/rescan",
+        "/api/v1/discovery/containers/{container_id}/rescan",
+        "/api/v1/stream",
     ]
     
     found = 0